@@ -1,15 +1,29 @@
 import asyncio
+import signal
 import sys
+from contextlib import suppress
 from loguru import logger
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from config import config
 from database.engine import create_db, async_session
 from services.cache_service import CacheService
+from services.counter_service import CounterService
+from services.stats_writer import StatsWriter
+from services.search_index import SearchIndex
+from services.listing_cache import ListingCache
+from services.random_picker import RandomPicker
+from services.broadcast_service import BroadcastService
+from services.channel_sync import ChannelSync
+from services.forward_import import ForwardImport
 from middlewares import (
     ThrottlingMiddleware,
     DatabaseMiddleware,
@@ -18,6 +32,8 @@ from middlewares import (
 )
 from handlers import get_admin_router, get_users_router
 
+ALLOWED_UPDATES = ["message", "channel_post", "callback_query", "inline_query"]
+
 # Configure logging
 logger.remove()
 logger.add(
@@ -34,6 +50,27 @@ logger.add(
 )
 
 
+async def rebuild_search_index():
+    try:
+        async with async_session() as session:
+            await SearchIndex.build(session)
+    except Exception as e:
+        logger.error(f"Search index build error: {e}")
+
+
+async def rebuild_random_pool():
+    try:
+        async with async_session() as session:
+            await RandomPicker.build(session)
+    except Exception as e:
+        logger.error(f"Random pool build error: {e}")
+
+
+async def refresh_listings():
+    async with async_session() as session:
+        await ListingCache.refresh(session)
+
+
 async def on_startup(bot: Bot):
     """Actions on bot startup."""
     logger.info("Bot is starting up...")
@@ -45,6 +82,25 @@ async def on_startup(bot: Bot):
     # Connect Redis
     await CacheService.connect()
 
+    # Background statistics writer
+    StatsWriter.start()
+
+    # In-memory title search index
+    if config.SEARCH_INDEX_ENABLED:
+        await rebuild_search_index()
+
+    # Pre-rendered Top / New pages
+    await refresh_listings()
+
+    # Active movie ids for random picks
+    await rebuild_random_pool()
+
+    # Unfinished broadcasts from a previous run
+    await BroadcastService.resume(bot)
+
+    # New posts in the source group
+    await ChannelSync.start()
+
     # Set bot commands
     from aiogram.types import BotCommand
     commands = [
@@ -67,10 +123,18 @@ async def on_startup(bot: Bot):
     logger.info("Bot started successfully!")
 
 
-async def on_shutdown(bot: Bot):
+async def on_shutdown(bot: Bot, dispatcher: Dispatcher):
     """Actions on bot shutdown."""
     logger.info("Bot is shutting down...")
 
+    # Buffered forward imports first: their totals go to the FSM storage
+    await ForwardImport.flush_all(bot)
+    await dispatcher.storage.close()
+    await BroadcastService.stop()
+    await ChannelSync.stop()
+
+    await StatsWriter.stop()
+    await CounterService.flush()
     await CacheService.disconnect()
 
     # Notify admins
@@ -83,6 +147,69 @@ async def on_shutdown(bot: Bot):
     logger.info("Bot stopped.")
 
 
+async def create_fsm_storage() -> BaseStorage:
+    """Redis FSM storage so states survive restarts and are shared by replicas."""
+    if config.FSM_REDIS:
+        storage = RedisStorage.from_url(
+            config.redis_url,
+            key_builder=DefaultKeyBuilder(prefix=config.FSM_KEY_PREFIX, with_bot_id=True),
+            state_ttl=config.FSM_TTL,
+            data_ttl=config.FSM_TTL,
+        )
+        try:
+            await storage.redis.ping()
+            logger.info("FSM storage: Redis")
+            return storage
+        except Exception as e:
+            logger.warning(f"Redis FSM storage unavailable: {e}. Using memory storage.")
+            await storage.close()
+    return MemoryStorage()
+
+
+async def health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok", "redis": CacheService._redis is not None})
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Serve updates over HTTPS webhook; any number of replicas can sit behind one URL."""
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=config.webhook_secret,
+    ).register(app, path=config.WEBHOOK_PATH)
+    app.router.add_get("/health", health)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()  # runs dp startup hooks
+    site = web.TCPSite(runner, host=config.WEBAPP_HOST, port=config.WEBAPP_PORT)
+    await site.start()
+
+    # Idempotent, so every replica may call it; the webhook is intentionally
+    # not deleted on shutdown, other replicas keep serving it.
+    await bot.set_webhook(
+        url=config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+        secret_token=config.webhook_secret,
+        allowed_updates=ALLOWED_UPDATES,
+    )
+    logger.info(f"Webhook server listening on {config.WEBAPP_HOST}:{config.WEBAPP_PORT}")
+
+    # SIGTERM (docker stop) / SIGINT end the wait, so cleanup runs the
+    # shutdown hooks: counters flushed, stats drained, broadcasts paused
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        with suppress(NotImplementedError):  # Windows event loops
+            loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+        logger.info("Stop signal received")
+    finally:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            with suppress(NotImplementedError):
+                loop.remove_signal_handler(sig)
+        await runner.cleanup()  # runs dp shutdown hooks and closes the bot session
+
+
 async def main():
     # Initialize bot
     bot = Bot(
@@ -91,7 +218,7 @@ async def main():
     )
 
     # Initialize dispatcher
-    dp = Dispatcher(storage=MemoryStorage())
+    dp = Dispatcher(storage=await create_fsm_storage())
 
     # Register startup/shutdown hooks
     dp.startup.register(on_startup)
@@ -151,12 +278,28 @@ async def main():
             logger.error(f"Daily report error: {e}")
 
     scheduler.add_job(daily_report, "cron", hour=9, minute=0)
+    scheduler.add_job(CounterService.flush, "interval", seconds=config.COUNTER_FLUSH_INTERVAL)
+    if config.SEARCH_INDEX_ENABLED:
+        scheduler.add_job(
+            rebuild_search_index, "interval", minutes=config.SEARCH_INDEX_REBUILD_MINUTES
+        )
+    scheduler.add_job(refresh_listings, "interval", seconds=config.LISTING_CACHE_REFRESH_SECONDS)
+    scheduler.add_job(rebuild_random_pool, "interval", minutes=config.RANDOM_POOL_REBUILD_MINUTES)
+    scheduler.add_job(BroadcastService.resume, "interval", minutes=1, args=[bot])
     scheduler.start()
 
+    if config.USE_WEBHOOK:
+        await run_webhook(bot, dp)
+        return
+
     # Start polling
     logger.info("Starting bot polling...")
     try:
-        await dp.start_polling(bot, allowed_updates=["message", "callback_query", "inline_query"])
+        # A webhook left behind by webhook mode makes getUpdates fail with a
+        # conflict; updates queued meanwhile are kept and polled next
+        await bot.delete_webhook(drop_pending_updates=False)
+        logger.info("Webhook removed (pending updates kept)")
+        await dp.start_polling(bot, allowed_updates=ALLOWED_UPDATES)
     finally:
         await bot.session.close()
 
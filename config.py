@@ -1,3 +1,5 @@
+import hashlib
+
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 from typing import List, Optional
@@ -20,8 +22,22 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
 
-    # Rate limit (seconds between messages)
+    # Webhook mode (long polling when USE_WEBHOOK is off)
+    USE_WEBHOOK: bool = False
+    WEBHOOK_URL: str = ""  # public base URL, e.g. https://bot.example.com
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""  # derived from BOT_TOKEN when empty
+    WEBAPP_HOST: str = "0.0.0.0"
+    WEBAPP_PORT: int = 8080
+
+    # FSM storage in Redis (falls back to memory when Redis is unreachable)
+    FSM_REDIS: bool = True
+    FSM_KEY_PREFIX: str = "fsm"
+    FSM_TTL: int = 86400
+
+    # Rate limit (seconds per token, i.e. average gap between messages)
     RATE_LIMIT: float = 0.5
+    RATE_LIMIT_BURST: int = 3
 
     # Auto code start number
     AUTO_CODE_START: int = 1
@@ -33,9 +49,58 @@ class Settings(BaseSettings):
     # Batch import settings
     BATCH_SIZE: int = 20
     BATCH_DELAY: int = 3
+    IMPORT_CHUNK_SIZE: int = 1000  # rows per INSERT in bulk ingest
+    IMPORT_PROGRESS_INTERVAL: float = 3.0  # seconds between progress edits
+    EXPORT_CHUNK_SIZE: int = 2000  # rows fetched per query in Excel export
+
+    # Rendered movie cards kept in memory (LRU)
+    CARD_CACHE_SIZE: int = 5000
+
+    # Forward import: files are buffered this long (or up to this many) per insert
+    FORWARD_IMPORT_WINDOW: float = 1.5
+    FORWARD_IMPORT_BATCH: int = 100
+
+    # Live sync of new posts in the source group/channel (0 = off)
+    IMPORT_GROUP_ID: int = 0
+    SYNC_BATCH_SIZE: int = 50
+    SYNC_FLUSH_INTERVAL: float = 2.0
+    SYNC_RETRIES: int = 3  # write attempts after the first before a post is given up
+    SYNC_RETRY_DELAY: float = 2.0  # doubled per attempt
+
+    # Write-behind counters (view_count, movies_watched, search_count)
+    COUNTER_FLUSH_INTERVAL: int = 10
+    COUNTER_USE_REDIS: bool = False
+
+    # Buffered statistics writer
+    STATS_QUEUE_SIZE: int = 10000
+    STATS_BATCH_SIZE: int = 500
+    STATS_FLUSH_INTERVAL: float = 2.0
+    STATS_PUT_TIMEOUT: float = 0.05
+
+    # In-memory title search index
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_INDEX_REBUILD_MINUTES: int = 30
+
+    # In-memory pool of active movie ids for random picks
+    RANDOM_POOL_REBUILD_MINUTES: int = 30
+
+    # Pre-rendered Top / New listing pages
+    LISTING_CACHE_PAGES: int = 5
+    LISTING_CACHE_REFRESH_SECONDS: int = 60
+
+    # Background broadcasts (Telegram allows ~30 messages/s per bot)
+    BROADCAST_RATE: float = 28
+    BROADCAST_WORKERS: int = 8
+    BROADCAST_BATCH_SIZE: int = 500
+    BROADCAST_PROGRESS_INTERVAL: int = 15
+    BROADCAST_STALE_SECONDS: int = 120
+    BROADCAST_MAX_ATTEMPTS: int = 3  # runs ending in an error before a job is marked failed
 
     # Mandatory channels (comma separated)
     MANDATORY_CHANNELS: str = ""
+    # Cached membership: members re-checked after 5 min, non-members after 30 s
+    SUBSCRIPTION_TTL: int = 300
+    SUBSCRIPTION_NEGATIVE_TTL: int = 30
 
     @property
     def admins_list(self) -> List[int]:
@@ -58,6 +123,13 @@ class Settings(BaseSettings):
     def database_url(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def webhook_secret(self) -> str:
+        """Same on every replica, so any of them can validate Telegram's header."""
+        if self.WEBHOOK_SECRET:
+            return self.WEBHOOK_SECRET
+        return hashlib.sha256(self.BOT_TOKEN.encode()).hexdigest()
+
     @property
     def redis_url(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
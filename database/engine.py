@@ -3,6 +3,8 @@ from loguru import logger
 
 from config import config
 from database.models import Base
+from database.migrations import run_extensions, run_migrations
+from database.sequences import sync_sequences
 
 engine = create_async_engine(
     config.database_url,
@@ -24,7 +26,10 @@ async def create_db():
     """Create all tables."""
     try:
         async with engine.begin() as conn:
+            await run_extensions(conn)
             await conn.run_sync(Base.metadata.create_all)
+            await run_migrations(conn)
+            await sync_sequences(conn)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Error creating database tables: {e}")
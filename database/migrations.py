@@ -0,0 +1,69 @@
+"""Idempotent schema changes applied on every startup.
+
+create_all() only creates missing tables, so columns and indexes added to
+existing tables are listed here as plain SQL that is safe to re-run.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from loguru import logger
+
+# Run before create_all (tables and indexes may depend on them)
+EXTENSIONS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+]
+
+MIGRATIONS = [
+    # Trigram search over all title variants
+    """
+    ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_text TEXT
+    GENERATED ALWAYS AS (
+        lower(coalesce(title, '') || ' ' || coalesce(title_uz, '') || ' ' || coalesce(title_ru, ''))
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_movies_search_text_trgm ON movies USING gin (search_text gin_trgm_ops)",
+    # Keyset pagination over (view_count, id) and (created_at, id)
+    "UPDATE movies SET view_count = 0 WHERE view_count IS NULL",
+    "UPDATE movies SET created_at = now() at time zone 'utc' WHERE created_at IS NULL",
+    "ALTER TABLE movies ALTER COLUMN view_count SET DEFAULT 0, ALTER COLUMN view_count SET NOT NULL",
+    """
+    ALTER TABLE movies ALTER COLUMN created_at SET DEFAULT (now() at time zone 'utc'),
+    ALTER COLUMN created_at SET NOT NULL
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_movies_active_views ON movies (view_count, id) WHERE is_active",
+    "CREATE INDEX IF NOT EXISTS ix_movies_active_created ON movies (created_at, id) WHERE is_active",
+    # Resumable broadcasts
+    """
+    ALTER TABLE broadcast_messages
+        ADD COLUMN IF NOT EXISTS from_chat_id BIGINT,
+        ADD COLUMN IF NOT EXISTS audience VARCHAR(20) DEFAULT 'all',
+        ADD COLUMN IF NOT EXISTS blocked_count INTEGER DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS last_user_id INTEGER DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP
+    """,
+    "ALTER TABLE broadcast_messages ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0",
+    # Users that blocked the bot are skipped by broadcasts
+    """
+    ALTER TABLE users
+        ADD COLUMN IF NOT EXISTS is_reachable BOOLEAN NOT NULL DEFAULT TRUE,
+        ADD COLUMN IF NOT EXISTS blocked_at TIMESTAMP
+    """,
+    "DROP INDEX IF EXISTS ix_users_banned_last_active",
+    "CREATE INDEX IF NOT EXISTS ix_users_recipients ON users (id) WHERE NOT is_banned AND is_reachable",
+]
+
+
+async def _apply(conn: AsyncConnection, statements):
+    for stmt in statements:
+        try:
+            async with conn.begin_nested():
+                await conn.execute(text(stmt))
+        except Exception as e:
+            logger.warning(f"Migration skipped: {' '.join(stmt.split())[:80]}... ({e})")
+
+
+async def run_extensions(conn: AsyncConnection):
+    await _apply(conn, EXTENSIONS)
+
+
+async def run_migrations(conn: AsyncConnection):
+    await _apply(conn, MIGRATIONS)
@@ -1,6 +1,6 @@
 from sqlalchemy import (
-    BigInteger, Boolean, Column, DateTime, Float, ForeignKey,
-    Integer, String, Text, Table, Index, func, JSON
+    BigInteger, Boolean, Column, Computed, DateTime, Float, ForeignKey,
+    Integer, String, Text, Table, Index, Sequence, func, JSON, text
 )
 from sqlalchemy.orm import DeclarativeBase, relationship
 from datetime import datetime
@@ -10,6 +10,10 @@ class Base(DeclarativeBase):
     pass
 
 
+# Code allocators (see database/sequences.py); serial codes live in 10001+
+movie_code_seq = Sequence("movie_code_seq", metadata=Base.metadata)
+serial_code_seq = Sequence("serial_code_seq", start=10001, minvalue=10001, metadata=Base.metadata)
+
 # Many-to-many: movies <-> genres
 movie_genres = Table(
     "movie_genres",
@@ -49,12 +53,23 @@ class Movie(Base):
     caption = Column(Text, nullable=True)
     added_by = Column(BigInteger, nullable=True)  # admin telegram_id
     is_active = Column(Boolean, default=True)
-    view_count = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Keyset pagination keys: never NULL, always paired with id as tie-breaker
+    view_count = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(
+        DateTime, default=datetime.utcnow,
+        server_default=text("(now() at time zone 'utc')"), nullable=False,
+    )
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Lowercased title variants, served by a pg_trgm GIN index
+    search_text = Column(Text, Computed(
+        "lower(coalesce(title, '') || ' ' || coalesce(title_uz, '') || ' ' || coalesce(title_ru, ''))",
+        persisted=True,
+    ))
 
-    genres = relationship("Genre", secondary=movie_genres, back_populates="movies", lazy="selectin")
-    favorited_by = relationship("User", secondary=user_favorites, back_populates="favorites", lazy="selectin")
+    # Nothing is loaded implicitly: repository methods opt in with selectinload()
+    # for the relations they render, anything else raises instead of querying.
+    genres = relationship("Genre", secondary=movie_genres, back_populates="movies", lazy="raise")
+    favorited_by = relationship("User", secondary=user_favorites, back_populates="favorites", lazy="raise")
 
     __table_args__ = (
         Index("ix_movies_title", "title"),
@@ -62,6 +77,12 @@ class Movie(Base):
         Index("ix_movies_title_ru", "title_ru"),
         Index("ix_movies_year", "year"),
         Index("ix_movies_is_active", "is_active"),
+        Index("ix_movies_active_views", "view_count", "id", postgresql_where=text("is_active")),
+        Index("ix_movies_active_created", "created_at", "id", postgresql_where=text("is_active")),
+        Index(
+            "ix_movies_search_text_trgm", "search_text",
+            postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
     )
 
 
@@ -73,7 +94,7 @@ class Genre(Base):
     name_ru = Column(String(100), nullable=True)
     emoji = Column(String(10), nullable=True)
 
-    movies = relationship("Movie", secondary=movie_genres, back_populates="genres", lazy="selectin")
+    movies = relationship("Movie", secondary=movie_genres, back_populates="genres", lazy="raise")
 
 
 class User(Base):
@@ -86,12 +107,20 @@ class User(Base):
     language = Column(String(10), default="uz")
     is_banned = Column(Boolean, default=False)
     is_premium = Column(Boolean, default=False)
+    # False once a send fails with "bot was blocked"/"user is deactivated"
+    is_reachable = Column(Boolean, default=True, server_default="true", nullable=False)
+    blocked_at = Column(DateTime, nullable=True)
     search_count = Column(Integer, default=0)
     movies_watched = Column(Integer, default=0)
     joined_at = Column(DateTime, default=datetime.utcnow)
     last_active = Column(DateTime, default=datetime.utcnow)
 
-    favorites = relationship("Movie", secondary=user_favorites, back_populates="favorited_by", lazy="selectin")
+    favorites = relationship("Movie", secondary=user_favorites, back_populates="favorited_by", lazy="raise")
+
+    __table_args__ = (
+        # Broadcast recipients: users.id keyset over the rows _recipients_filter keeps
+        Index("ix_users_recipients", "id", postgresql_where=text("NOT is_banned AND is_reachable")),
+    )
 
 
 class Admin(Base):
@@ -143,10 +172,16 @@ class BroadcastMessage(Base):
     admin_id = Column(BigInteger, nullable=False)
     message_text = Column(Text, nullable=True)
     message_id = Column(Integer, nullable=True)  # original message ID for forwarding
+    from_chat_id = Column(BigInteger, nullable=True)  # chat holding the original message
+    audience = Column(String(20), default="all")  # all, active
     total_users = Column(Integer, default=0)
     sent_count = Column(Integer, default=0)
     failed_count = Column(Integer, default=0)
-    status = Column(String(50), default="pending")  # pending, running, completed, cancelled
+    blocked_count = Column(Integer, default=0)
+    last_user_id = Column(Integer, default=0)  # checkpoint: users.id delivered up to
+    heartbeat_at = Column(DateTime, nullable=True)  # set by the process running the job
+    attempts = Column(Integer, default=0)  # runs that ended in an error
+    status = Column(String(50), default="pending")  # pending, running, completed, cancelled, failed
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
 
@@ -7,6 +7,7 @@ from database.models import (
     Collection, collection_movies, Movie, Referral,
     MovieRequest, Advertisement, DailyMovie, User,
 )
+from services.counter_service import CounterService
 
 
 class CollectionRepository:
@@ -161,12 +162,7 @@ class AdvertisementRepository:
 
     @staticmethod
     async def increment_view(session: AsyncSession, ad_id: int):
-        await session.execute(
-            update(Advertisement).where(Advertisement.id == ad_id).values(
-                view_count=Advertisement.view_count + 1
-            )
-        )
-        await session.commit()
+        await CounterService.incr(CounterService.AD_VIEWS, ad_id)
 
     @staticmethod
     async def deactivate_all(session: AsyncSession):
@@ -222,14 +218,8 @@ class DailyMovieRepository:
         )
         exclude = [r[0] for r in recent_ids.all()]
 
-        from database.models import Movie
-        q = select(Movie.id).where(Movie.is_active == True)
-        if exclude:
-            q = q.where(Movie.id.notin_(exclude))
-        q = q.order_by(func.random()).limit(1)
-
-        result = await session.execute(q)
-        movie_id = result.scalar_one_or_none()
+        from database.repositories.movie_repo import MovieRepository
+        movie_id = await MovieRepository.random_active_id(session, exclude=set(exclude))
 
         if movie_id:
             session.add(DailyMovie(movie_id=movie_id, date=today))
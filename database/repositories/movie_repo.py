@@ -1,14 +1,83 @@
-from sqlalchemy import select, func, update, delete, or_, desc, asc
+from sqlalchemy import select, func, update, delete, or_, desc, asc, exists, tuple_, any_, literal
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.sql import Select
+from sqlalchemy.types import Integer, String
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from typing import Optional, List, Tuple
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import AsyncIterator, Optional, List, NamedTuple, Tuple, Collection
 from datetime import datetime
+import random
 
-from database.models import Movie, Genre, movie_genres, Statistic
+from database.models import Movie, Genre, movie_genres, Statistic, Rating, User, user_favorites, movie_code_seq
+from database.sequences import allocate_codes, peek_code
+from services.cache_service import CacheService
+from services.counter_service import CounterService
+from services.random_picker import RandomPicker
+from config import config
+
+
+class BulkIngestResult(NamedTuple):
+    inserted: list  # RETURNING rows: id, code, title, title_uz, title_ru, year, quality, view_count, is_active
+    skipped: List[Tuple[int, str]]  # (row index, reason) for duplicates
+    errors: List[Tuple[int, str]]  # (row index, reason) for invalid rows
 
 
 class MovieRepository:
 
+    # Columns returned for inserted rows (enough for CatalogEvents.movies_added)
+    INGEST_RETURNING = (
+        Movie.id, Movie.code, Movie.title, Movie.title_uz, Movie.title_ru,
+        Movie.year, Movie.quality, Movie.view_count, Movie.is_active,
+    )
+
+    @staticmethod
+    def to_snapshot(movie: Movie) -> dict:
+        """Serialize a movie (with genres) for the code lookup cache."""
+        data = {
+            c.name: getattr(movie, c.name)
+            for c in Movie.__table__.columns if c.computed is None
+        }
+        for key in ("created_at", "updated_at"):
+            if data[key] is not None:
+                data[key] = data[key].isoformat()
+        data["genres"] = [
+            {"id": g.id, "name_uz": g.name_uz, "name_ru": g.name_ru, "emoji": g.emoji}
+            for g in movie.genres
+        ]
+        return data
+
+    @staticmethod
+    def from_snapshot(data: dict) -> Movie:
+        """Rebuild a detached, read-only Movie from a cached snapshot."""
+        data = dict(data)
+        genres = [Genre(**g) for g in data.pop("genres", [])]
+        for key in ("created_at", "updated_at"):
+            if data.get(key):
+                data[key] = datetime.fromisoformat(data[key])
+        movie = Movie(**data)
+        set_committed_value(movie, "genres", genres)
+        return movie
+
+    @staticmethod
+    async def get_by_code_cached(session: AsyncSession, code: int) -> Optional[Movie]:
+        """Read-through cached get_by_code for the user lookup path.
+
+        Returned movies may be detached snapshots: read them, don't modify them.
+        """
+        data = await CacheService.get_cached_movie(code)
+        if data is not None:
+            if data.get("missing"):
+                return None
+            return MovieRepository.from_snapshot(data)
+
+        movie = await MovieRepository.get_by_code(session, code)
+        if movie:
+            await CacheService.cache_movie(code, MovieRepository.to_snapshot(movie))
+        else:
+            await CacheService.cache_movie_missing(code)
+        return movie
+
     @staticmethod
     async def get_by_code(session: AsyncSession, code: int) -> Optional[Movie]:
         """Get movie by its code."""
@@ -35,90 +104,124 @@ class MovieRepository:
         )
         return result.scalar_one_or_none()
 
+    @staticmethod
+    def _search_pattern(query: str) -> str:
+        escaped = query.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{escaped}%"
+
     @staticmethod
     async def search_by_title(
         session: AsyncSession, query: str, limit: int = 10, offset: int = 0
     ) -> Tuple[List[Movie], int]:
-        """Search movies by title (uz, ru, original)."""
-        search_filter = or_(
-            Movie.title.ilike(f"%{query}%"),
-            Movie.title_uz.ilike(f"%{query}%"),
-            Movie.title_ru.ilike(f"%{query}%"),
-        )
+        """Search movies by title (uz, ru, original) using the trigram index.
 
-        # Count
-        count_q = select(func.count(Movie.id)).where(search_filter, Movie.is_active == True)
-        total = (await session.execute(count_q)).scalar() or 0
-
-        # Results
+        Ranked by word similarity, then popularity. The total comes from a
+        window count, so there is no separate COUNT query.
+        """
+        q = query.strip().lower()
         result = await session.execute(
-            select(Movie)
-            .options(selectinload(Movie.genres))
-            .where(search_filter, Movie.is_active == True)
-            .order_by(desc(Movie.view_count), desc(Movie.created_at))
+            select(Movie, func.count().over().label("total"))
+            .where(
+                Movie.search_text.like(MovieRepository._search_pattern(q), escape="\\"),
+                Movie.is_active == True,
+            )
+            .order_by(
+                desc(func.word_similarity(q, Movie.search_text)),
+                desc(Movie.view_count),
+                desc(Movie.id),
+            )
             .limit(limit)
             .offset(offset)
         )
-        return result.scalars().all(), total
+        rows = result.all()
+        total = rows[0].total if rows else 0
+        return [row[0] for row in rows], total
+
+    # ---- Keyset pagination ----
+    # Listings are ordered by (key, id) descending. `after` is the (key, id) of
+    # the last row of the previous page, `before` the first row of the next
+    # one (used for the back button), so every page is an index seek.
+
+    @staticmethod
+    async def keyset_page(
+        session: AsyncSession, stmt: Select, key_col, limit: int,
+        after: Optional[tuple] = None, before: Optional[tuple] = None,
+    ) -> List[Movie]:
+        if before is not None:
+            stmt = (
+                stmt.where(tuple_(key_col, Movie.id) > tuple_(*before))
+                .order_by(asc(key_col), asc(Movie.id))
+            )
+        else:
+            if after is not None:
+                stmt = stmt.where(tuple_(key_col, Movie.id) < tuple_(*after))
+            stmt = stmt.order_by(desc(key_col), desc(Movie.id))
+
+        movies = list((await session.execute(stmt.limit(limit))).scalars().all())
+        if before is not None:
+            movies.reverse()
+        return movies
+
+    @staticmethod
+    async def cached_count(session: AsyncSession, key: str, stmt: Select) -> int:
+        """Listing total from the count cache; refreshed at most every COUNT_TTL."""
+        total = await CacheService.get_count(key)
+        if total is None:
+            total = (await session.execute(stmt)).scalar() or 0
+            await CacheService.set_count(key, total)
+        return total
 
     @staticmethod
     async def get_by_genre(
-        session: AsyncSession, genre_id: int, limit: int = 10, offset: int = 0
+        session: AsyncSession, genre_id: int, limit: int = 10,
+        after: Optional[tuple] = None, before: Optional[tuple] = None,
     ) -> Tuple[List[Movie], int]:
-        count_q = (
-            select(func.count(Movie.id))
-            .join(movie_genres)
-            .where(movie_genres.c.genre_id == genre_id, Movie.is_active == True)
+        where = (movie_genres.c.genre_id == genre_id, Movie.is_active == True)
+        total = await MovieRepository.cached_count(
+            session, f"genre:{genre_id}",
+            select(func.count(Movie.id)).join(movie_genres).where(*where),
         )
-        total = (await session.execute(count_q)).scalar() or 0
-
-        result = await session.execute(
-            select(Movie)
-            .join(movie_genres)
-            .where(movie_genres.c.genre_id == genre_id, Movie.is_active == True)
-            .order_by(desc(Movie.created_at))
-            .limit(limit)
-            .offset(offset)
+        movies = await MovieRepository.keyset_page(
+            session, select(Movie).join(movie_genres).where(*where),
+            Movie.created_at, limit, after, before,
         )
-        return result.scalars().all(), total
+        return movies, total
 
     @staticmethod
     async def get_by_year(
-        session: AsyncSession, year: int, limit: int = 10, offset: int = 0
+        session: AsyncSession, year: int, limit: int = 10,
+        after: Optional[tuple] = None, before: Optional[tuple] = None,
     ) -> Tuple[List[Movie], int]:
-        count_q = select(func.count(Movie.id)).where(Movie.year == year, Movie.is_active == True)
-        total = (await session.execute(count_q)).scalar() or 0
-
-        result = await session.execute(
-            select(Movie)
-            .where(Movie.year == year, Movie.is_active == True)
-            .order_by(desc(Movie.created_at))
-            .limit(limit)
-            .offset(offset)
+        where = (Movie.year == year, Movie.is_active == True)
+        total = await MovieRepository.cached_count(
+            session, f"year:{year}", select(func.count(Movie.id)).where(*where)
         )
-        return result.scalars().all(), total
+        movies = await MovieRepository.keyset_page(
+            session, select(Movie).where(*where), Movie.created_at, limit, after, before
+        )
+        return movies, total
 
     @staticmethod
-    async def get_popular(session: AsyncSession, limit: int = 10, offset: int = 0) -> List[Movie]:
-        result = await session.execute(
-            select(Movie)
-            .where(Movie.is_active == True)
-            .order_by(desc(Movie.view_count))
-            .limit(limit)
-            .offset(offset)
+    async def get_popular(
+        session: AsyncSession, limit: int = 10,
+        after: Optional[tuple] = None, before: Optional[tuple] = None,
+    ) -> List[Movie]:
+        """Ordered by (view_count, id); cursors are (view_count, id)."""
+        return await MovieRepository.keyset_page(
+            session, select(Movie).where(Movie.is_active == True),
+            Movie.view_count, limit, after, before,
         )
-        return result.scalars().all()
 
     @staticmethod
-    async def get_latest(session: AsyncSession, limit: int = 10, offset: int = 0) -> List[Movie]:
-        result = await session.execute(
-            select(Movie)
-            .where(Movie.is_active == True)
-            .order_by(desc(Movie.created_at))
-            .limit(limit)
-            .offset(offset)
+    async def get_latest(
+        session: AsyncSession, limit: int = 10,
+        after: Optional[tuple] = None, before: Optional[tuple] = None,
+    ) -> List[Movie]:
+        """Ordered by (created_at, id); cursors are (created_at, id)."""
+        return await MovieRepository.keyset_page(
+            session, select(Movie).where(Movie.is_active == True),
+            Movie.created_at, limit, after, before,
         )
-        return result.scalars().all()
 
     @staticmethod
     async def create(session: AsyncSession, **kwargs) -> Movie:
@@ -131,20 +234,144 @@ class MovieRepository:
     @staticmethod
     async def bulk_create(session: AsyncSession, movies_data: List[dict]) -> Tuple[int, int]:
         """Bulk create movies. Returns (success_count, fail_count)."""
-        success = 0
-        fail = 0
-        for data in movies_data:
+        result = await MovieRepository.bulk_ingest(session, movies_data)
+        return len(result.inserted), len(result.skipped) + len(result.errors)
+
+    @staticmethod
+    def _validate_ingest_row(data: dict) -> Optional[str]:
+        """Reason the row can't be inserted, or None."""
+        unknown = set(data) - set(Movie.__table__.columns.keys())
+        if unknown:
+            return f"noma'lum ustun: {', '.join(sorted(unknown))}"
+        title = data.get("title")
+        if not isinstance(title, str) or not title.strip():
+            return "nom yo'q"
+        if len(title) > Movie.title.type.length:
+            return "nom juda uzun"
+        code = data.get("code")
+        if code is not None and (not isinstance(code, int) or code <= 0):
+            return f"noto'g'ri kod: {code}"
+        year = data.get("year")
+        if year is not None and not isinstance(year, int):
+            return f"noto'g'ri yil: {year}"
+        for key in ("quality", "language", "file_unique_id"):
+            value = data.get(key)
+            if value is not None and len(str(value)) > getattr(Movie, key).type.length:
+                return f"{key} juda uzun"
+        return None
+
+    @staticmethod
+    async def bulk_ingest(
+        session: AsyncSession, movies_data: List[dict], chunk_size: Optional[int] = None
+    ) -> BulkIngestResult:
+        """Insert many movies at once, reporting the outcome per row index.
+
+        Rows are validated up front; codes and file_unique_ids already in the
+        table (or repeated within the input) are skipped after one set-based
+        lookup; rows without a code get a block of codes from movie_code_seq.
+        Rows without file_id get a "PLACEHOLDER_<code>" one until the video
+        is attached. Each chunk is a single INSERT ... ON CONFLICT DO NOTHING RETURNING and
+        is committed on its own, so a failure only costs that chunk's rows,
+        which are then retried one by one to pin down the bad ones.
+        """
+        chunk_size = chunk_size or config.IMPORT_CHUNK_SIZE
+        skipped: List[Tuple[int, str]] = []
+        errors: List[Tuple[int, str]] = []
+
+        valid: List[Tuple[int, dict]] = []
+        for index, data in enumerate(movies_data):
+            reason = MovieRepository._validate_ingest_row(data)
+            if reason:
+                errors.append((index, reason))
+            else:
+                valid.append((index, dict(data, title=data["title"].strip())))
+
+        codes = [data["code"] for _, data in valid if data.get("code") is not None]
+        unique_ids = [data["file_unique_id"] for _, data in valid if data.get("file_unique_id")]
+        taken_codes, taken_ids = set(), set()
+        if codes or unique_ids:
+            result = await session.execute(
+                select(Movie.code, Movie.file_unique_id).where(or_(
+                    Movie.code == any_(literal(codes, ARRAY(Integer))),
+                    Movie.file_unique_id == any_(literal(unique_ids, ARRAY(String))),
+                ))
+            )
+            for code, file_unique_id in result.all():
+                taken_codes.add(code)
+                taken_ids.add(file_unique_id)
+
+        rows: List[Tuple[int, dict]] = []
+        needs_code: List[dict] = []
+        for index, data in valid:
+            code, file_unique_id = data.get("code"), data.get("file_unique_id")
+            if code is not None and code in taken_codes:
+                skipped.append((index, f"kod {code} band"))
+                continue
+            if file_unique_id and file_unique_id in taken_ids:
+                skipped.append((index, "fayl allaqachon mavjud"))
+                continue
+            if code is not None:
+                taken_codes.add(code)
+            if file_unique_id:
+                taken_ids.add(file_unique_id)
+            if code is None:
+                needs_code.append(data)
+            rows.append((index, data))
+
+        if needs_code:
+            block = await MovieRepository.allocate_codes(session, len(needs_code))
+            for data, code in zip(needs_code, block):
+                data["code"] = code
+        for _, data in rows:
+            if not data.get("file_id"):
+                data["file_id"] = f"PLACEHOLDER_{data['code']}"
+
+        # Multi-row VALUES needs the same keys in every row; fill in the
+        # column defaults the ORM would otherwise have applied.
+        now = datetime.utcnow()
+        defaults = {"file_type": "video", "is_active": True, "view_count": 0, "created_at": now, "updated_at": now}
+        keys = set(defaults).union(*(data.keys() for _, data in rows))
+        rows = [(index, {key: data.get(key, defaults.get(key)) for key in keys}) for index, data in rows]
+
+        inserted = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            failed = set()
             try:
-                movie = Movie(**data)
-                session.add(movie)
-                await session.flush()
-                success += 1
+                returned = await MovieRepository._insert_chunk(session, [data for _, data in chunk])
+                await session.commit()
             except Exception:
                 await session.rollback()
-                fail += 1
-        if success > 0:
-            await session.commit()
-        return success, fail
+                returned = []
+                for index, data in chunk:
+                    try:
+                        returned += await MovieRepository._insert_chunk(session, [data])
+                        await session.commit()
+                    except Exception as e:
+                        await session.rollback()
+                        failed.add(index)
+                        errors.append((index, str(getattr(e, "orig", e)).splitlines()[0][:200]))
+
+            inserted += returned
+            returned_codes = {row.code for row in returned}
+            for index, data in chunk:
+                if data["code"] not in returned_codes and index not in failed:
+                    # Lost a race with a concurrent insert of the same code/file
+                    skipped.append((index, "allaqachon mavjud"))
+
+        skipped.sort()
+        errors.sort()
+        return BulkIngestResult(inserted, skipped, errors)
+
+    @staticmethod
+    async def _insert_chunk(session: AsyncSession, rows: List[dict]) -> list:
+        result = await session.execute(
+            pg_insert(Movie)
+            .values(rows)
+            .on_conflict_do_nothing()
+            .returning(*MovieRepository.INGEST_RETURNING)
+        )
+        return result.all()
 
     @staticmethod
     async def update_movie(session: AsyncSession, movie_id: int, **kwargs) -> Optional[Movie]:
@@ -173,20 +400,23 @@ class MovieRepository:
 
     @staticmethod
     async def increment_view(session: AsyncSession, movie_id: int):
-        await session.execute(
-            update(Movie).where(Movie.id == movie_id).values(
-                view_count=Movie.view_count + 1
-            )
-        )
-        await session.commit()
+        await CounterService.incr(CounterService.MOVIE_VIEWS, movie_id)
 
     @staticmethod
     async def get_next_code(session: AsyncSession) -> int:
-        result = await session.execute(
-            select(func.max(Movie.code))
-        )
-        max_code = result.scalar()
-        return (max_code or 0) + 1
+        """Reserve one new code."""
+        codes = await MovieRepository.allocate_codes(session, 1)
+        return codes[0]
+
+    @staticmethod
+    async def peek_next_code(session: AsyncSession) -> int:
+        """Code the next allocation should get, for display only (nothing reserved)."""
+        return await peek_code(session, movie_code_seq)
+
+    @staticmethod
+    async def allocate_codes(session: AsyncSession, count: int) -> List[int]:
+        """Reserve a block of `count` unused movie codes for a bulk import."""
+        return await allocate_codes(session, movie_code_seq, Movie.code, count)
 
     @staticmethod
     async def get_total_count(session: AsyncSession) -> int:
@@ -195,22 +425,49 @@ class MovieRepository:
         )
         return result.scalar() or 0
 
+    @staticmethod
+    async def get_active_count_cached(session: AsyncSession) -> int:
+        return await MovieRepository.cached_count(
+            session, "movies", select(func.count(Movie.id)).where(Movie.is_active == True)
+        )
+
+    @staticmethod
+    async def iter_export_rows(
+        session: AsyncSession, columns: tuple, chunk_size: int = 1000
+    ) -> AsyncIterator[list]:
+        """Stream the given Movie columns for every movie in id order, a chunk at a time.
+
+        Plain rows, no ORM objects, and only one chunk in memory.
+        """
+        after_id = 0
+        while True:
+            result = await session.execute(
+                select(Movie.id, *columns)
+                .where(Movie.id > after_id)
+                .order_by(Movie.id)
+                .limit(chunk_size)
+            )
+            batch = result.all()
+            if batch:
+                yield [row[1:] for row in batch]
+            if len(batch) < chunk_size:
+                return
+            after_id = batch[-1][0]
+
     @staticmethod
     async def get_all_movies(
-        session: AsyncSession, limit: int = 50, offset: int = 0, active_only: bool = True
+        session: AsyncSession, limit: int = 50, active_only: bool = True,
+        after: Optional[tuple] = None, before: Optional[tuple] = None,
     ) -> Tuple[List[Movie], int]:
         where_clause = [Movie.is_active == True] if active_only else []
-        count_q = select(func.count(Movie.id)).where(*where_clause)
-        total = (await session.execute(count_q)).scalar() or 0
-
-        result = await session.execute(
-            select(Movie)
-            .where(*where_clause)
-            .order_by(desc(Movie.created_at))
-            .limit(limit)
-            .offset(offset)
+        total = await MovieRepository.cached_count(
+            session, "movies" if active_only else "movies:all",
+            select(func.count(Movie.id)).where(*where_clause),
         )
-        return result.scalars().all(), total
+        movies = await MovieRepository.keyset_page(
+            session, select(Movie).where(*where_clause), Movie.created_at, limit, after, before
+        )
+        return movies, total
 
     @staticmethod
     async def set_genres(session: AsyncSession, movie_id: int, genre_ids: List[int]):
@@ -226,16 +483,41 @@ class MovieRepository:
             )
         await session.commit()
 
+    @staticmethod
+    async def random_active_id(session: AsyncSession, exclude: Collection[int] = ()) -> Optional[int]:
+        """Random active movie id without sorting the table.
+
+        Uses the in-memory RandomPicker; until it is loaded, probes the primary
+        key index from a random point (slightly biased, but two index seeks).
+        """
+        if RandomPicker.is_ready():
+            return RandomPicker.pick(exclude)
+
+        max_id = (await session.execute(select(func.max(Movie.id)))).scalar()
+        if not max_id:
+            return None
+        start = random.randint(1, max_id)
+        base = select(Movie.id).where(Movie.is_active == True)
+        if exclude:
+            base = base.where(Movie.id.notin_(exclude))
+        for bound in (Movie.id >= start, Movie.id < start):
+            movie_id = (await session.execute(base.where(bound).order_by(Movie.id).limit(1))).scalar()
+            if movie_id:
+                return movie_id
+        return None
+
     @staticmethod
     async def get_random(session: AsyncSession) -> Optional[Movie]:
         """Get a random active movie."""
-        result = await session.execute(
-            select(Movie)
-            .where(Movie.is_active == True)
-            .order_by(func.random())
-            .limit(1)
-        )
-        return result.scalar_one_or_none()
+        for _ in range(3):
+            movie_id = await MovieRepository.random_active_id(session)
+            if movie_id is None:
+                return None
+            movie = await MovieRepository.get_by_id(session, movie_id)
+            if movie and movie.is_active:
+                return movie
+            RandomPicker.remove(movie_id)  # deleted or hidden since the picker was loaded
+        return None
 
     @staticmethod
     async def get_similar(session: AsyncSession, movie: Movie, limit: int = 5) -> List[Movie]:
@@ -286,25 +568,15 @@ class MovieRepository:
 
     @staticmethod
     async def search_similar_names(session: AsyncSession, query: str, limit: int = 5) -> List[Movie]:
-        """Fuzzy search — shorter query parts."""
-        words = query.strip().split()
-        if not words:
-            return []
-
-        conditions = []
-        for word in words:
-            if len(word) >= 2:
-                conditions.append(Movie.title.ilike(f"%{word}%"))
-                conditions.append(Movie.title_uz.ilike(f"%{word}%"))
-                conditions.append(Movie.title_ru.ilike(f"%{word}%"))
-
-        if not conditions:
+        """Fuzzy search — trigram word similarity, tolerant to typos."""
+        q = query.strip().lower()
+        if len(q) < 2:
             return []
 
         result = await session.execute(
             select(Movie)
-            .where(or_(*conditions), Movie.is_active == True)
-            .order_by(desc(Movie.view_count))
+            .where(Movie.search_text.op("%>")(q), Movie.is_active == True)
+            .order_by(desc(func.word_similarity(q, Movie.search_text)), desc(Movie.view_count))
             .limit(limit)
         )
         return result.scalars().all()
@@ -347,6 +619,31 @@ class MovieRepository:
         count = row[1] or 0
         return round(avg, 1), count
 
+    @staticmethod
+    async def get_view_context(session: AsyncSession, movie_id: int, telegram_id: int) -> dict:
+        """Rating aggregate, favorite flag and the user's own score in one query."""
+        user_id = select(User.id).where(User.telegram_id == telegram_id).scalar_subquery()
+        result = await session.execute(
+            select(
+                select(func.avg(Rating.score)).where(Rating.movie_id == movie_id).scalar_subquery(),
+                select(func.count(Rating.id)).where(Rating.movie_id == movie_id).scalar_subquery(),
+                exists().where(
+                    user_favorites.c.user_id == user_id,
+                    user_favorites.c.movie_id == movie_id,
+                ),
+                select(Rating.score)
+                .where(Rating.user_id == user_id, Rating.movie_id == movie_id)
+                .scalar_subquery(),
+            )
+        )
+        avg, count, is_fav, user_rating = result.one()
+        return {
+            "avg_rating": round(float(avg), 1) if avg else 0.0,
+            "rating_count": count or 0,
+            "is_favorite": bool(is_fav),
+            "user_rating": user_rating or 0,
+        }
+
     @staticmethod
     async def rate_movie(session: AsyncSession, user_id: int, movie_id: int, score: int) -> bool:
         """Rate a movie (1-5). Updates if already rated."""
@@ -1,9 +1,11 @@
-from sqlalchemy import select, func, update, delete, desc
+from sqlalchemy import select, func, delete, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from typing import Optional, List, Tuple
 
-from database.models import Serial, Episode
+from database.models import Serial, Episode, serial_code_seq
+from database.sequences import allocate_codes
+from services.counter_service import CounterService
 
 
 class SerialRepository:
@@ -53,10 +55,9 @@ class SerialRepository:
 
     @staticmethod
     async def get_next_code(session: AsyncSession) -> int:
-        result = await session.execute(select(func.max(Serial.code)))
-        max_code = result.scalar()
-        # Serial kodlari 10000 dan boshlanadi
-        return max(10001, (max_code or 10000) + 1)
+        # Serial kodlari 10001 dan boshlanadi (serial_code_seq)
+        codes = await allocate_codes(session, serial_code_seq, Serial.code, 1)
+        return codes[0]
 
     @staticmethod
     async def add_episode(session: AsyncSession, **kwargs) -> Episode:
@@ -100,10 +101,7 @@ class SerialRepository:
 
     @staticmethod
     async def increment_view(session: AsyncSession, serial_id: int):
-        await session.execute(
-            update(Serial).where(Serial.id == serial_id).values(view_count=Serial.view_count + 1)
-        )
-        await session.commit()
+        await CounterService.incr(CounterService.SERIAL_VIEWS, serial_id)
 
     @staticmethod
     async def delete_serial(session: AsyncSession, serial_id: int) -> bool:
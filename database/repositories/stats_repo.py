@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 from typing import List, Dict
 
 from database.models import Statistic, Movie, User
+from services.counter_service import CounterService
+from services.stats_writer import StatsWriter
 
 
 class StatsRepository:
@@ -16,6 +18,16 @@ class StatsRepository:
         movie_id: int = None,
         query_text: str = None,
     ):
+        """Queue a statistic event; falls back to a direct insert without the writer."""
+        if StatsWriter.is_running():
+            await StatsWriter.put(
+                action_type=action_type,
+                user_id=user_id,
+                movie_id=movie_id,
+                query_text=query_text,
+            )
+            return
+
         stat = Statistic(
             action_type=action_type,
             user_id=user_id,
@@ -25,6 +37,13 @@ class StatsRepository:
         session.add(stat)
         await session.commit()
 
+    @staticmethod
+    async def record_view(session: AsyncSession, movie_id: int, user_id: int):
+        """View bookkeeping: buffered counters plus the statistic row."""
+        await CounterService.incr(CounterService.MOVIE_VIEWS, movie_id)
+        await CounterService.incr(CounterService.USER_WATCHED, user_id)
+        await StatsRepository.log_action(session, "view", user_id=user_id, movie_id=movie_id)
+
     @staticmethod
     async def get_daily_stats(session: AsyncSession, days: int = 7) -> Dict:
         since = datetime.utcnow() - timedelta(days=days)
@@ -110,9 +129,14 @@ class StatsRepository:
             )
         )).scalar() or 0
 
+        unreachable = (await session.execute(
+            select(func.count(User.id)).where(User.is_reachable == False)
+        )).scalar() or 0
+
         return {
             "total_movies": total_movies,
             "total_users": total_users,
+            "unreachable_users": unreachable,
             "today_users": today_users,
             "today_views": today_views,
             "active_7d": active_7d,
@@ -5,6 +5,9 @@ from typing import Optional, List, Tuple
 from datetime import datetime, timedelta
 
 from database.models import User, user_favorites, Movie
+from database.repositories.movie_repo import MovieRepository
+from services.cache_service import CacheService
+from services.counter_service import CounterService
 
 
 class UserRepository:
@@ -25,6 +28,10 @@ class UserRepository:
         if user:
             # Update last active and info
             user.last_active = datetime.utcnow()
+            if not user.is_reachable:
+                # Writing to the bot again means it is unblocked
+                user.is_reachable = True
+                user.blocked_at = None
             if username:
                 user.username = username
             if full_name:
@@ -95,40 +102,52 @@ class UserRepository:
         return result.scalar() or 0
 
     @staticmethod
-    async def get_all_user_ids(session: AsyncSession, active_only: bool = True) -> List[int]:
-        """Get all user telegram IDs for broadcast."""
-        q = select(User.telegram_id).where(User.is_banned == False)
-        if active_only:
-            since = datetime.utcnow() - timedelta(days=30)
-            q = q.where(User.last_active >= since)
-        result = await session.execute(q)
-        return [row[0] for row in result.all()]
+    def _recipients_filter(audience: str) -> list:
+        where = [User.is_banned == False, User.is_reachable == True]
+        if audience == "active":
+            where.append(User.last_active >= datetime.utcnow() - timedelta(days=30))
+        return where
 
     @staticmethod
-    async def get_all_user_ids_no_filter(session: AsyncSession) -> List[int]:
+    async def count_recipients(session: AsyncSession, audience: str) -> int:
         result = await session.execute(
-            select(User.telegram_id).where(User.is_banned == False)
+            select(func.count(User.id)).where(*UserRepository._recipients_filter(audience))
         )
-        return [row[0] for row in result.all()]
+        return result.scalar() or 0
 
     @staticmethod
-    async def increment_search(session: AsyncSession, telegram_id: int):
-        await session.execute(
-            update(User).where(User.telegram_id == telegram_id).values(
-                search_count=User.search_count + 1
-            )
+    async def get_recipient_batch(
+        session: AsyncSession, audience: str, after_id: int, limit: int
+    ) -> List[Tuple[int, int]]:
+        """Next (users.id, telegram_id) batch after after_id, in id order."""
+        result = await session.execute(
+            select(User.id, User.telegram_id)
+            .where(User.id > after_id, *UserRepository._recipients_filter(audience))
+            .order_by(User.id)
+            .limit(limit)
         )
-        await session.commit()
+        return [tuple(row) for row in result.all()]
 
     @staticmethod
-    async def increment_watched(session: AsyncSession, telegram_id: int):
+    async def mark_unreachable(session: AsyncSession, telegram_ids: List[int]):
+        """Bulk-flag users whose chats refuse messages (blocked bot / deleted account)."""
+        if not telegram_ids:
+            return
         await session.execute(
-            update(User).where(User.telegram_id == telegram_id).values(
-                movies_watched=User.movies_watched + 1
-            )
+            update(User)
+            .where(User.telegram_id.in_(telegram_ids), User.is_reachable == True)
+            .values(is_reachable=False, blocked_at=datetime.utcnow())
         )
         await session.commit()
 
+    @staticmethod
+    async def increment_search(session: AsyncSession, telegram_id: int):
+        await CounterService.incr(CounterService.USER_SEARCHES, telegram_id)
+
+    @staticmethod
+    async def increment_watched(session: AsyncSession, telegram_id: int):
+        await CounterService.incr(CounterService.USER_WATCHED, telegram_id)
+
     # ---- Favorites ----
     @staticmethod
     async def add_favorite(session: AsyncSession, user_id: int, movie_id: int) -> bool:
@@ -137,6 +156,7 @@ class UserRepository:
                 user_favorites.insert().values(user_id=user_id, movie_id=movie_id)
             )
             await session.commit()
+            await CacheService.invalidate_counts(f"favs:{user_id}")
             return True
         except Exception:
             await session.rollback()
@@ -151,6 +171,7 @@ class UserRepository:
             )
         )
         await session.commit()
+        await CacheService.invalidate_counts(f"favs:{user_id}")
         return result.rowcount > 0
 
     @staticmethod
@@ -165,20 +186,22 @@ class UserRepository:
 
     @staticmethod
     async def get_favorites(
-        session: AsyncSession, user_id: int, limit: int = 10, offset: int = 0
+        session: AsyncSession, user_id: int, limit: int = 10,
+        after: Optional[tuple] = None, before: Optional[tuple] = None,
     ) -> Tuple[List[Movie], int]:
-        count_q = select(func.count()).where(user_favorites.c.user_id == user_id)
-        total = (await session.execute(count_q)).scalar() or 0
-
-        result = await session.execute(
+        """Keyset-paged by (created_at, id), see MovieRepository.keyset_page."""
+        total = await MovieRepository.cached_count(
+            session, f"favs:{user_id}",
+            select(func.count()).where(user_favorites.c.user_id == user_id),
+        )
+        movies = await MovieRepository.keyset_page(
+            session,
             select(Movie)
             .join(user_favorites, user_favorites.c.movie_id == Movie.id)
-            .where(user_favorites.c.user_id == user_id, Movie.is_active == True)
-            .order_by(desc(Movie.created_at))
-            .limit(limit)
-            .offset(offset)
+            .where(user_favorites.c.user_id == user_id, Movie.is_active == True),
+            Movie.created_at, limit, after, before,
         )
-        return result.scalars().all(), total
+        return movies, total
 
     @staticmethod
     async def get_users_paginated(
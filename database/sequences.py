@@ -0,0 +1,56 @@
+"""Movie and serial codes handed out by Postgres sequences.
+
+nextval() is never rolled back and never returns the same value twice, so
+concurrent imports get disjoint blocks of codes without locks or retries.
+"""
+from typing import List
+
+from sqlalchemy import Column, Integer, Sequence, any_, func, literal, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from config import config
+
+
+async def allocate_codes(session: AsyncSession, sequence: Sequence, column: Column, count: int) -> List[int]:
+    """Reserve `count` unused codes in one round trip (plus one to skip codes typed in by hand)."""
+    codes: List[int] = []
+    while len(codes) < count:
+        result = await session.execute(
+            select(sequence.next_value()).select_from(func.generate_series(1, count - len(codes)))
+        )
+        block = result.scalars().all()
+        result = await session.execute(
+            select(column).where(column == any_(literal(block, ARRAY(Integer))))
+        )
+        taken = set(result.scalars().all())
+        codes += [code for code in block if code not in taken]
+    return codes
+
+
+async def peek_code(session: AsyncSession, sequence: Sequence) -> int:
+    """The code the next allocation will most likely get, without consuming it."""
+    result = await session.execute(
+        text(f"SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END FROM {sequence.name}")
+    )
+    return result.scalar()
+
+
+async def sync_sequences(conn: AsyncConnection):
+    """Move the sequences past codes already in use and up to AUTO_CODE_START (never back)."""
+    from database.models import movie_code_seq, serial_code_seq
+
+    for sequence, table, start in (
+        (movie_code_seq, "movies", config.AUTO_CODE_START),
+        (serial_code_seq, "serials", 10001),
+    ):
+        await conn.execute(
+            text(f"""
+                SELECT setval('{sequence.name}', GREATEST(
+                    (SELECT COALESCE(MAX(code), 0) + 1 FROM {table}),
+                    :start,
+                    (SELECT CASE WHEN is_called THEN last_value + 1 ELSE last_value END FROM {sequence.name})
+                ), false)
+            """),
+            {"start": start},
+        )
@@ -7,10 +7,12 @@ from handlers.admin.broadcast import router as broadcast_router
 from handlers.admin.manage_channels import router as channels_router
 from handlers.admin.import_movies import router as import_router
 from handlers.admin.admin_extras import router as extras_router
+from handlers.admin.channel_sync import router as channel_sync_router
 
 
 def get_admin_router() -> Router:
     router = Router()
+    router.include_router(channel_sync_router)
     router.include_router(dashboard_router)
     router.include_router(add_movie_router)
     router.include_router(manage_movies_router)
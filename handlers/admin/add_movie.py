@@ -14,7 +14,7 @@ from keyboards.inline import (
     genre_select_kb, confirm_kb, admin_menu_kb,
 )
 from utils.helpers import format_movie_caption, LANG_MAP
-from services.cache_service import CacheService
+from services.catalog_events import CatalogEvents
 
 router = Router()
 router.message.filter(IsAdmin())
@@ -72,8 +72,8 @@ async def receive_file(message: Message, state: FSMContext, session: AsyncSessio
         )
         return
 
-    # Get next code
-    next_code = await MovieRepository.get_next_code(session)
+    # Suggested code (reserved only when the admin skips)
+    next_code = await MovieRepository.peek_next_code(session)
 
     caption_text = message.caption or ""
 
@@ -372,7 +372,7 @@ async def confirm_add_movie(callback: CallbackQuery, state: FSMContext, session:
             await MovieRepository.set_genres(session, movie.id, genre_ids)
 
         # Invalidate cache
-        await CacheService.invalidate_movie(movie.code)
+        await CatalogEvents.movie_saved(movie)
 
         await callback.message.edit_text(
             f"✅ <b>Kino muvaffaqiyatli qo'shildi!</b>\n\n"
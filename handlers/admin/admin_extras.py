@@ -1,6 +1,8 @@
-import io
+import asyncio
+import os
+import tempfile
 from aiogram import Router, F, Bot
-from aiogram.types import Message, CallbackQuery, ContentType, BufferedInputFile
+from aiogram.types import Message, CallbackQuery, ContentType, FSInputFile
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,12 +10,15 @@ from sqlalchemy import select
 from loguru import logger
 
 from filters.admin_filter import IsAdmin
+from database.models import Movie
 from database.repositories import (
     MovieRepository, StatsRepository, UserRepository,
     CollectionRepository, AdvertisementRepository,
     DailyMovieRepository, MovieRequestRepository,
 )
 from keyboards.inline import admin_menu_kb, confirm_kb, cancel_kb
+from services.catalog_events import CatalogEvents
+from services.spreadsheet import SheetWriter
 from config import config
 
 router = Router()
@@ -151,8 +156,8 @@ async def edit_field_value(message: Message, state: FSMContext, session: AsyncSe
         kwargs = {field: value}
         movie = await MovieRepository.update_movie(session, movie_id, **kwargs)
 
-        from services.cache_service import CacheService
-        await CacheService.invalidate_movie(data.get("edit_movie_code", 0))
+        if movie:
+            await CatalogEvents.movie_saved(movie, old_code=data.get("edit_movie_code"))
 
         await message.answer(
             f"✅ Yangilandi!\n\n{field}: <b>{value}</b>",
@@ -169,45 +174,37 @@ async def edit_field_value(message: Message, state: FSMContext, session: AsyncSe
 @router.message(F.text == "📥 Excel export")
 async def excel_export(message: Message, session: AsyncSession):
     progress = await message.answer("⏳ Excel tayyorlanmoqda...")
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
 
     try:
-        import openpyxl
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Kinolar"
-
-        headers = ["Kod", "Nom", "Yil", "Sifat", "Til", "Ko'rishlar", "Faol", "Qo'shilgan"]
-        for col, h in enumerate(headers, 1):
-            ws.cell(row=1, column=col, value=h)
-            ws.cell(row=1, column=col).font = openpyxl.styles.Font(bold=True)
-
-        movies, total = await MovieRepository.get_all_movies(session, limit=10000, active_only=False)
-
-        for row, movie in enumerate(movies, 2):
-            ws.cell(row=row, column=1, value=movie.code)
-            ws.cell(row=row, column=2, value=movie.title)
-            ws.cell(row=row, column=3, value=movie.year)
-            ws.cell(row=row, column=4, value=movie.quality)
-            ws.cell(row=row, column=5, value=movie.language)
-            ws.cell(row=row, column=6, value=movie.view_count)
-            ws.cell(row=row, column=7, value="Ha" if movie.is_active else "Yo'q")
-            ws.cell(row=row, column=8, value=movie.created_at.strftime("%d.%m.%Y") if movie.created_at else "")
-
-        # Auto width
-        for col in ws.columns:
-            max_len = max(len(str(cell.value or "")) for cell in col)
-            ws.column_dimensions[col[0].column_letter].width = min(max_len + 2, 50)
-
-        buffer = io.BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-
-        file = BufferedInputFile(buffer.read(), filename=f"kinolar_{total}.xlsx")
-        await message.answer_document(file, caption=f"📊 Jami: {total} ta kino")
+        writer = SheetWriter(
+            path, "Kinolar",
+            ["Kod", "Nom", "Yil", "Sifat", "Til", "Ko'rishlar", "Faol", "Qo'shilgan"],
+        )
+        columns = (
+            Movie.code, Movie.title, Movie.year, Movie.quality, Movie.language,
+            Movie.view_count, Movie.is_active, Movie.created_at,
+        )
+        async for batch in MovieRepository.iter_export_rows(session, columns, config.EXPORT_CHUNK_SIZE):
+            rows = [
+                (*row[:6], "Ha" if row[6] else "Yo'q", row[7].strftime("%d.%m.%Y") if row[7] else "")
+                for row in batch
+            ]
+            await asyncio.to_thread(writer.append, rows)
+        await asyncio.to_thread(writer.save)
+
+        await message.answer_document(
+            FSInputFile(path, filename=f"kinolar_{writer.rows}.xlsx"),
+            caption=f"📊 Jami: {writer.rows} ta kino",
+        )
         await progress.delete()
 
     except Exception as e:
+        logger.error(f"Excel export error: {e}")
         await progress.edit_text(f"❌ Xato: {str(e)[:200]}")
+    finally:
+        os.unlink(path)
 
 
 # ============== REKLAMA BOSHQARUVI ==============
@@ -515,8 +512,7 @@ async def delete_movie_confirm(callback: CallbackQuery, state: FSMContext, sessi
 
     try:
         await MovieRepository.delete_movie(session, movie_id)
-        from services.cache_service import CacheService
-        await CacheService.invalidate_movie(code)
+        await CatalogEvents.movie_deleted(movie_id, code)
 
         await callback.message.edit_text(
             f"✅ O'chirildi!\n\n🎬 <b>[{code}] {title}</b>",
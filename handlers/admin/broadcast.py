@@ -1,17 +1,15 @@
-import asyncio
 from aiogram import Router, F, Bot
+from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
-from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
 from filters.admin_filter import IsAdmin
-from database.repositories import UserRepository
+from services.broadcast_service import BroadcastService
 from states.admin_states import BroadcastStates
 from keyboards.inline import (
     broadcast_confirm_kb, cancel_kb, admin_menu_kb,
 )
-from config import config
 
 router = Router()
 router.message.filter(IsAdmin())
@@ -49,9 +47,7 @@ async def receive_broadcast_message(message: Message, state: FSMContext):
 
 
 @router.callback_query(BroadcastStates.confirm, F.data.startswith("bc:"))
-async def confirm_broadcast(
-    callback: CallbackQuery, state: FSMContext, session: AsyncSession, bot: Bot
-):
+async def confirm_broadcast(callback: CallbackQuery, state: FSMContext, bot: Bot):
     action = callback.data.split(":")[1]
 
     if action == "cancel":
@@ -70,66 +66,55 @@ async def confirm_broadcast(
         await state.clear()
         return
 
-    # Get user IDs
-    if action == "active":
-        user_ids = await UserRepository.get_all_user_ids(session, active_only=True)
-    else:
-        user_ids = await UserRepository.get_all_user_ids_no_filter(session)
-
-    total = len(user_ids)
-    await callback.message.edit_text(
-        f"📢 Broadcast boshlandi...\n"
-        f"👥 Jami: {total} ta foydalanuvchi\n"
-        f"⏳ Iltimos kuting...",
+    job = await BroadcastService.create(
+        admin_id=callback.from_user.id,
+        from_chat_id=chat_id,
+        message_id=msg_id,
+        audience="active" if action == "active" else "all",
     )
-    await callback.answer()
+    BroadcastService.start(bot, job.id)
+    await state.clear()
 
-    sent = 0
-    failed = 0
-    blocked = 0
-
-    for i, user_id in enumerate(user_ids):
-        try:
-            await bot.copy_message(
-                chat_id=user_id,
-                from_chat_id=chat_id,
-                message_id=msg_id,
-            )
-            sent += 1
-        except Exception as e:
-            error_str = str(e).lower()
-            if "blocked" in error_str or "deactivated" in error_str:
-                blocked += 1
-            else:
-                failed += 1
-
-        # Rate limiting: 25 messages per second
-        if (i + 1) % 25 == 0:
-            await asyncio.sleep(1)
-
-        # Progress update every 100 users
-        if (i + 1) % 100 == 0:
-            try:
-                await callback.message.edit_text(
-                    f"📢 Broadcast davom etmoqda...\n"
-                    f"✅ Yuborildi: {sent}\n"
-                    f"❌ Xato: {failed}\n"
-                    f"🚫 Bloklagan: {blocked}\n"
-                    f"⏳ {i + 1}/{total}",
-                )
-            except Exception:
-                pass
-
-    # Final report
     await callback.message.edit_text(
-        f"✅ <b>Broadcast yakunlandi!</b>\n\n"
-        f"👥 Jami: {total}\n"
-        f"✅ Yuborildi: {sent}\n"
-        f"❌ Xato: {failed}\n"
-        f"🚫 Bloklagan: {blocked}",
+        f"📢 Broadcast #{job.id} boshlandi!\n"
+        f"👥 Jami: {job.total_users} ta foydalanuvchi\n\n"
+        f"Jarayon fonda davom etadi. Holat: /bcstatus\n"
+        f"To'xtatish: <code>/bccancel {job.id}</code>",
         parse_mode="HTML",
     )
     await callback.message.answer("Admin menyu:", reply_markup=admin_menu_kb())
+    await callback.answer()
+    logger.info(f"Broadcast #{job.id} queued by admin {callback.from_user.id}: {job.total_users} recipients")
 
-    await state.clear()
-    logger.info(f"Broadcast completed: {sent}/{total} sent, {failed} failed, {blocked} blocked")
+
+@router.message(Command("bcstatus"))
+async def broadcast_status(message: Message):
+    jobs = await BroadcastService.get_recent(limit=5)
+    if not jobs:
+        await message.answer("📭 Broadcastlar yo'q.")
+        return
+
+    icons = {"pending": "🕓", "running": "▶️", "completed": "✅", "cancelled": "⛔", "failed": "❌"}
+    text = "📢 <b>Oxirgi broadcastlar:</b>\n\n"
+    for job in jobs:
+        done = (job.sent_count or 0) + (job.failed_count or 0) + (job.blocked_count or 0)
+        text += (
+            f"{icons.get(job.status, '•')} #{job.id} — {job.status} "
+            f"({job.created_at.strftime('%d.%m %H:%M')})\n"
+            f"   ✅ {job.sent_count or 0} | ❌ {job.failed_count or 0} | "
+            f"🚫 {job.blocked_count or 0} | ⏳ {done}/{job.total_users}\n"
+        )
+    await message.answer(text, parse_mode="HTML")
+
+
+@router.message(Command("bccancel"))
+async def broadcast_cancel(message: Message):
+    parts = message.text.split()
+    if len(parts) < 2 or not parts[1].isdigit():
+        await message.answer("Foydalanish: <code>/bccancel ID</code>", parse_mode="HTML")
+        return
+
+    if await BroadcastService.cancel(int(parts[1])):
+        await message.answer(f"⛔ Broadcast #{parts[1]} to'xtatilmoqda...")
+    else:
+        await message.answer("❌ Faol broadcast topilmadi.")
@@ -0,0 +1,16 @@
+from aiogram import Router, F
+from aiogram.types import Message
+
+from services.channel_sync import ChannelSync
+from config import config
+
+router = Router()
+router.message.filter(F.chat.id == config.IMPORT_GROUP_ID)
+router.channel_post.filter(F.chat.id == config.IMPORT_GROUP_ID)
+
+
+@router.message(F.video | F.document)
+@router.channel_post(F.video | F.document)
+async def source_post(message: Message):
+    """New upload in the source group/channel: queue it for ChannelSync."""
+    ChannelSync.put(message)
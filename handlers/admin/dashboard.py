@@ -8,6 +8,15 @@ from loguru import logger
 from filters.admin_filter import IsAdmin
 from database.repositories import StatsRepository, MovieRepository, UserRepository
 from keyboards.inline import admin_menu_kb, main_menu_kb
+from services.cache_service import CacheService
+from services.counter_service import CounterService
+from services.stats_writer import StatsWriter
+from services.search_index import SearchIndex
+from services.listing_cache import ListingCache
+from services.subscription_service import SubscriptionService
+from services.rate_limiter import RateLimiter
+from services.channel_sync import ChannelSync
+from services.card_cache import MovieCard
 
 router = Router()
 router.message.filter(IsAdmin())
@@ -39,7 +48,8 @@ async def show_statistics(message: Message, session: AsyncSession):
         "📊 <b>Bot statistikasi</b>\n\n"
         f"👥 Jami foydalanuvchilar: <b>{stats['total_users']}</b>\n"
         f"👤 Bugun qo'shilgan: <b>{stats['today_users']}</b>\n"
-        f"🟢 Faol (7 kun): <b>{stats['active_7d']}</b>\n\n"
+        f"🟢 Faol (7 kun): <b>{stats['active_7d']}</b>\n"
+        f"🚫 Botni bloklagan: <b>{stats['unreachable_users']}</b>\n\n"
         f"🎬 Jami kinolar: <b>{stats['total_movies']}</b>\n"
         f"👁 Bugungi ko'rishlar: <b>{stats['today_views']}</b>\n\n"
         f"📈 <b>Oxirgi 7 kun:</b>\n"
@@ -53,6 +63,63 @@ async def show_statistics(message: Message, session: AsyncSession):
         for i, (code, title, views) in enumerate(top, 1):
             text += f"{i}. [{code}] {title} — {views} ko'rish\n"
 
+    cache = CacheService.get_movie_stats()
+    text += (
+        f"\n⚡️ <b>Kod keshi:</b> {cache['hit_rate']}% hit\n"
+        f"• Hit: {cache['hits']} | Yo'q kod: {cache['missing_hits']} | Miss: {cache['misses']}\n"
+    )
+
+    counters = CounterService.get_stats()
+    text += (
+        f"\n🧮 <b>Hisoblagichlar:</b> {counters['pending_rows']} ta kutmoqda, lag {counters['lag']}s\n"
+        f"• Oxirgi flush: {counters['last_flush_rows']} qator / "
+        f"{counters['last_flush_increments']} ta, lag {counters['last_flush_lag']}s\n"
+    )
+
+    writer = StatsWriter.get_stats()
+    text += (
+        f"\n📝 <b>Statistika navbati:</b> {writer['queued']} ta\n"
+        f"• Yozildi: {writer['written']} | Tashlandi: {writer['dropped']} | Xato: {writer['errors']}\n"
+    )
+
+    listings = ListingCache.get_stats()
+    text += (
+        f"\n📑 <b>Top/Yangi sahifalar keshi:</b>\n"
+        f"• Hit rate: {listings['hit_rate']}% | Yangilangan: {listings['age'] if listings['age'] is not None else '—'} s oldin\n"
+    )
+
+    subs = SubscriptionService.get_stats()
+    text += (
+        f"\n📡 <b>Obuna tekshiruvi:</b>\n"
+        f"• Keshdan: {subs['hit_rate']}% | API so'rovlar: {subs['checked']} | Xato: {subs['errors']}\n"
+    )
+
+    limiter = RateLimiter.get_stats()
+    if limiter["routes"]:
+        text += "\n🚦 <b>Rate limit (ruxsat / rad / rad %):</b>\n"
+        for route, counts in sorted(limiter["routes"].items()):
+            text += f"• {route}: {counts['allowed']} / {counts['rejected']} / {counts['reject_rate']}%\n"
+        if limiter["fallback_checks"]:
+            text += f"• Redis'siz tekshiruvlar: {limiter['fallback_checks']}\n"
+
+    cards = MovieCard.get_stats()
+    text += f"\n🃏 <b>Kino kartalari keshi:</b> {cards['cards']} ta, hit rate {cards['hit_rate']}%\n"
+
+    if ChannelSync.is_running():
+        sync = ChannelSync.get_stats()
+        text += (
+            f"\n🛰 <b>Guruh sinxronizatsiyasi:</b> {sync['known']} ta fayl ma'lum\n"
+            f"• Qo'shildi: {sync['added']} | Takror: {sync['duplicates']} | "
+            f"Navbatda: {sync['queued']} | Xato: {sync['errors']} | Yo'qoldi: {sync['lost']}\n"
+        )
+
+    index = SearchIndex.get_stats()
+    if index["ready"]:
+        text += (
+            f"\n🔎 <b>Qidiruv indeksi:</b> {index['entries']} ta nom, {index['memory_mb']} MB\n"
+            f"• 100k nomga: ~{index['mb_per_100k']} MB\n"
+        )
+
     await message.answer(text, parse_mode="HTML")
 
 
@@ -134,6 +201,8 @@ async def user_info_cmd(message: Message, session: AsyncSession):
         return
 
     status = "🔴 Bloklangan" if user.is_banned else "🟢 Faol"
+    if not user.is_reachable:
+        status += " (botni bloklagan)"
     text = (
         f"👤 <b>Foydalanuvchi ma'lumotlari</b>\n\n"
         f"🆔 ID: <code>{user.telegram_id}</code>\n"
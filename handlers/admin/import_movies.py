@@ -1,4 +1,8 @@
 import asyncio
+import html
+import os
+import tempfile
+import time
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery, ContentType
 from aiogram.fsm.context import FSMContext
@@ -9,7 +13,9 @@ from filters.admin_filter import IsAdmin
 from database.repositories import MovieRepository
 from states.admin_states import ImportStates
 from keyboards.inline import import_method_kb, cancel_kb, admin_menu_kb
-from services.cache_service import CacheService
+from services.catalog_events import CatalogEvents
+from services.forward_import import ForwardImport
+from services.spreadsheet import read_batches
 from config import config
 
 router = Router()
@@ -32,12 +38,12 @@ async def start_import(message: Message, state: FSMContext):
 @router.callback_query(F.data == "import:forward")
 async def import_forward_start(callback: CallbackQuery, state: FSMContext):
     await state.set_state(ImportStates.waiting_forward)
-    await state.update_data(imported_count=0, failed_count=0, skipped_count=0)
+    await ForwardImport.start(callback.from_user.id, state)
     await callback.message.edit_text(
         "📤 <b>Forward import</b>\n\n"
         "Kinolarni botga forward qiling.\n"
         "Har bir video/dokumentga avtomatik kod beriladi.\n\n"
-        "⚠️ <b>Muhim:</b> Telegram limitlari tufayli biroz sekin forward qiling.\n\n"
+        "Bir yo'la 100 tagacha fayl forward qilish mumkin, natija bitta xabarda yangilanib boradi.\n\n"
         "Tugatgach «❌ Bekor qilish» bosing yoki /done yozing.",
         parse_mode="HTML",
     )
@@ -49,38 +55,14 @@ async def import_forward_start(callback: CallbackQuery, state: FSMContext):
     ImportStates.waiting_forward,
     F.content_type.in_({ContentType.VIDEO, ContentType.DOCUMENT}),
 )
-async def import_forward_receive(message: Message, state: FSMContext, session: AsyncSession):
-    data = await state.get_data()
-    imported = data.get("imported_count", 0)
-    failed = data.get("failed_count", 0)
-    skipped = data.get("skipped_count", 0)
-
+async def import_forward_receive(message: Message, state: FSMContext, bot: Bot):
     if message.video:
-        file_id = message.video.file_id
-        file_unique_id = message.video.file_unique_id
-        file_type = "video"
-        duration = message.video.duration
-        file_size = message.video.file_size
+        media, file_type, duration = message.video, "video", message.video.duration
     elif message.document:
-        file_id = message.document.file_id
-        file_unique_id = message.document.file_unique_id
-        file_type = "document"
-        duration = None
-        file_size = message.document.file_size
+        media, file_type, duration = message.document, "document", None
     else:
         return
 
-    # Check duplicate
-    existing = await MovieRepository.get_by_file_unique_id(session, file_unique_id)
-    if existing:
-        skipped += 1
-        await state.update_data(skipped_count=skipped)
-        await message.reply(
-            f"⏭ O'tkazildi (allaqachon bor): kod <code>{existing.code}</code>",
-            parse_mode="HTML",
-        )
-        return
-
     # Extract title from caption or filename
     title = "Nomsiz kino"
     if message.caption:
@@ -90,43 +72,27 @@ async def import_forward_receive(message: Message, state: FSMContext, session: A
         fname = message.document.file_name
         title = fname.rsplit(".", 1)[0] if "." in fname else fname
 
-    try:
-        code = await MovieRepository.get_next_code(session)
-        movie = await MovieRepository.create(
-            session,
-            code=code,
-            title=title,
-            file_id=file_id,
-            file_unique_id=file_unique_id,
-            file_type=file_type,
-            duration=duration,
-            file_size=file_size,
-            caption=message.caption,
-            added_by=message.from_user.id,
-        )
-        imported += 1
-        await state.update_data(imported_count=imported)
-        await message.reply(
-            f"✅ Qo'shildi! Kod: <code>{movie.code}</code> | {title[:50]}",
-            parse_mode="HTML",
-        )
-    except Exception as e:
-        failed += 1
-        await state.update_data(failed_count=failed)
-        logger.error(f"Import error: {e}")
-        await message.reply(f"❌ Xato: {str(e)[:100]}")
+    ForwardImport.add(bot, message.from_user.id, state, {
+        "title": title,
+        "file_id": media.file_id,
+        "file_unique_id": media.file_unique_id,
+        "file_type": file_type,
+        "duration": duration,
+        "file_size": media.file_size,
+        "caption": message.caption,
+        "added_by": message.from_user.id,
+    })
 
 
 @router.message(ImportStates.waiting_forward, F.text == "❌ Bekor qilish")
 @router.message(ImportStates.waiting_forward, F.text == "/done")
-async def import_forward_done(message: Message, state: FSMContext):
-    data = await state.get_data()
-    imported = data.get("imported_count", 0)
-    failed = data.get("failed_count", 0)
-    skipped = data.get("skipped_count", 0)
+async def import_forward_done(message: Message, state: FSMContext, bot: Bot):
+    totals = await ForwardImport.finish(bot, message.from_user.id, state)
+    imported = totals["imported"]
+    failed = totals["failed"]
+    skipped = totals["skipped"]
 
     await state.clear()
-    await CacheService.invalidate_all_movies()
 
     await message.answer(
         f"✅ <b>Import yakunlandi!</b>\n\n"
@@ -232,6 +198,26 @@ async def import_excel_start(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+EXCEL_ERRORS_SHOWN = 10
+
+
+def _excel_row_to_movie(row: dict, added_by: int) -> dict:
+    """Map a spreadsheet row to Movie columns; ValueError on unusable cells."""
+    code = row.get("code")
+    title = row.get("title") or row.get("nom") or row.get("name")
+    year = row.get("year") or row.get("yil")
+    data = {
+        "title": str(title).strip() if title else None,
+        "year": int(year) if year else None,
+        "quality": str(row.get("quality") or row.get("sifat") or "").strip() or None,
+        "language": str(row.get("language") or row.get("til") or "").strip() or None,
+        "added_by": added_by,
+    }
+    if code not in (None, ""):
+        data["code"] = int(code)
+    return data
+
+
 @router.message(ImportStates.waiting_file, F.content_type == ContentType.DOCUMENT)
 async def import_excel_receive(message: Message, state: FSMContext, session: AsyncSession, bot: Bot):
     doc = message.document
@@ -245,86 +231,74 @@ async def import_excel_receive(message: Message, state: FSMContext, session: Asy
         return
 
     progress = await message.answer("⏳ Fayl yuklanmoqda...")
+    fd, path = tempfile.mkstemp(suffix=f".{ext}")
+    os.close(fd)
 
     try:
-        file = await bot.download(doc)
-        import io
-
-        if ext == "csv":
-            import csv
-            content = file.read().decode("utf-8-sig")
-            reader = csv.DictReader(io.StringIO(content))
-            rows = list(reader)
-        else:
-            import openpyxl
-            wb = openpyxl.load_workbook(file)
-            ws = wb.active
-            headers = [str(cell.value).lower().strip() for cell in ws[1] if cell.value]
-            rows = []
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                row_dict = {}
-                for i, val in enumerate(row):
-                    if i < len(headers):
-                        row_dict[headers[i]] = val
-                if any(row_dict.values()):
-                    rows.append(row_dict)
+        await bot.download(doc, destination=path)
+
+        rows = inserted = skipped = error_count = 0
+        errors = []  # first EXCEL_ERRORS_SHOWN only, the rest is logged
+        last_progress = time.monotonic()
+
+        async for batch in read_batches(path, ext, config.IMPORT_CHUNK_SIZE):
+            rows += len(batch)
+            movies_data, batch_errors = [], []
+            for line, row in batch:
+                try:
+                    movies_data.append((line, _excel_row_to_movie(row, message.from_user.id)))
+                except (TypeError, ValueError) as e:
+                    batch_errors.append((line, str(e)))
+
+            result = await MovieRepository.bulk_ingest(session, [data for _, data in movies_data])
+            await CatalogEvents.movies_added(result.inserted)
+            inserted += len(result.inserted)
+            skipped += len(result.skipped)
+            batch_errors += [(movies_data[index][0], reason) for index, reason in result.errors]
+            batch_errors.sort()
+            for line, reason in batch_errors:
+                logger.warning(f"Excel import row {line}: {reason}")
+            error_count += len(batch_errors)
+            errors += batch_errors[:EXCEL_ERRORS_SHOWN - len(errors)]
+
+            if time.monotonic() - last_progress >= config.IMPORT_PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                try:
+                    await progress.edit_text(
+                        f"⏳ Import davom etmoqda...\n\n"
+                        f"📊 {rows} qator o'qildi\n"
+                        f"✅ Qo'shildi: {inserted}\n"
+                        f"⏭ O'tkazildi: {skipped}\n"
+                        f"❌ Xato: {error_count}"
+                    )
+                except Exception:
+                    pass
 
         if not rows:
             await progress.edit_text("❌ Fayl bo'sh yoki format noto'g'ri!")
             await state.clear()
             return
 
-        imported = 0
-        failed = 0
-        skipped = 0
-
-        for row in rows:
-            try:
-                code = row.get("code")
-                title = row.get("title") or row.get("nom") or row.get("name")
-
-                if not title:
-                    failed += 1
-                    continue
-
-                if code:
-                    code = int(code)
-                    existing = await MovieRepository.get_by_code(session, code)
-                    if existing:
-                        skipped += 1
-                        continue
-                else:
-                    code = await MovieRepository.get_next_code(session)
-
-                await MovieRepository.create(
-                    session,
-                    code=code,
-                    title=str(title).strip(),
-                    year=int(row.get("year") or row.get("yil") or 0) or None,
-                    quality=str(row.get("quality") or row.get("sifat") or "").strip() or None,
-                    language=str(row.get("language") or row.get("til") or "").strip() or None,
-                    file_id="PLACEHOLDER_" + str(code),
-                    added_by=message.from_user.id,
-                )
-                imported += 1
-
-            except Exception as e:
-                failed += 1
-                logger.error(f"Excel import row error: {e}")
-
-        await progress.edit_text(
+        text = (
             f"✅ <b>Excel import yakunlandi!</b>\n\n"
-            f"✅ Qo'shildi: {imported}\n"
+            f"✅ Qo'shildi: {inserted}\n"
             f"⏭ O'tkazildi: {skipped}\n"
-            f"❌ Xato: {failed}\n"
-            f"📊 Jami: {len(rows)} qator",
-            parse_mode="HTML",
+            f"❌ Xato: {error_count}\n"
+            f"📊 Jami: {rows} qator"
         )
-        await CacheService.invalidate_all_movies()
+        if errors:
+            text += "\n\n" + "\n".join(
+                f"• {line}-qator: {html.escape(reason)}" for line, reason in errors
+            )
+            if error_count > len(errors):
+                text += f"\n... va yana {error_count - len(errors)} ta"
+        await progress.edit_text(text, parse_mode="HTML")
 
     except Exception as e:
         logger.error(f"Excel import error: {e}")
         await progress.edit_text(f"❌ Xatolik: {str(e)[:300]}")
+    finally:
+        os.unlink(path)
 
     await state.clear()
     await message.answer("Admin menyu:", reply_markup=admin_menu_kb())
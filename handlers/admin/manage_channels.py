@@ -9,6 +9,7 @@ from filters.admin_filter import IsAdmin
 from database.models import Channel
 from states.admin_states import AddChannelStates
 from keyboards.inline import channel_manage_kb, cancel_kb, admin_menu_kb
+from services.subscription_service import SubscriptionService
 
 router = Router()
 router.message.filter(IsAdmin())
@@ -47,6 +48,7 @@ async def toggle_channel(callback: CallbackQuery, session: AsyncSession):
             update(Channel).where(Channel.id == channel_id).values(is_active=new_status)
         )
         await session.commit()
+        SubscriptionService.invalidate_channels()
 
     # Refresh list
     result = await session.execute(select(Channel).order_by(Channel.created_at))
@@ -118,6 +120,7 @@ async def add_channel_receive(message: Message, state: FSMContext, session: Asyn
         )
         session.add(channel)
         await session.commit()
+        SubscriptionService.invalidate_channels()
 
         await message.answer(
             f"✅ Kanal qo'shildi!\n\n"
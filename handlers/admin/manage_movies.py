@@ -7,11 +7,14 @@ from loguru import logger
 from filters.admin_filter import IsAdmin
 from database.repositories import MovieRepository
 from keyboards.inline import (
-    admin_menu_kb, admin_movie_actions_kb, pagination_kb,
+    admin_menu_kb, admin_movie_actions_kb, cursor_pagination_kb,
     confirm_kb,
 )
-from utils.helpers import format_movie_list_item, format_movie_caption, calculate_pages
-from services.cache_service import CacheService
+from utils.helpers import (
+    format_movie_list_item, format_movie_caption, calculate_pages,
+    decode_cursor, page_cursors, parse_page_callback,
+)
+from services.catalog_events import CatalogEvents
 from config import config
 
 router = Router()
@@ -33,30 +36,32 @@ async def list_movies(message: Message, session: AsyncSession):
         text += f"{status} {format_movie_list_item(movie, i)}\n"
 
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
-    kb = pagination_kb("amovies", 1, pages) if pages > 1 else None
+    kb = cursor_pagination_kb("amovies", 1, pages, *page_cursors(movies, "created_at")) if pages > 1 else None
     await message.answer(text, parse_mode="HTML", reply_markup=kb)
 
 
 @router.callback_query(F.data.startswith("amovies:"))
 async def list_movies_page(callback: CallbackQuery, session: AsyncSession):
-    parts = callback.data.split(":")
-    page = int(parts[1])
-    offset = (page - 1) * config.MOVIES_PER_PAGE
+    page, cursor, _ = parse_page_callback(callback.data)
+    after, before = decode_cursor(cursor, as_datetime=True)
+    if after is None and before is None:
+        page = 1
 
     movies, total = await MovieRepository.get_all_movies(
-        session, limit=config.MOVIES_PER_PAGE, offset=offset
+        session, limit=config.MOVIES_PER_PAGE, after=after, before=before
     )
     if not movies:
         await callback.answer("Boshqa kino yo'q")
         return
 
+    offset = (page - 1) * config.MOVIES_PER_PAGE
     text = f"📋 <b>Kinolar ro'yxati</b> ({total} ta):\n\n"
     for i, movie in enumerate(movies, offset + 1):
         status = "✅" if movie.is_active else "❌"
         text += f"{status} {format_movie_list_item(movie, i)}\n"
 
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
-    kb = pagination_kb("amovies", page, pages)
+    kb = cursor_pagination_kb("amovies", page, pages, *page_cursors(movies, "created_at"))
 
     try:
         await callback.message.edit_text(text, parse_mode="HTML", reply_markup=kb)
@@ -92,7 +97,7 @@ async def delete_movie_action(callback: CallbackQuery, state: FSMContext, sessio
     movie = await MovieRepository.get_by_id(session, movie_id)
     if movie:
         await MovieRepository.delete_movie(session, movie_id)
-        await CacheService.invalidate_movie(movie.code)
+        await CatalogEvents.movie_deleted(movie.id, movie.code)
         await callback.message.edit_text(
             f"✅ Kino o'chirildi: [{movie.code}] {movie.title}",
             parse_mode="HTML",
@@ -6,11 +6,17 @@ from loguru import logger
 
 from database.repositories import MovieRepository, UserRepository, StatsRepository
 from keyboards.inline import (
-    movie_detail_kb_v2, pagination_kb, similar_movies_kb, categories_kb,
+    pagination_kb, cursor_pagination_kb, similar_movies_kb, categories_kb,
 )
 from keyboards.reply import main_menu_kb
-from utils.helpers import format_movie_caption, format_movie_list_item, calculate_pages
+from utils.helpers import (
+    format_movie_list_item, calculate_pages,
+    decode_cursor, page_cursors, parse_page_callback,
+)
 from services.cache_service import CacheService
+from services.card_cache import MovieCard
+from services.listing_cache import ListingCache
+from services.search_index import SearchIndex
 from config import config
 
 router = Router()
@@ -18,33 +24,12 @@ router = Router()
 
 async def send_movie(target, movie, session: AsyncSession, user_telegram_id: int):
     """Send movie to user with enhanced caption and rating."""
-    await MovieRepository.increment_view(session, movie.id)
-    await UserRepository.increment_watched(session, user_telegram_id)
-    await StatsRepository.log_action(
-        session, "view", user_id=user_telegram_id, movie_id=movie.id
-    )
-
-    # Get rating info
-    avg_rating, rating_count = await MovieRepository.get_avg_rating(session, movie.id)
-
-    # Check favorite
-    user = await UserRepository.get_by_telegram_id(session, user_telegram_id)
-    is_fav = False
-    user_rating = 0
-    if user:
-        is_fav = await UserRepository.is_favorite(session, user.id, movie.id)
-        # Get user's own rating
-        from database.models import Rating
-        from sqlalchemy import select
-        result = await session.execute(
-            select(Rating.score).where(Rating.user_id == user.id, Rating.movie_id == movie.id)
-        )
-        ur = result.scalar_one_or_none()
-        if ur:
-            user_rating = ur
+    ctx = await MovieRepository.get_view_context(session, movie.id, user_telegram_id)
 
-    caption = format_movie_caption(movie, avg_rating=avg_rating, rating_count=rating_count)
-    kb = movie_detail_kb_v2(movie.id, is_fav, avg_rating, user_rating)
+    caption = MovieCard.caption(
+        movie, avg_rating=ctx["avg_rating"], rating_count=ctx["rating_count"]
+    )
+    kb = MovieCard.keyboard(movie.id, ctx["is_favorite"], ctx["avg_rating"], ctx["user_rating"])
 
     msg_target = target
     if isinstance(target, CallbackQuery):
@@ -88,6 +73,23 @@ async def send_movie(target, movie, session: AsyncSession, user_telegram_id: int
                 f"Kino kodi: <code>{movie.code}</code>",
                 parse_mode="HTML",
             )
+            return
+
+    # Bookkeeping goes after the send so it never delays the video
+    await StatsRepository.record_view(session, movie.id, user_telegram_id)
+
+
+async def find_movies(session: AsyncSession, query: str, limit: int, offset: int = 0):
+    """Title search: in-memory index once it is built, database until then."""
+    if SearchIndex.is_ready():
+        return SearchIndex.search(query, limit=limit, offset=offset)
+    return await MovieRepository.search_by_title(session, query, limit=limit, offset=offset)
+
+
+async def find_similar_names(session: AsyncSession, query: str, limit: int = 5):
+    if SearchIndex.is_ready():
+        return SearchIndex.suggest(query, limit=limit)
+    return await MovieRepository.search_similar_names(session, query, limit=limit)
 
 
 # ============== MOVIE BY CODE ==============
@@ -95,7 +97,7 @@ async def send_movie(target, movie, session: AsyncSession, user_telegram_id: int
 @router.message(F.text.regexp(r"^\d+$"))
 async def search_by_code(message: Message, session: AsyncSession):
     code = int(message.text.strip())
-    movie = await MovieRepository.get_by_code(session, code)
+    movie = await MovieRepository.get_by_code_cached(session, code)
     if not movie:
         await message.answer(
             f"❌ <code>{code}</code> kodli kino topilmadi.",
@@ -130,13 +132,11 @@ async def search_by_text(message: Message, session: AsyncSession, state: FSMCont
         session, "search", user_id=message.from_user.id, query_text=query
     )
 
-    movies, total = await MovieRepository.search_by_title(
-        session, query, limit=config.MOVIES_PER_PAGE
-    )
+    movies, total = await find_movies(session, query, limit=config.MOVIES_PER_PAGE)
 
     if not movies:
         # O'xshash nomlarni qidirish
-        similar = await MovieRepository.search_similar_names(session, query, limit=5)
+        similar = await find_similar_names(session, query, limit=5)
         if similar:
             text = f"🔍 <b>«{query}»</b> topilmadi.\n\n💡 <b>Balki shulardan birimi?</b>\n\n"
             for i, m in enumerate(similar, 1):
@@ -152,8 +152,10 @@ async def search_by_text(message: Message, session: AsyncSession, state: FSMCont
         return
 
     if total == 1:
-        await send_movie(message, movies[0], session, message.from_user.id)
-        return
+        movie = await MovieRepository.get_by_code_cached(session, movies[0].code)
+        if movie:
+            await send_movie(message, movie, session, message.from_user.id)
+            return
 
     text = f"🔍 <b>«{query}»</b> — {total} ta natija:\n\n"
     for i, movie in enumerate(movies, 1):
@@ -177,7 +179,7 @@ async def search_page(callback: CallbackQuery, session: AsyncSession):
     query = ":".join(parts[2:])
     offset = (page - 1) * config.MOVIES_PER_PAGE
 
-    movies, total = await MovieRepository.search_by_title(
+    movies, total = await find_movies(
         session, query, limit=config.MOVIES_PER_PAGE, offset=offset
     )
     if not movies:
@@ -216,7 +218,7 @@ async def rate_movie(callback: CallbackQuery, session: AsyncSession):
     avg_rating, rating_count = await MovieRepository.get_avg_rating(session, movie_id)
     is_fav = await UserRepository.is_favorite(session, user.id, movie_id)
 
-    kb = movie_detail_kb_v2(movie_id, is_fav, avg_rating, score)
+    kb = MovieCard.keyboard(movie_id, is_fav, avg_rating, score)
     try:
         await callback.message.edit_reply_markup(reply_markup=kb)
     except Exception:
@@ -251,7 +253,7 @@ async def show_similar(callback: CallbackQuery, session: AsyncSession):
 @router.callback_query(F.data.startswith("viewmovie:"))
 async def view_movie_cb(callback: CallbackQuery, session: AsyncSession):
     code = int(callback.data.split(":")[1])
-    movie = await MovieRepository.get_by_code(session, code)
+    movie = await MovieRepository.get_by_code_cached(session, code)
     if not movie:
         await callback.answer("Kino topilmadi")
         return
@@ -294,6 +296,17 @@ async def category_handler(callback: CallbackQuery, session: AsyncSession):
         await callback.answer()
         return
 
+    if cat in ("new", "top"):
+        title = "🆕 Yangi kinolar" if cat == "new" else "🔥 Top kinolar"
+        cached = await ListingCache.get(session, cat, 1)
+        if cached:
+            try:
+                await callback.message.edit_text(f"<b>{title}:</b>\n\n" + cached.body, parse_mode="HTML")
+            except Exception:
+                await callback.message.answer(f"<b>{title}:</b>\n\n" + cached.body, parse_mode="HTML")
+            await callback.answer()
+            return
+
     if cat == "new":
         movies = await MovieRepository.get_latest(session, limit=config.MOVIES_PER_PAGE)
         title = "🆕 Yangi kinolar"
@@ -360,10 +373,43 @@ async def show_favorites(message: Message, session: AsyncSession):
     text += "\n🔢 Kodini yuboring."
 
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
-    kb = pagination_kb("favs", 1, pages) if pages > 1 else None
+    kb = cursor_pagination_kb("favs", 1, pages, *page_cursors(movies, "created_at")) if pages > 1 else None
     await message.answer(text, parse_mode="HTML", reply_markup=kb)
 
 
+@router.callback_query(F.data.startswith("favs:"))
+async def favorites_page(callback: CallbackQuery, session: AsyncSession):
+    user = await UserRepository.get_by_telegram_id(session, callback.from_user.id)
+    if not user:
+        await callback.answer("Avval /start yuboring")
+        return
+
+    page, cursor, _ = parse_page_callback(callback.data)
+    after, before = decode_cursor(cursor, as_datetime=True)
+    if after is None and before is None:
+        page = 1
+    movies, total = await UserRepository.get_favorites(
+        session, user.id, limit=config.MOVIES_PER_PAGE, after=after, before=before
+    )
+    if not movies:
+        await callback.answer("Boshqa yo'q")
+        return
+
+    offset = (page - 1) * config.MOVIES_PER_PAGE
+    text = "⭐ <b>Sevimli kinolar:</b>\n\n"
+    for i, movie in enumerate(movies, offset + 1):
+        text += format_movie_list_item(movie, i) + "\n"
+    text += "\n🔢 Kodini yuboring."
+
+    pages = calculate_pages(total, config.MOVIES_PER_PAGE)
+    kb = cursor_pagination_kb("favs", page, pages, *page_cursors(movies, "created_at"))
+    try:
+        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=kb)
+    except Exception:
+        pass
+    await callback.answer()
+
+
 @router.callback_query(F.data.startswith("fav:"))
 async def add_to_favorites(callback: CallbackQuery, session: AsyncSession):
     movie_id = int(callback.data.split(":")[1])
@@ -375,7 +421,7 @@ async def add_to_favorites(callback: CallbackQuery, session: AsyncSession):
     if success:
         await callback.answer("⭐ Sevimlilarga qo'shildi!")
         avg_rating, _ = await MovieRepository.get_avg_rating(session, movie_id)
-        kb = movie_detail_kb_v2(movie_id, is_favorite=True, avg_rating=avg_rating)
+        kb = MovieCard.keyboard(movie_id, is_favorite=True, avg_rating=avg_rating)
         try:
             await callback.message.edit_reply_markup(reply_markup=kb)
         except Exception:
@@ -394,7 +440,7 @@ async def remove_from_favorites(callback: CallbackQuery, session: AsyncSession):
     await UserRepository.remove_favorite(session, user.id, movie_id)
     await callback.answer("❌ Sevimlilardan o'chirildi!")
     avg_rating, _ = await MovieRepository.get_avg_rating(session, movie_id)
-    kb = movie_detail_kb_v2(movie_id, is_favorite=False, avg_rating=avg_rating)
+    kb = MovieCard.keyboard(movie_id, is_favorite=False, avg_rating=avg_rating)
     try:
         await callback.message.edit_reply_markup(reply_markup=kb)
     except Exception:
@@ -409,7 +455,7 @@ async def inline_search(query: InlineQuery, session: AsyncSession):
     if len(text) < 2:
         return
 
-    movies, _ = await MovieRepository.search_by_title(session, text, limit=10)
+    movies, _ = await find_movies(session, text, limit=10)
     results = []
 
     for movie in movies:
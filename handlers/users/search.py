@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -5,10 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.repositories import MovieRepository, UserRepository, StatsRepository
 from keyboards.inline import (
-    pagination_kb, genres_kb, categories_kb,
+    cursor_pagination_kb, genres_kb, categories_kb,
 )
 from keyboards.reply import main_menu_kb
-from utils.helpers import format_movie_list_item, calculate_pages
+from utils.helpers import (
+    format_movie_list_item, calculate_pages, decode_cursor, page_cursors, parse_page_callback,
+)
+from services.listing_cache import ListingCache
 from states.admin_states import SearchStates
 from config import config
 
@@ -26,6 +31,13 @@ async def search_prompt(message: Message, state: FSMContext):
 
 @router.message(F.text == "🔥 Top kinolar")
 async def top_movies(message: Message, session: AsyncSession):
+    cached = await ListingCache.get(session, "top", 1)
+    if cached:
+        await message.answer(
+            "🔥 <b>Top kinolar:</b>\n\n" + cached.body, parse_mode="HTML", reply_markup=cached.markup
+        )
+        return
+
     movies = await MovieRepository.get_popular(session, limit=config.MOVIES_PER_PAGE)
     if not movies:
         await message.answer("📭 Kinolar yo'q.")
@@ -36,30 +48,48 @@ async def top_movies(message: Message, session: AsyncSession):
         text += format_movie_list_item(movie, i) + "\n"
     text += "\n🔢 Kodini yuboring."
 
-    total = await MovieRepository.get_total_count(session)
+    total = await MovieRepository.get_active_count_cached(session)
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
-    kb = pagination_kb("top", 1, pages) if pages > 1 else None
+    kb = cursor_pagination_kb("top", 1, pages, *page_cursors(movies, "view_count")) if pages > 1 else None
     await message.answer(text, parse_mode="HTML", reply_markup=kb)
 
 
 @router.callback_query(F.data.startswith("top:"))
 async def top_page(callback: CallbackQuery, session: AsyncSession):
-    page = int(callback.data.split(":")[1])
-    offset = (page - 1) * config.MOVIES_PER_PAGE
-    movies = await MovieRepository.get_popular(session, limit=config.MOVIES_PER_PAGE, offset=offset)
+    page, cursor, _ = parse_page_callback(callback.data)
+    after, before = decode_cursor(cursor)
+    if after is None and before is None:
+        page = 1
+
+    cached = await ListingCache.get(session, "top", page)
+    if cached:
+        try:
+            await callback.message.edit_text(
+                "🔥 <b>Top kinolar:</b>\n\n" + cached.body, parse_mode="HTML", reply_markup=cached.markup
+            )
+        except Exception:
+            pass
+        await callback.answer()
+        return
+
+    movies = await MovieRepository.get_popular(
+        session, limit=config.MOVIES_PER_PAGE, after=after, before=before
+    )
     if not movies:
         await callback.answer("Boshqa yo'q")
         return
 
+    offset = (page - 1) * config.MOVIES_PER_PAGE
     text = "🔥 <b>Top kinolar:</b>\n\n"
     for i, movie in enumerate(movies, offset + 1):
         text += format_movie_list_item(movie, i) + "\n"
     text += "\n🔢 Kodini yuboring."
 
-    total = await MovieRepository.get_total_count(session)
+    total = await MovieRepository.get_active_count_cached(session)
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
+    kb = cursor_pagination_kb("top", page, pages, *page_cursors(movies, "view_count"))
     try:
-        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=pagination_kb("top", page, pages))
+        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=kb)
     except Exception:
         pass
     await callback.answer()
@@ -67,6 +97,13 @@ async def top_page(callback: CallbackQuery, session: AsyncSession):
 
 @router.message(F.text == "🆕 Yangilari")
 async def new_movies(message: Message, session: AsyncSession):
+    cached = await ListingCache.get(session, "new", 1)
+    if cached:
+        await message.answer(
+            "🆕 <b>Yangi kinolar:</b>\n\n" + cached.body, parse_mode="HTML", reply_markup=cached.markup
+        )
+        return
+
     movies = await MovieRepository.get_latest(session, limit=config.MOVIES_PER_PAGE)
     if not movies:
         await message.answer("📭 Kinolar yo'q.")
@@ -77,30 +114,48 @@ async def new_movies(message: Message, session: AsyncSession):
         text += format_movie_list_item(movie, i) + "\n"
     text += "\n🔢 Kodini yuboring."
 
-    total = await MovieRepository.get_total_count(session)
+    total = await MovieRepository.get_active_count_cached(session)
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
-    kb = pagination_kb("new", 1, pages) if pages > 1 else None
+    kb = cursor_pagination_kb("new", 1, pages, *page_cursors(movies, "created_at")) if pages > 1 else None
     await message.answer(text, parse_mode="HTML", reply_markup=kb)
 
 
 @router.callback_query(F.data.startswith("new:"))
 async def new_page(callback: CallbackQuery, session: AsyncSession):
-    page = int(callback.data.split(":")[1])
-    offset = (page - 1) * config.MOVIES_PER_PAGE
-    movies = await MovieRepository.get_latest(session, limit=config.MOVIES_PER_PAGE, offset=offset)
+    page, cursor, _ = parse_page_callback(callback.data)
+    after, before = decode_cursor(cursor, as_datetime=True)
+    if after is None and before is None:
+        page = 1
+
+    cached = await ListingCache.get(session, "new", page)
+    if cached:
+        try:
+            await callback.message.edit_text(
+                "🆕 <b>Yangi kinolar:</b>\n\n" + cached.body, parse_mode="HTML", reply_markup=cached.markup
+            )
+        except Exception:
+            pass
+        await callback.answer()
+        return
+
+    movies = await MovieRepository.get_latest(
+        session, limit=config.MOVIES_PER_PAGE, after=after, before=before
+    )
     if not movies:
         await callback.answer("Boshqa yo'q")
         return
 
+    offset = (page - 1) * config.MOVIES_PER_PAGE
     text = "🆕 <b>Yangi kinolar:</b>\n\n"
     for i, movie in enumerate(movies, offset + 1):
         text += format_movie_list_item(movie, i) + "\n"
     text += "\n🔢 Kodini yuboring."
 
-    total = await MovieRepository.get_total_count(session)
+    total = await MovieRepository.get_active_count_cached(session)
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
+    kb = cursor_pagination_kb("new", page, pages, *page_cursors(movies, "created_at"))
     try:
-        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=pagination_kb("new", page, pages))
+        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=kb)
     except Exception:
         pass
     await callback.answer()
@@ -120,25 +175,41 @@ async def show_genres(message: Message, session: AsyncSession):
 
 @router.callback_query(F.data.startswith("genre:"))
 async def genre_movies(callback: CallbackQuery, session: AsyncSession):
-    parts = callback.data.split(":")
-    genre_id = int(parts[1])
-    page = int(parts[2]) if len(parts) > 2 else 1
-    offset = (page - 1) * config.MOVIES_PER_PAGE
+    genre_id = int(callback.data.split(":")[1])
+    await show_genre_page(callback, session, genre_id, 1, None, None)
+
+
+@router.callback_query(F.data.startswith("gpage:"))
+async def genre_page(callback: CallbackQuery, session: AsyncSession):
+    # gpage:<page>:<cursor>:<genre_id>
+    page, cursor, extra = parse_page_callback(callback.data)
+    after, before = decode_cursor(cursor, as_datetime=True)
+    if after is None and before is None:
+        page = 1
+    await show_genre_page(callback, session, int(extra), page, after, before)
 
+
+async def show_genre_page(
+    callback: CallbackQuery, session: AsyncSession, genre_id: int,
+    page: int, after: Optional[tuple], before: Optional[tuple],
+):
     movies, total = await MovieRepository.get_by_genre(
-        session, genre_id, limit=config.MOVIES_PER_PAGE, offset=offset
+        session, genre_id, limit=config.MOVIES_PER_PAGE, after=after, before=before
     )
     if not movies:
         await callback.answer("Bu janrda kinolar yo'q")
         return
 
+    offset = (page - 1) * config.MOVIES_PER_PAGE
     text = "🎬 <b>Janr bo'yicha:</b>\n\n"
     for i, movie in enumerate(movies, offset + 1):
         text += format_movie_list_item(movie, i) + "\n"
     text += "\n🔢 Kodini yuboring."
 
     pages = calculate_pages(total, config.MOVIES_PER_PAGE)
-    kb = pagination_kb("genre", page, pages, str(genre_id)) if pages > 1 else None
+    kb = cursor_pagination_kb(
+        "gpage", page, pages, *page_cursors(movies, "created_at"), str(genre_id)
+    ) if pages > 1 else None
     try:
         await callback.message.edit_text(text, parse_mode="HTML", reply_markup=kb)
     except Exception:
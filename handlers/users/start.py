@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from database.repositories import UserRepository
 from keyboards.reply import main_menu_kb
 from keyboards.inline import force_join_kb
+from services.subscription_service import SubscriptionService
 from config import config
 
 router = Router()
@@ -60,27 +61,9 @@ async def cmd_start(message: Message, session: AsyncSession, state: FSMContext):
 
 @router.callback_query(F.data == "check_subscription")
 async def check_subscription(callback: CallbackQuery, session: AsyncSession, bot: Bot):
-    from sqlalchemy import select
-    from database.models import Channel
-
-    result = await session.execute(
-        select(Channel).where(Channel.is_mandatory == True, Channel.is_active == True)
+    not_subscribed = await SubscriptionService.get_missing(
+        bot, session, callback.from_user.id, force=True
     )
-    channels = result.scalars().all()
-
-    not_subscribed = []
-    for channel in channels:
-        try:
-            member = await bot.get_chat_member(
-                chat_id=channel.channel_id, user_id=callback.from_user.id,
-            )
-            if member.status in ("left", "kicked"):
-                not_subscribed.append({
-                    "title": channel.title or "Kanal",
-                    "username": channel.channel_username,
-                })
-        except Exception:
-            continue
 
     if not_subscribed:
         await callback.answer("❌ Barcha kanallarga obuna bo'ling!", show_alert=True)
@@ -1,10 +1,29 @@
+"""Import videos from the source group into the movies table.
+
+The user account (Pyrogram) reads the group by message id ranges, forwards
+new videos to the bot in batches and the bot's getUpdates tells which
+file_id the bot got for each of them (matched by file_unique_id, which is
+the same for every account). Rows are inserted a chunk at a time and the
+last scanned group message id is saved to IMPORT_CHECKPOINT, together with
+the ids of videos that could not be imported (no file_id from the bot, or
+no free code); a rerun retries those first, then picks up new posts. A
+checkpoint written for another IMPORT_GROUP_ID is ignored. Nothing is
+deleted; files already in the catalog are skipped.
+
+Run it while the bot is stopped: it consumes the bot's updates.
+"""
 import asyncio
+import json
 import os
-import re
+import time
+
 import aiohttp
-from pyrogram import Client
 import asyncpg
 from dotenv import load_dotenv
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+
+from utils.helpers import parse_movie_caption
 
 # .env yuklash
 load_dotenv()
@@ -15,6 +34,7 @@ API_HASH = os.getenv("API_HASH", "")
 BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 GROUP_ID = int(os.getenv("IMPORT_GROUP_ID", "-1002284993414"))
 BOT_USERNAME = os.getenv("BOT_USERNAME", "")
+CHECKPOINT_FILE = os.getenv("IMPORT_CHECKPOINT", "import_checkpoint.json")
 
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
@@ -22,6 +42,207 @@ DB_NAME = os.getenv("DB_NAME", "kino_bot")
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASS = os.getenv("DB_PASS", "")
 
+SCAN_BATCH = 200  # get_messages limit per call
+FORWARD_BATCH = 100  # forward_messages limit per call
+UPDATES_TIMEOUT = 30  # seconds to wait for the bot to see a forwarded batch
+
+BASE_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
+
+
+class Pacer:
+    """Adaptive delay between Telegram calls: grows on FloodWait, decays on success."""
+
+    def __init__(self):
+        self.delay = 0.0
+
+    async def call(self, func, *args, **kwargs):
+        while True:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            try:
+                result = await func(*args, **kwargs)
+                self.delay *= 0.8
+                return result
+            except FloodWait as e:
+                self.delay = min(max(self.delay * 2, 1.0), 30.0)
+                print(f"⏳ FloodWait {e.value}s (keyingi so'rovlar orasida {self.delay:.1f}s)")
+                await asyncio.sleep(e.value)
+
+
+def load_checkpoint() -> tuple:
+    """(last scanned message id, message ids to retry) for GROUP_ID."""
+    try:
+        with open(CHECKPOINT_FILE) as f:
+            data = json.load(f)
+        if data.get("group_id") != GROUP_ID:
+            print(f"⚠️ {CHECKPOINT_FILE} boshqa guruh ({data.get('group_id')}) uchun, boshidan boshlanadi")
+            return 0, []
+        return data["last_message_id"], data.get("failed_ids", [])
+    except (FileNotFoundError, KeyError, ValueError):
+        return 0, []
+
+
+def save_checkpoint(message_id: int, failed_ids: list):
+    tmp = CHECKPOINT_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"group_id": GROUP_ID, "last_message_id": message_id, "failed_ids": sorted(failed_ids)}, f)
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+def media_of(message):
+    """The video (or video document) of a group message, else None."""
+    if message.empty:
+        return None
+    if message.video:
+        return message.video
+    if message.document and (message.document.mime_type or "").startswith("video/"):
+        return message.document
+    return None
+
+
+class BotUpdates:
+    """Reads the bot's getUpdates with a proper offset."""
+
+    def __init__(self, http: aiohttp.ClientSession, sender_id: int):
+        self.http = http
+        self.sender_id = sender_id
+        self.offset = None
+
+    async def _get(self, **params) -> list:
+        while True:
+            async with self.http.get(f"{BASE_URL}/getUpdates", params=params) as resp:
+                data = await resp.json()
+            if data.get("ok"):
+                return data["result"]
+            retry_after = data.get("parameters", {}).get("retry_after")
+            if not retry_after:
+                raise RuntimeError(f"getUpdates: {data.get('description')}")
+            await asyncio.sleep(retry_after)
+
+    async def skip_pending(self):
+        last = await self._get(offset=-1, limit=1)
+        self.offset = last[-1]["update_id"] + 1 if last else None
+
+    async def collect(self, expected: set) -> dict:
+        """Wait until the bot has seen every expected file_unique_id; returns {uid: media}."""
+        found = {}
+        deadline = time.monotonic() + UPDATES_TIMEOUT
+        while expected - found.keys() and time.monotonic() < deadline:
+            params = {"timeout": 5, "allowed_updates": json.dumps(["message"])}
+            if self.offset is not None:
+                params["offset"] = self.offset
+            for update in await self._get(**params):
+                self.offset = update["update_id"] + 1
+                msg = update.get("message") or {}
+                if (msg.get("from") or {}).get("id") != self.sender_id:
+                    continue
+                media = msg.get("video") or msg.get("document")
+                if media and media["file_unique_id"] in expected:
+                    media["file_type"] = "video" if "video" in msg else "document"
+                    found[media["file_unique_id"]] = media
+        return found
+
+
+async def existing_unique_ids(db, unique_ids: list) -> set:
+    rows = await db.fetch(
+        "SELECT file_unique_id FROM movies WHERE file_unique_id = ANY($1::varchar[])", unique_ids
+    )
+    return {r["file_unique_id"] for r in rows}
+
+
+async def insert_chunk(db, rows: list) -> tuple:
+    """Insert rows with codes from movie_code_seq; retried when a code was typed in by hand.
+
+    Returns (added, rows left out for lack of a free code).
+    """
+    added = 0
+    for _ in range(3):
+        if not rows:
+            break
+        codes = await db.fetch("SELECT nextval('movie_code_seq') FROM generate_series(1, $1)", len(rows))
+        columns = list(zip(*[
+            (codes[i][0], r["title"], r["year"], "720p", r["language"], r["file_id"], r["file_type"],
+             r["file_unique_id"], r["duration"], r["file_size"], r["caption"])
+            for i, r in enumerate(rows)
+        ]))
+        inserted = await db.fetch("""
+            INSERT INTO movies (code, title, year, quality, language, file_id,
+                file_type, file_unique_id, duration, file_size, caption, added_by, is_active)
+            SELECT *, 0, TRUE FROM unnest(
+                $1::int[], $2::varchar[], $3::int[], $4::varchar[], $5::varchar[], $6::varchar[],
+                $7::varchar[], $8::varchar[], $9::int[], $10::bigint[], $11::text[])
+            ON CONFLICT DO NOTHING
+            RETURNING file_unique_id
+        """, *columns)
+        added += len(inserted)
+        done = {r["file_unique_id"] for r in inserted}
+        rows = [r for r in rows if r["file_unique_id"] not in done]
+        if rows:
+            # Left out either as a duplicate file or because its code was taken
+            dupes = await existing_unique_ids(db, [r["file_unique_id"] for r in rows])
+            rows = [r for r in rows if r["file_unique_id"] not in dupes]
+    if rows:
+        print(f"❌ {len(rows)} ta kino qo'shilmadi (kod to'qnashuvi)")
+    return added, rows
+
+
+async def import_batch(app, db, updates: BotUpdates, pacer: Pacer, bot_user: str, messages: list) -> tuple:
+    """Forward one batch of new videos, match the bot's file ids and insert them.
+
+    Returns (added, ids of the group messages that were not imported).
+    """
+    by_uid = {media_of(m).file_unique_id: m for m in messages}
+    forwarded = await pacer.call(
+        app.forward_messages, chat_id=bot_user, from_chat_id=GROUP_ID,
+        message_ids=[m.id for m in by_uid.values()],
+    )
+    forwarded = forwarded if isinstance(forwarded, list) else [forwarded]
+
+    found = await updates.collect(set(by_uid))
+    missing = len(by_uid) - len(found)
+    if missing:
+        print(f"❌ {missing} ta video uchun file_id olinmadi")
+
+    rows = []
+    for uid, media in found.items():
+        message = by_uid[uid]
+        caption = message.caption or ""
+        rows.append({
+            **parse_movie_caption(caption),
+            "caption": caption,
+            "file_id": media["file_id"],
+            "file_unique_id": uid,
+            "file_type": media["file_type"],
+            "duration": media.get("duration", 0),
+            "file_size": media.get("file_size", 0),
+        })
+    added, dropped = await insert_chunk(db, rows)
+    failed = [m.id for uid, m in by_uid.items() if uid not in found]
+    failed += [by_uid[r["file_unique_id"]].id for r in dropped]
+
+    # Bot lichkasini tozalash
+    try:
+        await pacer.call(app.delete_messages, bot_user, [m.id for m in forwarded if m])
+    except Exception:
+        pass
+    return added, failed
+
+
+async def import_messages(app, db, updates: BotUpdates, pacer: Pacer, bot_user: str, messages: list) -> tuple:
+    """Import the videos among group messages; returns (added, skipped, failed message ids)."""
+    videos = [m for m in messages if media_of(m)]
+    if not videos:
+        return 0, 0, []
+    known = await existing_unique_ids(db, [media_of(m).file_unique_id for m in videos])
+    new = [m for m in videos if media_of(m).file_unique_id not in known]
+    added, failed = 0, []
+    for i in range(0, len(new), FORWARD_BATCH):
+        batch_added, batch_failed = await import_batch(app, db, updates, pacer, bot_user, new[i:i + FORWARD_BATCH])
+        added += batch_added
+        failed += batch_failed
+    return added, len(videos) - len(new), failed
+
+
 async def main():
     print("📦 Bazaga ulanmoqda...")
     try:
@@ -38,154 +259,72 @@ async def main():
     print("📱 User akkauntga ulanmoqda...")
     app = Client(name="movie_importer", api_id=API_ID, api_hash=API_HASH)
     await app.start()
-
-    # Bot username ni aniqlash
-    target_bot_user = BOT_USERNAME
-    if not target_bot_user:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"https://api.telegram.org/bot{BOT_TOKEN}/getMe") as resp:
+    me = await app.get_me()
+    pacer = Pacer()
+
+    async with aiohttp.ClientSession() as http:
+        # Bot username ni aniqlash
+        target_bot_user = BOT_USERNAME
+        if not target_bot_user:
+            async with http.get(f"{BASE_URL}/getMe") as resp:
                 bot_info = await resp.json()
                 target_bot_user = bot_info["result"]["username"]
-
-    print(f"🤖 Botga yuklanadi: @{target_bot_user}")
-    print("🚀 Import boshlandi...")
-
-    # Eskilarini tozalash
-    count_old = await db.fetchval("SELECT COUNT(*) FROM movies")
-    if count_old > 0:
-        print(f"⚠️ Diqqat! Bazada {count_old} ta kino bor. Ular tozalanmoqda...")
-        await db.execute("DELETE FROM movies")
-
-    # Kodlashni 1 dan boshlash
-    next_code = 1
-    total_added = 0
-    skipped = 0
-
-    BASE_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
-
-    async with aiohttp.ClientSession() as http_session:
-        async for message in app.get_chat_history(GROUP_ID):
-            try:
-                # 1. Video borligini tekshirish
-                is_video = False
-                if message.video:
-                    is_video = True
-                elif message.document and (message.document.mime_type or "").startswith("video/"):
-                    is_video = True
-
-                if not is_video:
-                    continue
-
-                caption = message.caption or ""
-
-                # 2. Videoni botga forward qilish
-                forwarded = await app.forward_messages(
-                    chat_id=target_bot_user,
-                    from_chat_id=GROUP_ID,
-                    message_ids=message.id
-                )
-
-                if not forwarded:
-                    skipped += 1
-                    continue
-
-                fwd_msg = forwarded if not isinstance(forwarded, list) else forwarded[0]
-
-                # Biroz kutamiz
-                await asyncio.sleep(0.8)
-
-                # 3. Bot API orqali File ID olish (GetUpdates)
-                file_id = None
-                file_unique_id = None
-                file_size = 0
-                duration = 0
-                file_type = "video"
-
-                async with http_session.get(f"{BASE_URL}/getUpdates", params={"offset": -1, "limit": 1}) as resp:
-                    data = await resp.json()
-
-                if data.get("ok") and data.get("result"):
-                    update = data["result"][-1]
-                    msg = update.get("message", {})
-
-                    if "video" in msg:
-                        file_id = msg["video"]["file_id"]
-                        file_unique_id = msg["video"]["file_unique_id"]
-                        file_size = msg["video"].get("file_size", 0)
-                        duration = msg["video"].get("duration", 0)
-                    elif "document" in msg:
-                        file_id = msg["document"]["file_id"]
-                        file_unique_id = msg["document"]["file_unique_id"]
-                        file_size = msg["document"].get("file_size", 0)
-                        file_type = "document"
-
-                if not file_id:
-                    print(f"❌ File ID olinmadi. Kod: {next_code}")
-                    try:
-                        await app.delete_messages(target_bot_user, fwd_msg.id)
-                    except:
-                        pass
-                    continue
-
-                # 4. Qo'shimcha ma'lumotlar
-                title = "Nomsiz kino"
-                if caption:
-                    lines = caption.split('\n')
-                    if lines:
-                        title = lines[0][:200]
-
-                # Yilni topish
-                year = None
-                year_match = re.search(r'(20[0-2]\d|19[89]\d)', caption + " " + title)
-                if year_match:
-                    year = int(year_match.group(1))
-
-                # Tilni topish
-                language = None
-                if "o'zbek" in caption.lower() or "uzbek" in caption.lower():
-                    language = "🇺🇿 O'zbek tilida"
-                elif "rus" in caption.lower():
-                    language = "🇷🇺 Rus tilida"
-
-                # 5. Bazaga yozish
-                try:
-                    await db.execute("""
-                        INSERT INTO movies (code, title, year, quality, language, file_id,
-                            file_type, file_unique_id, duration, file_size, caption, added_by, is_active)
-                        VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,TRUE)
-                        ON CONFLICT (file_unique_id) DO NOTHING
-                    """, next_code, title, year, "720p", language, file_id,
-                        file_type, file_unique_id, duration, file_size, caption, 0)
-
-                    total_added += 1
-                    if total_added % 10 == 0:
-                        print(f"✅ Qo'shildi: #{next_code} | {title[:30]}...")
-
-                    next_code += 1
-
-                except Exception as e:
-                    print(f"❌ DB Xato: {e}")
-
-                # 6. Bot lichkasini tozalash
-                try:
-                    await app.delete_messages(target_bot_user, fwd_msg.id)
-                except:
-                    pass
-
-                # Flood wait oldini olish
-                await asyncio.sleep(1)
-
-            except Exception as e:
-                print(f"❌ Umumiy xato: {e}")
-                await asyncio.sleep(2)
+        print(f"🤖 Botga yuklanadi: @{target_bot_user}")
+
+        updates = BotUpdates(http, me.id)
+        await updates.skip_pending()
+
+        last_id, retry_ids = load_checkpoint()
+        top_id = 0
+        async for message in app.get_chat_history(GROUP_ID, limit=1):
+            top_id = message.id
+        print(f"🚀 Import boshlandi: #{last_id + 1} dan #{top_id} gacha")
+
+        started = time.monotonic()
+        total_added = scanned = skipped = 0
+
+        # Videos a previous run could not import
+        failed_ids = []
+        if retry_ids:
+            print(f"🔁 Avval qo'shilmagan {len(retry_ids)} ta video qayta urinilmoqda")
+        for i in range(0, len(retry_ids), SCAN_BATCH):
+            messages = await pacer.call(app.get_messages, GROUP_ID, retry_ids[i:i + SCAN_BATCH])
+            added, dupes, failed = await import_messages(app, db, updates, pacer, target_bot_user, messages)
+            total_added += added
+            skipped += dupes
+            failed_ids += failed
+        if retry_ids:
+            save_checkpoint(last_id, failed_ids)
+
+        for start in range(last_id + 1, top_id + 1, SCAN_BATCH):
+            ids = list(range(start, min(start + SCAN_BATCH, top_id + 1)))
+            messages = await pacer.call(app.get_messages, GROUP_ID, ids)
+            scanned += len(ids)
+
+            added, dupes, failed = await import_messages(app, db, updates, pacer, target_bot_user, messages)
+            total_added += added
+            skipped += dupes
+            failed_ids += failed
+
+            save_checkpoint(ids[-1], failed_ids)
+            elapsed = time.monotonic() - started
+            print(
+                f"✅ #{ids[-1]}/{top_id} | qo'shildi: {total_added} | o'tkazildi: {skipped} | "
+                f"{scanned / elapsed:.0f} xabar/s, {total_added / elapsed:.1f} kino/s"
+            )
 
     await app.stop()
     await db.close()
 
-    print("="*30)
-    print(f"🏁 TUGADI!")
+    elapsed = time.monotonic() - started
+    print("=" * 30)
+    print(f"🏁 TUGADI! ({elapsed:.0f}s)")
     print(f"✅ Jami: {total_added}")
-    print("="*30)
+    print(f"⏭ O'tkazildi: {skipped}")
+    if failed_ids:
+        print(f"❌ Qo'shilmadi: {len(failed_ids)} (keyingi ishga tushirishda qayta urinadi)")
+    print("=" * 30)
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
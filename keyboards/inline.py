@@ -121,6 +121,36 @@ def pagination_kb(
     return builder.as_markup()
 
 
+def cursor_pagination_kb(
+    prefix: str,
+    current_page: int,
+    total_pages: int,
+    prev_cursor: str,
+    next_cursor: str,
+    extra_data: str = "",
+) -> InlineKeyboardMarkup:
+    """Keyset variant of pagination_kb: arrows carry "prefix:page:cursor:extra"."""
+    builder = InlineKeyboardBuilder()
+    buttons = []
+
+    if current_page > 1:
+        buttons.append(InlineKeyboardButton(
+            text="⬅️", callback_data=f"{prefix}:{current_page - 1}:{prev_cursor}:{extra_data}"
+        ))
+
+    buttons.append(InlineKeyboardButton(
+        text=f"{current_page}/{total_pages}", callback_data="noop"
+    ))
+
+    if current_page < total_pages:
+        buttons.append(InlineKeyboardButton(
+            text="➡️", callback_data=f"{prefix}:{current_page + 1}:{next_cursor}:{extra_data}"
+        ))
+
+    builder.row(*buttons)
+    return builder.as_markup()
+
+
 def genres_kb(genres: List[Genre], prefix: str = "genre") -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     for genre in genres:
@@ -1,13 +1,10 @@
-from typing import Callable, Dict, Any, Awaitable, List
+from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware, Bot
 from aiogram.types import Message, CallbackQuery, TelegramObject
-from aiogram.exceptions import TelegramBadRequest
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from loguru import logger
 
-from database.models import Channel
 from keyboards.inline import force_join_kb
+from services.subscription_service import SubscriptionService
 
 
 class ForceJoinMiddleware(BaseMiddleware):
@@ -43,34 +40,7 @@ class ForceJoinMiddleware(BaseMiddleware):
         if not bot:
             return await handler(event, data)
 
-        # Get mandatory channels
-        result = await session.execute(
-            select(Channel).where(Channel.is_mandatory == True, Channel.is_active == True)
-        )
-        channels = result.scalars().all()
-
-        if not channels:
-            return await handler(event, data)
-
-        # Check subscription
-        not_subscribed = []
-        for channel in channels:
-            try:
-                member = await bot.get_chat_member(
-                    chat_id=channel.channel_id,
-                    user_id=user.id,
-                )
-                if member.status in ("left", "kicked"):
-                    not_subscribed.append({
-                        "title": channel.title or "Kanal",
-                        "username": channel.channel_username,
-                    })
-            except TelegramBadRequest:
-                logger.warning(f"Cannot check channel {channel.channel_id}")
-                continue
-            except Exception as e:
-                logger.error(f"Error checking channel {channel.channel_id}: {e}")
-                continue
+        not_subscribed = await SubscriptionService.get_missing(bot, session, user.id)
 
         if not_subscribed:
             text = (
@@ -1,14 +1,13 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery, TelegramObject
-from loguru import logger
 
-from services.cache_service import CacheService
 from config import config
+from services.rate_limiter import RateLimiter
 
 
 class ThrottlingMiddleware(BaseMiddleware):
-    """Rate limiting middleware using Redis."""
+    """Per-user rate limiting with route-dependent costs (see RateLimiter)."""
 
     async def __call__(
         self,
@@ -17,16 +16,27 @@ class ThrottlingMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
         user = None
+        route = None
         if isinstance(event, Message):
+            if event.chat.id == config.IMPORT_GROUP_ID:
+                # Uploads to the source group come in bursts
+                return await handler(event, data)
             user = event.from_user
+            text = (event.text or "").strip()
+            if text.startswith("/"):
+                route = "command"
+            elif text.isdigit():
+                route = "code"
+            else:
+                route = "search"
         elif isinstance(event, CallbackQuery):
             user = event.from_user
+            prefix = (event.data or "").split(":", 1)[0]
+            route = "page" if prefix in RateLimiter.PAGE_PREFIXES else "callback"
 
-        if user:
-            is_limited = await CacheService.check_rate_limit(
-                user.id, config.RATE_LIMIT
-            )
-            if is_limited:
+        if user and user.id not in config.admins_list:
+            # Admins are not limited (forward import sends 100 files at once)
+            if not await RateLimiter.allow(user.id, route):
                 # Silently ignore rate-limited requests
                 return
 
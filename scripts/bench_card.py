@@ -0,0 +1,89 @@
+"""Movie card build cost: format_movie_caption + movie_detail_kb_v2 vs MovieCard.
+
+    python -m scripts.bench_card [sends] [catalog]
+
+No database needed. `sends` cards are rendered for a catalog of detached
+movies, picked with a popularity skew, and every send bumps the movie's
+view count the way a counter flush does. "cached, updated_at bumped" is
+MovieCard while a flush still touched updated_at (every flush evicted the
+card); it should cost about as much as building the card from scratch.
+"""
+import random
+import sys
+from datetime import datetime, timedelta
+
+from scripts.bench_common import EN_WORDS, RU_WORDS, measure, print_table, summary
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from database.models import Genre, Movie
+from keyboards.inline import movie_detail_kb_v2
+from services.card_cache import MovieCard
+from utils.helpers import format_movie_caption
+
+GENRES = [
+    Genre(id=i, name_uz=name, emoji="🎭") for i, name in enumerate(["Jangari", "Drama", "Komediya", "Fantastika"], 1)
+]
+
+
+def synthetic_movies(count: int) -> list:
+    movies = []
+    for i in range(1, count + 1):
+        movie = Movie(
+            id=i, code=10000 + i, title=f"{EN_WORDS[i % 40].title()} {i}",
+            title_uz=f"{EN_WORDS[i * 7 % 40].title()} {i}", title_ru=RU_WORDS[i % 40].title(),
+            year=1980 + i % 45, quality="720p", language="O'zbek tilida",
+            description="Kino haqida qisqacha ma'lumot. " * 8, duration=5400 + i % 3600,
+            file_size=700 * 1024 * 1024 + i, view_count=i * 37 % 5000,
+            updated_at=datetime(2026, 1, 1) + timedelta(minutes=i),
+        )
+        set_committed_value(movie, "genres", GENRES[:1 + i % 3])
+        movies.append(movie)
+    return movies
+
+
+def main(sends: int, catalog: int):
+    movies = synthetic_movies(catalog)
+    rng = random.Random(1)
+    # Popularity skew: a few titles get most of the traffic
+    picks = [movies[min(int(rng.paretovariate(1.2)) - 1, catalog - 1)] for _ in range(sends)]
+
+    def run(render, bump_updated_at: bool = False):
+        sequence = iter(picks)
+
+        def send():
+            movie = next(sequence)
+            movie.view_count += 1
+            if bump_updated_at:
+                movie.updated_at = datetime.utcnow()
+            render(movie)
+
+        MovieCard._captions.clear()
+        MovieCard._keyboards.clear()
+        MovieCard.stats.update(hits=0, misses=0)
+        return [ms * 1000 for ms in measure(send, sends)]
+
+    def uncached(movie):
+        format_movie_caption(movie, avg_rating=4.2, rating_count=17)
+        movie_detail_kb_v2(movie.id, False, 4.2, 0)
+
+    def cached(movie):
+        MovieCard.caption(movie, 4.2, 17)
+        MovieCard.keyboard(movie.id, False, 4.2, 0)
+
+    rows = []
+    for name, render, bump in (
+        ("uncached", uncached, False),
+        ("cached", cached, False),
+        ("cached, updated_at bumped", cached, True),
+    ):
+        stats = summary(run(render, bump))
+        hit_rate = f"{MovieCard.get_stats()['hit_rate']}%" if render is cached else "-"
+        rows.append([name, stats["mean"], stats["p50"], stats["p99"], hit_rate])
+    print_table(["path", "mean µs", "p50 µs", "p99 µs", "caption hit rate"], rows)
+
+
+if __name__ == "__main__":
+    sends = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    catalog = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    main(sends, catalog)
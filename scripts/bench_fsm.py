@@ -0,0 +1,86 @@
+"""Per-update state overhead: FSM storage and rate limiter, memory vs Redis.
+
+    BENCH_REDIS_URL=redis://localhost:6379/15 python -m scripts.bench_fsm [updates]
+
+Every update resolves the user's FSM state (StateFilter) and passes the
+rate limiter; the forward import used to also read and write the state
+data per file. Each is timed per update for MemoryStorage / the in-process
+bucket and, when BENCH_REDIS_URL is set, for RedisStorage / the Lua bucket.
+FSM keys get a "bench" prefix, rate limit keys are the real rl:<id> ones;
+all of them expire, but point it at a spare Redis db.
+"""
+import asyncio
+import os
+import sys
+
+from scripts.bench_common import measure_async, print_table, summary
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from redis.asyncio import Redis
+
+from config import config
+from services.cache_service import CacheService
+from services.rate_limiter import RateLimiter
+
+USERS = 1000
+
+
+def storage_key(n: int) -> StorageKey:
+    user_id = 1000 + n % USERS
+    return StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+
+
+async def bench_storage(name: str, storage: BaseStorage, updates: int) -> list:
+    for n in range(USERS):
+        await storage.set_state(storage_key(n), "ImportStates:waiting_forward")
+        await storage.set_data(storage_key(n), {"imported": 0, "skipped": 0})
+
+    counter = iter(range(updates * 2))
+
+    async def resolve_state():
+        await storage.get_state(storage_key(next(counter)))
+
+    async def read_write_data():
+        key = storage_key(next(counter))
+        data = await storage.get_data(key)
+        await storage.update_data(key, imported=data["imported"] + 1)
+
+    rows = []
+    for op, func in (("get_state", resolve_state), ("get_data+update_data", read_write_data)):
+        stats = summary(await measure_async(func, updates))
+        rows.append([name, op, stats["mean"] * 1000, stats["p50"] * 1000, stats["p99"] * 1000])
+    await storage.close()
+    return rows
+
+
+async def bench_rate_limiter(name: str, updates: int) -> list:
+    counter = iter(range(updates))
+    stats = summary(await measure_async(lambda: RateLimiter.allow(1000 + next(counter) % USERS, "code"), updates))
+    return [name, "RateLimiter.allow", stats["mean"] * 1000, stats["p50"] * 1000, stats["p99"] * 1000]
+
+
+async def main(updates: int):
+    rows = await bench_storage("memory", MemoryStorage(), updates)
+    CacheService._redis = None
+    rows.append(await bench_rate_limiter("memory", updates))
+
+    url = os.getenv("BENCH_REDIS_URL")
+    if url:
+        storage = RedisStorage.from_url(
+            url, key_builder=DefaultKeyBuilder(prefix="bench", with_bot_id=True),
+            state_ttl=config.FSM_TTL, data_ttl=config.FSM_TTL,
+        )
+        rows += await bench_storage("redis", storage, updates)
+        CacheService._redis = Redis.from_url(url, decode_responses=True)
+        rows.append(await bench_rate_limiter("redis", updates))
+        await CacheService._redis.close()
+    else:
+        print("BENCH_REDIS_URL is not set: Redis rows skipped.\n")
+
+    print_table(["storage", "per update", "mean µs", "p50 µs", "p99 µs"], rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
@@ -0,0 +1,60 @@
+"""In-process search index: build time, memory per 100k titles, lookup latency.
+
+    python -m scripts.bench_index [10000,100000,1000000]
+
+No database needed: the index is built from synthetic rows shaped like the
+SearchIndex.build() query. Memory is reported twice, as the index's own
+estimate (shown on the dashboard) and as allocated by tracemalloc.
+"""
+import sys
+import time
+import tracemalloc
+
+from scripts.bench_common import EN_WORDS, RU_WORDS, measure, print_table, summary
+
+from services.search_index import SearchIndex
+
+QUERIES = ["venom", "Веном", "venon", "dark knight", "джокер 12", "interstelar"]
+REPEAT = 200
+
+
+def synthetic_rows(count: int):
+    for i in range(1, count + 1):
+        a, b, c = (i * 7919) % 40, (i * 104729) % 40, (i * 31) % 40
+        yield (
+            i, i,
+            f"{EN_WORDS[a].title()} {EN_WORDS[b].title()} {i}",
+            f"{EN_WORDS[c].title()} {i}",
+            f"{RU_WORDS[a].title()} {RU_WORDS[b].title()}",
+            1980 + i % 45, "720p", (i * 2654435761) % 100000,
+        )
+
+
+def main(sizes):
+    build_rows, lookup_rows = [], []
+    for size in sizes:
+        rows = list(synthetic_rows(size))
+        tracemalloc.start()
+        start = time.perf_counter()
+        entries, postings, estimate = SearchIndex._build(rows)
+        build_s = time.perf_counter() - start
+        traced, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        SearchIndex._entries, SearchIndex._postings, SearchIndex.memory_bytes = entries, postings, estimate
+        SearchIndex._ready = True
+
+        per_100k = 100_000 / size / 1024 / 1024
+        build_rows.append([size, build_s, len(postings), estimate * per_100k, traced * per_100k])
+        for query in QUERIES:
+            search = summary(measure(lambda: SearchIndex.search(query), REPEAT))
+            suggest = summary(measure(lambda: SearchIndex.suggest(query), REPEAT))
+            lookup_rows.append([size, query, search["p50"], search["p99"], suggest["p50"], suggest["p99"]])
+        del rows, entries, postings
+
+    print_table(["titles", "build s", "trigrams", "MB/100k (estimate)", "MB/100k (traced)"], build_rows)
+    print()
+    print_table(["titles", "query", "search p50 ms", "search p99 ms", "suggest p50 ms", "suggest p99 ms"], lookup_rows)
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000])
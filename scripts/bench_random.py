@@ -0,0 +1,61 @@
+"""Random movie pick: ORDER BY random() vs the index probe vs RandomPicker.
+
+    BENCH_DATABASE_URL=... python -m scripts.bench_random [10000,100000,1000000]
+
+ORDER BY random() sorts the whole active set, so it grows with the table;
+the primary key probe (random_active_id before the picker is loaded) and
+RandomPicker.pick (in memory, shown in microseconds) should stay flat.
+Recent daily picks are passed as `exclude`, as the scheduler does.
+"""
+import asyncio
+import sys
+
+from scripts.bench_common import bench_engine, measure, measure_async, prepare_schema, print_table, seed_movies, summary
+
+from sqlalchemy import func, select
+
+from database.models import Movie
+from database.repositories import MovieRepository
+from services.random_picker import RandomPicker
+
+REPEAT = 50
+EXCLUDE = set(range(1, 31))
+
+
+async def order_by_random(session):
+    """get_random as it was before the picker."""
+    result = await session.execute(
+        select(Movie.id).where(Movie.is_active == True).order_by(func.random()).limit(1)
+    )
+    return result.scalar()
+
+
+async def main(sizes):
+    engine = bench_engine()
+    sessionmaker = await prepare_schema(engine)
+    rows = []
+    for size in sizes:
+        print(f"Seeding {size} movies...")
+        await seed_movies(engine, size)
+        async with sessionmaker() as session:
+            RandomPicker._ready = False
+            old = summary(await measure_async(lambda: order_by_random(session), REPEAT))
+            probe = summary(await measure_async(
+                lambda: MovieRepository.random_active_id(session, EXCLUDE), REPEAT
+            ))
+            await RandomPicker.build(session)
+        picker = summary([ms * 1000 for ms in measure(lambda: RandomPicker.pick(EXCLUDE), REPEAT * 100)])
+        rows.append([
+            size, old["p50"], old["p99"], probe["p50"], probe["p99"], picker["p50"], picker["p99"],
+        ])
+    await engine.dispose()
+    print()
+    print_table([
+        "movies", "random() p50 ms", "random() p99 ms", "probe p50 ms", "probe p99 ms",
+        "picker p50 µs", "picker p99 µs",
+    ], rows)
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000]
+    asyncio.run(main(sizes))
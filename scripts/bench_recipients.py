@@ -0,0 +1,102 @@
+"""Broadcast recipient memory: keyset batches vs one list of every telegram_id.
+
+    BENCH_DATABASE_URL=... python -m scripts.bench_recipients [100000,500000,1000000]
+
+For each user count the users table is reseeded, then every mode runs in a
+fresh child process that reports its peak RSS growth (ru_maxrss) while
+reading all recipients, so one run cannot inflate the next. "batches" is
+the broadcaster's path (get_recipient_batch, BROADCAST_BATCH_SIZE rows at
+a time) and should stay flat; "list" is the old get_all_user_ids.
+"""
+import asyncio
+import resource
+import sys
+import time
+
+from scripts.bench_common import bench_engine, prepare_schema, print_table
+
+from sqlalchemy import select, text
+
+from config import config
+from database.models import User
+from database.repositories import UserRepository
+
+MODES = ("batches", "list")
+
+
+async def seed_users(engine, count: int):
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE users RESTART IDENTITY CASCADE"))
+        await conn.execute(
+            text("""
+                INSERT INTO users (telegram_id, full_name, language, is_banned, is_premium, is_reachable,
+                                   search_count, movies_watched, joined_at, last_active)
+                SELECT 1000000000 + i, 'User ' || i, 'uz', i % 50 = 0, false, i % 20 <> 0, 0, 0,
+                       now() - make_interval(days => i % 365), now() - make_interval(days => i % 60)
+                FROM generate_series(1, CAST(:count AS int)) AS i
+            """),
+            {"count": count},
+        )
+        await conn.execute(text("ANALYZE users"))
+
+
+def rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def read_recipients(mode: str):
+    """Child process: read every recipient once, print rows, seconds and peak RSS growth."""
+    engine = bench_engine()
+    sessionmaker = await prepare_schema(engine)
+    async with sessionmaker() as session:
+        await UserRepository.get_recipient_batch(session, "all", 0, 1)  # connect, warm up
+        baseline = rss_mb()
+        start = time.perf_counter()
+        rows = 0
+        if mode == "batches":
+            after_id = 0
+            while True:
+                batch = await UserRepository.get_recipient_batch(
+                    session, "all", after_id, config.BROADCAST_BATCH_SIZE
+                )
+                if not batch:
+                    break
+                rows += len(batch)
+                after_id = batch[-1][0]
+        else:
+            result = await session.execute(
+                select(User.telegram_id).where(*UserRepository._recipients_filter("all"))
+            )
+            rows = len(result.scalars().all())
+        elapsed = time.perf_counter() - start
+    await engine.dispose()
+    print(rows, elapsed, rss_mb() - baseline)
+
+
+async def main(sizes):
+    engine = bench_engine()
+    await prepare_schema(engine)
+    table = []
+    for size in sizes:
+        print(f"Seeding {size} users...")
+        await seed_users(engine, size)
+        for mode in MODES:
+            child = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "scripts.bench_recipients", "--child", mode,
+                stdout=asyncio.subprocess.PIPE,
+            )
+            out, _ = await child.communicate()
+            rows, elapsed, growth = out.decode().split()[-3:]
+            table.append([size, mode, int(rows), float(elapsed), float(growth)])
+    await engine.dispose()
+    print()
+    print_table(["users", "mode", "recipients", "seconds", "peak RSS growth MB"], table)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        asyncio.run(read_recipients(sys.argv[2]))
+    else:
+        sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [100_000, 500_000, 1_000_000]
+        asyncio.run(main(sizes))
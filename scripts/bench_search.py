@@ -0,0 +1,65 @@
+"""Title search latency: trigram search_by_title vs the old ILIKE path.
+
+    BENCH_DATABASE_URL=... python -m scripts.bench_search [10000,100000,1000000]
+
+For each catalog size the movies table is reseeded, then every query runs
+REPEAT times through both paths (results page + total, as the bot uses them).
+"""
+import asyncio
+import sys
+
+from scripts.bench_common import bench_engine, measure_async, prepare_schema, print_table, seed_movies, summary
+
+from sqlalchemy import desc, func, or_, select
+
+from database.models import Movie
+from database.repositories import MovieRepository
+
+QUERIES = ["venom", "dune 12", "джокер", "matrix reloaded", "xyz"]
+REPEAT = 20
+
+
+async def ilike_search(session, query: str, limit: int = 10):
+    """search_by_title as it was before the trigram index (two scans)."""
+    search_filter = or_(
+        Movie.title.ilike(f"%{query}%"),
+        Movie.title_uz.ilike(f"%{query}%"),
+        Movie.title_ru.ilike(f"%{query}%"),
+    )
+    total = (await session.execute(
+        select(func.count(Movie.id)).where(search_filter, Movie.is_active == True)
+    )).scalar()
+    result = await session.execute(
+        select(Movie)
+        .where(search_filter, Movie.is_active == True)
+        .order_by(desc(Movie.view_count), desc(Movie.created_at))
+        .limit(limit)
+    )
+    return result.scalars().all(), total
+
+
+async def main(sizes):
+    engine = bench_engine()
+    sessionmaker = await prepare_schema(engine)
+    rows = []
+    for size in sizes:
+        print(f"Seeding {size} movies...")
+        await seed_movies(engine, size)
+        async with sessionmaker() as session:
+            for query in QUERIES:
+                old = summary(await measure_async(lambda: ilike_search(session, query), REPEAT))
+                new = summary(await measure_async(
+                    lambda: MovieRepository.search_by_title(session, query), REPEAT
+                ))
+                rows.append([
+                    size, query, old["p50"], old["p99"], new["p50"], new["p99"],
+                    round(old["p50"] / new["p50"], 1) if new["p50"] else "-",
+                ])
+    await engine.dispose()
+    print()
+    print_table(["movies", "query", "ilike p50 ms", "ilike p99 ms", "trgm p50 ms", "trgm p99 ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [10_000, 100_000, 1_000_000]
+    asyncio.run(main(sizes))
@@ -0,0 +1,156 @@
+"""Update throughput and handler latency: webhook vs long polling.
+
+    python -m scripts.bench_webhook [updates] [concurrency]
+
+Runs against a local fake Bot API server, so no token or network is used:
+polling reads the synthetic updates from its getUpdates, the webhook gets
+them POSTed by `concurrency` clients, and replies (message.answer) go to
+its sendMessage. Handler latency is timed by an outer update middleware,
+from dispatch to the reply being acknowledged.
+"""
+import asyncio
+import sys
+import time
+
+from scripts.bench_common import print_table, summary
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler
+from aiohttp import ClientSession, web
+
+TOKEN = "42:bench"
+SECRET = "bench-secret"
+POLL_BATCH = 100
+
+
+def synthetic_update(update_id: int) -> dict:
+    user = {"id": 1000 + update_id % 500, "is_bot": False, "first_name": "Bench"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": int(time.time()), "from": user,
+            "chat": {"id": user["id"], "type": "private"}, "text": str(10001 + update_id % 1000),
+        },
+    }
+
+
+class FakeBotAPI:
+    """Just enough of the Bot API for getMe, getUpdates and sendMessage."""
+
+    def __init__(self, updates: int):
+        self.updates = [synthetic_update(i) for i in range(1, updates + 1)]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        form = await request.post()
+        if method == "getme":
+            result = {"id": 42, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getupdates":
+            offset = int(form.get("offset") or 1)
+            result = self.updates[offset - 1:offset - 1 + POLL_BATCH]
+            if not result:
+                await asyncio.sleep(0.05)  # an idle long poll
+        elif method == "sendmessage":
+            chat_id = int(form["chat_id"])
+            result = {
+                "message_id": 1, "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "text": form["text"],
+            }
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+
+async def serve(app: web.Application) -> tuple:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+def make_dispatcher(total: int, latencies: list, done: asyncio.Event) -> Dispatcher:
+    dp = Dispatcher()
+    router = Router()
+
+    @router.message()
+    async def reply(message: Message):
+        await message.answer(f"🎬 {message.text}")
+
+    @dp.update.outer_middleware()
+    async def timed(handler, event, data):
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            latencies.append((time.perf_counter() - start) * 1000)
+            if len(latencies) == total:
+                done.set()
+
+    dp.include_router(router)
+    return dp
+
+
+async def run_polling(api_url: str, total: int) -> list:
+    latencies, done = [], asyncio.Event()
+    dp = make_dispatcher(total, latencies, done)
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)))
+    start = time.perf_counter()
+    task = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=0))
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await dp.stop_polling()
+    await task
+    await bot.session.close()
+    return ["polling", total / elapsed, *summary(latencies).values()]
+
+
+async def run_webhook(api_url: str, total: int, concurrency: int) -> list:
+    latencies, done = [], asyncio.Event()
+    dp = make_dispatcher(total, latencies, done)
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)))
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=SECRET).register(app, path="/webhook")
+    runner, url = await serve(app)
+
+    queue = asyncio.Queue()
+    for update_id in range(1, total + 1):
+        queue.put_nowait(synthetic_update(update_id))
+
+    async def client(http: ClientSession):
+        while not queue.empty():
+            async with http.post(
+                f"{url}/webhook", json=queue.get_nowait(),
+                headers={"X-Telegram-Bot-Api-Secret-Token": SECRET},
+            ) as resp:
+                resp.raise_for_status()
+
+    start = time.perf_counter()
+    async with ClientSession() as http:
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await runner.cleanup()
+    await bot.session.close()
+    return [f"webhook x{concurrency}", total / elapsed, *summary(latencies).values()]
+
+
+async def main(total: int, concurrency: int):
+    api = FakeBotAPI(total)
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", api.handle)
+    api_runner, api_url = await serve(app)
+
+    rows = [await run_polling(api_url, total), await run_webhook(api_url, total, concurrency)]
+    await api_runner.cleanup()
+    print_table(["mode", "updates/s", "handler mean ms", "handler p50 ms", "handler p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(total, concurrency))
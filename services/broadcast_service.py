@@ -0,0 +1,358 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from loguru import logger
+from sqlalchemy import func, or_, select, update
+
+from config import config
+from database.engine import async_session
+from database.models import BroadcastMessage
+from database.repositories import UserRepository
+
+
+class TokenBucket:
+    """Global send pacing shared by all broadcast workers."""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        """Stop everyone for `seconds` (Telegram flood control)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class BroadcastService:
+    """Background broadcasts persisted in broadcast_messages.
+
+    Recipients are read in users.id keyset batches and sent by a small
+    worker pool behind a global token bucket. After every batch the job
+    row is checkpointed (last_user_id, counters). The heartbeat is renewed
+    by a side task for as long as the runner lives, however long a batch or
+    a flood control pause takes, so a job left behind by a crashed or
+    restarted process is picked up again by any replica once its heartbeat
+    is older than BROADCAST_STALE_SECONDS. A batch interrupted mid-way may
+    be delivered twice after resume. A runner that dies on an error
+    releases the job for a retry; after BROADCAST_MAX_ATTEMPTS such errors
+    the job is marked failed.
+    """
+
+    MAX_RETRIES = 3
+
+    _tasks: Dict[int, asyncio.Task] = {}
+    _bucket: Optional[TokenBucket] = None
+
+    @classmethod
+    async def create(
+        cls, admin_id: int, from_chat_id: int, message_id: int, audience: str
+    ) -> BroadcastMessage:
+        async with async_session() as session:
+            total = await UserRepository.count_recipients(session, audience)
+            job = BroadcastMessage(
+                admin_id=admin_id,
+                from_chat_id=from_chat_id,
+                message_id=message_id,
+                audience=audience,
+                total_users=total,
+                status="running",  # claimed by this process right away
+                heartbeat_at=datetime.utcnow(),
+            )
+            session.add(job)
+            await session.commit()
+            await session.refresh(job)
+            return job
+
+    @classmethod
+    async def resume(cls, bot: Bot):
+        """Claim and start unfinished jobs nobody is running (startup + schedule)."""
+        stale = datetime.utcnow() - timedelta(seconds=config.BROADCAST_STALE_SECONDS)
+        async with async_session() as session:
+            result = await session.execute(
+                update(BroadcastMessage)
+                .where(
+                    BroadcastMessage.status.in_(("pending", "running")),
+                    BroadcastMessage.from_chat_id.isnot(None),
+                    or_(BroadcastMessage.heartbeat_at.is_(None), BroadcastMessage.heartbeat_at < stale),
+                    BroadcastMessage.id.notin_(list(cls._tasks) or [0]),
+                )
+                .values(status="running", heartbeat_at=datetime.utcnow())
+                .returning(BroadcastMessage.id)
+            )
+            job_ids = result.scalars().all()
+            await session.commit()
+
+        for job_id in job_ids:
+            logger.info(f"Broadcast #{job_id}: resuming")
+            cls.start(bot, job_id)
+
+    @classmethod
+    def start(cls, bot: Bot, job_id: int):
+        """Run a job created (and so claimed) by this process."""
+        if cls._bucket is None:
+            cls._bucket = TokenBucket(config.BROADCAST_RATE)
+        task = asyncio.create_task(cls._run(bot, job_id))
+        cls._tasks[job_id] = task
+        task.add_done_callback(lambda _: cls._tasks.pop(job_id, None))
+
+    @classmethod
+    async def cancel(cls, job_id: int) -> bool:
+        """Mark a job cancelled; its runner stops at the next checkpoint."""
+        async with async_session() as session:
+            result = await session.execute(
+                update(BroadcastMessage)
+                .where(BroadcastMessage.id == job_id, BroadcastMessage.status.in_(("pending", "running")))
+                .values(status="cancelled", completed_at=datetime.utcnow())
+            )
+            await session.commit()
+            return result.rowcount > 0
+
+    @classmethod
+    async def stop(cls):
+        """Stop local runners and release their jobs for immediate resume."""
+        job_ids = list(cls._tasks)
+        for task in list(cls._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*cls._tasks.values(), return_exceptions=True)
+        if job_ids:
+            async with async_session() as session:
+                await session.execute(
+                    update(BroadcastMessage)
+                    .where(BroadcastMessage.id.in_(job_ids))
+                    .values(heartbeat_at=None)
+                )
+                await session.commit()
+
+    @classmethod
+    async def get_recent(cls, limit: int = 5) -> List[BroadcastMessage]:
+        async with async_session() as session:
+            result = await session.execute(
+                select(BroadcastMessage).order_by(BroadcastMessage.id.desc()).limit(limit)
+            )
+            return result.scalars().all()
+
+    # ---- runner ----
+
+    @classmethod
+    async def _run(cls, bot: Bot, job_id: int):
+        async with async_session() as session:
+            job = await session.get(BroadcastMessage, job_id)
+        if job is None:
+            return
+
+        counts = {"sent": job.sent_count or 0, "failed": job.failed_count or 0, "blocked": job.blocked_count or 0}
+        after_id = job.last_user_id or 0
+        progress_msg = await cls._send_progress(bot, job, counts, None)
+        last_progress = time.monotonic()
+        heartbeat = asyncio.create_task(cls._heartbeat(job_id))
+
+        try:
+            while True:
+                async with async_session() as session:
+                    batch = await UserRepository.get_recipient_batch(
+                        session, job.audience or "all", after_id, config.BROADCAST_BATCH_SIZE
+                    )
+                if not batch:
+                    break
+
+                results = await cls._send_batch(bot, job, batch)
+                blocked = []
+                for telegram_id, outcome in results:
+                    counts[outcome] += 1
+                    if outcome == "blocked":
+                        blocked.append(telegram_id)
+                after_id = batch[-1][0]
+
+                if not await cls._checkpoint(job_id, after_id, counts, blocked):
+                    logger.info(f"Broadcast #{job_id}: cancelled")
+                    await cls._send_progress(bot, job, counts, progress_msg, status="cancelled")
+                    return
+
+                if time.monotonic() - last_progress >= config.BROADCAST_PROGRESS_INTERVAL:
+                    progress_msg = await cls._send_progress(bot, job, counts, progress_msg)
+                    last_progress = time.monotonic()
+
+            status = await cls._finish(job_id, counts)
+            await cls._send_progress(bot, job, counts, progress_msg, status=status)
+            logger.info(
+                f"Broadcast #{job_id} {status}: {counts['sent']}/{job.total_users} sent, "
+                f"{counts['failed']} failed, {counts['blocked']} blocked"
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Broadcast #{job_id} error: {e}")
+            if await cls._fail(job_id):
+                logger.error(f"Broadcast #{job_id}: failed {config.BROADCAST_MAX_ATTEMPTS} times, giving up")
+                await cls._send_progress(bot, job, counts, progress_msg, status="failed")
+        finally:
+            heartbeat.cancel()
+
+    @staticmethod
+    async def _heartbeat(job_id: int):
+        """Keep the job claimed while its runner is alive."""
+        while True:
+            await asyncio.sleep(config.BROADCAST_STALE_SECONDS / 3)
+            try:
+                async with async_session() as session:
+                    await session.execute(
+                        update(BroadcastMessage)
+                        .where(BroadcastMessage.id == job_id, BroadcastMessage.status == "running")
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Broadcast #{job_id}: heartbeat error: {e}")
+
+    @classmethod
+    async def _send_batch(
+        cls, bot: Bot, job: BroadcastMessage, batch: List[Tuple[int, int]]
+    ) -> List[Tuple[int, str]]:
+        """Returns (telegram_id, "sent" | "failed" | "blocked") per recipient."""
+        recipients = iter(batch)
+        results = []
+
+        async def worker():
+            for _, telegram_id in recipients:
+                results.append((telegram_id, await cls._deliver(bot, job, telegram_id)))
+
+        await asyncio.gather(*(worker() for _ in range(config.BROADCAST_WORKERS)))
+        return results
+
+    @classmethod
+    async def _deliver(cls, bot: Bot, job: BroadcastMessage, telegram_id: int) -> str:
+        for _ in range(cls.MAX_RETRIES):
+            await cls._bucket.acquire()
+            try:
+                await bot.copy_message(
+                    chat_id=telegram_id,
+                    from_chat_id=job.from_chat_id,
+                    message_id=job.message_id,
+                )
+                return "sent"
+            except TelegramRetryAfter as e:
+                logger.warning(f"Broadcast #{job.id}: flood control, pausing {e.retry_after}s")
+                cls._bucket.pause(e.retry_after)
+            except TelegramForbiddenError:
+                return "blocked"
+            except Exception:
+                return "failed"
+        return "failed"
+
+    @staticmethod
+    async def _checkpoint(job_id: int, after_id: int, counts: dict, blocked: List[int]) -> bool:
+        """Persist progress and unreachable users; False when the job was cancelled."""
+        async with async_session() as session:
+            await UserRepository.mark_unreachable(session, blocked)
+            result = await session.execute(
+                update(BroadcastMessage)
+                .where(BroadcastMessage.id == job_id, BroadcastMessage.status == "running")
+                .values(
+                    last_user_id=after_id,
+                    sent_count=counts["sent"],
+                    failed_count=counts["failed"],
+                    blocked_count=counts["blocked"],
+                )
+            )
+            await session.commit()
+            return result.rowcount > 0
+
+    @staticmethod
+    async def _fail(job_id: int) -> bool:
+        """Count an errored run: release the job for a retry, or mark it failed (True)."""
+        try:
+            async with async_session() as session:
+                result = await session.execute(
+                    update(BroadcastMessage)
+                    .where(BroadcastMessage.id == job_id, BroadcastMessage.status == "running")
+                    .values(attempts=func.coalesce(BroadcastMessage.attempts, 0) + 1, heartbeat_at=None)
+                    .returning(BroadcastMessage.attempts)
+                )
+                attempts = result.scalar()
+                if attempts is not None and attempts >= config.BROADCAST_MAX_ATTEMPTS:
+                    await session.execute(
+                        update(BroadcastMessage)
+                        .where(BroadcastMessage.id == job_id)
+                        .values(status="failed", completed_at=datetime.utcnow())
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Broadcast #{job_id}: could not record the failure: {e}")
+            return False
+        return attempts is not None and attempts >= config.BROADCAST_MAX_ATTEMPTS
+
+    @staticmethod
+    async def _finish(job_id: int, counts: dict) -> str:
+        """Mark a running job completed; returns the job's final status.
+
+        A job cancelled after the last checkpoint (or failed by another
+        replica) keeps that status.
+        """
+        async with async_session() as session:
+            result = await session.execute(
+                update(BroadcastMessage)
+                .where(BroadcastMessage.id == job_id, BroadcastMessage.status == "running")
+                .values(
+                    status="completed",
+                    completed_at=datetime.utcnow(),
+                    sent_count=counts["sent"],
+                    failed_count=counts["failed"],
+                    blocked_count=counts["blocked"],
+                    heartbeat_at=None,
+                )
+            )
+            await session.commit()
+            if result.rowcount > 0:
+                return "completed"
+            status = await session.scalar(select(BroadcastMessage.status).where(BroadcastMessage.id == job_id))
+            return status or "cancelled"
+
+    @staticmethod
+    async def _send_progress(
+        bot: Bot, job: BroadcastMessage, counts: dict, message_id: Optional[int], status: str = "running"
+    ) -> Optional[int]:
+        """Create or edit the admin's live status message; returns its id."""
+        done = counts["sent"] + counts["failed"] + counts["blocked"]
+        header = {
+            "running": "📢 Broadcast davom etmoqda...",
+            "completed": "✅ <b>Broadcast yakunlandi!</b>",
+            "cancelled": "⛔ <b>Broadcast to'xtatildi.</b>",
+            "failed": "❌ <b>Broadcast xato bilan to'xtadi.</b>",
+        }.get(status, f"📢 Broadcast: {status}")
+        text = (
+            f"{header} #{job.id}\n\n"
+            f"👥 Jami: {job.total_users}\n"
+            f"✅ Yuborildi: {counts['sent']}\n"
+            f"❌ Xato: {counts['failed']}\n"
+            f"🚫 Bloklagan: {counts['blocked']}\n"
+            f"⏳ {done}/{job.total_users}"
+        )
+        try:
+            if message_id:
+                await bot.edit_message_text(text, chat_id=job.admin_id, message_id=message_id, parse_mode="HTML")
+                return message_id
+            msg = await bot.send_message(job.admin_id, text, parse_mode="HTML")
+            return msg.message_id
+        except Exception:
+            return message_id
@@ -1,4 +1,6 @@
 import json
+import time
+import uuid
 from typing import Optional, Any
 from redis.asyncio import Redis
 from loguru import logger
@@ -9,6 +11,17 @@ from config import config
 class CacheService:
     _redis: Optional[Redis] = None
 
+    MOVIE_TTL = 600
+    MOVIE_MISSING_TTL = 60
+    COUNT_TTL = 300
+    # Listing totals that depend on the catalog (not on one user), and the
+    # Redis set naming the ones currently cached so they can be dropped
+    # without a keyspace SCAN
+    CATALOG_COUNT_PREFIXES = ("movies", "genre:", "year:")
+    CATALOG_COUNT_KEYS = "count:catalog-keys"
+    _counts: dict = {}
+    movie_stats = {"hits": 0, "misses": 0, "missing_hits": 0}
+
     @classmethod
     async def connect(cls):
         try:
@@ -74,6 +87,37 @@ class CacheService:
         except Exception as e:
             logger.warning(f"Redis DELETE pattern error: {e}")
 
+    @classmethod
+    async def hincrby(cls, key: str, field: Any, amount: int = 1) -> bool:
+        """Returns False when Redis is unavailable so callers can fall back."""
+        if not cls._redis:
+            return False
+        try:
+            await cls._redis.hincrby(key, str(field), amount)
+            return True
+        except Exception as e:
+            logger.warning(f"Redis HINCRBY error: {e}")
+            return False
+
+    @classmethod
+    async def pop_hash(cls, key: str) -> dict:
+        """Atomically take the whole hash (safe with several bot replicas)."""
+        if not cls._redis:
+            return {}
+        tmp = f"{key}:flushing:{uuid.uuid4().hex}"
+        try:
+            if not await cls._redis.exists(key):
+                return {}
+            await cls._redis.rename(key, tmp)
+            pipe = cls._redis.pipeline(transaction=True)
+            pipe.hgetall(tmp)
+            pipe.delete(tmp)
+            data, _ = await pipe.execute()
+            return data or {}
+        except Exception as e:
+            logger.warning(f"Redis pop hash error: {e}")
+            return {}
+
     @classmethod
     async def get_json(cls, key: str) -> Optional[Any]:
         val = await cls.get(key)
@@ -88,35 +132,91 @@ class CacheService:
     async def set_json(cls, key: str, value: Any, ttl: int = 300):
         await cls.set(key, json.dumps(value, ensure_ascii=False, default=str), ttl)
 
-    # ---- Rate Limiting ----
-    @classmethod
-    async def check_rate_limit(cls, user_id: int, limit_seconds: float = 0.5) -> bool:
-        """Returns True if rate limited (should block), False if OK."""
-        if not cls._redis:
-            return False
-        key = f"rate:{user_id}"
-        try:
-            exists = await cls._redis.exists(key)
-            if exists:
-                return True
-            await cls._redis.set(key, "1", px=int(limit_seconds * 1000))
-            return False
-        except Exception:
-            return False
-
     # ---- Movie cache ----
     @classmethod
-    async def cache_movie(cls, code: int, movie_data: dict, ttl: int = 600):
+    async def cache_movie(cls, code: int, movie_data: dict, ttl: int = MOVIE_TTL):
         await cls.set_json(f"movie:{code}", movie_data, ttl)
 
+    @classmethod
+    async def cache_movie_missing(cls, code: int, ttl: int = MOVIE_MISSING_TTL):
+        """Negative entry so unknown codes don't hit the database on every message."""
+        await cls.set_json(f"movie:{code}", {"missing": True}, ttl)
+
     @classmethod
     async def get_cached_movie(cls, code: int) -> Optional[dict]:
-        return await cls.get_json(f"movie:{code}")
+        """Returns the cached snapshot, {"missing": True} for a cached miss, or None."""
+        data = await cls.get_json(f"movie:{code}")
+        if data is None:
+            cls.movie_stats["misses"] += 1
+        elif data.get("missing"):
+            cls.movie_stats["missing_hits"] += 1
+        else:
+            cls.movie_stats["hits"] += 1
+        return data
 
     @classmethod
-    async def invalidate_movie(cls, code: int):
-        await cls.delete(f"movie:{code}")
+    def get_movie_stats(cls) -> dict:
+        stats = dict(cls.movie_stats)
+        total = stats["hits"] + stats["missing_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["missing_hits"]) * 100 / total, 1) if total else 0.0
+        return stats
+
+    @classmethod
+    async def invalidate_movie(cls, *codes: int):
+        keys = [f"movie:{code}" for code in codes if code is not None]
+        if not cls._redis or not keys:
+            return
+        try:
+            for i in range(0, len(keys), 1000):
+                await cls._redis.delete(*keys[i:i + 1000])
+        except Exception as e:
+            logger.warning(f"Redis DELETE error: {e}")
 
     @classmethod
     async def invalidate_all_movies(cls):
         await cls.delete_pattern("movie:*")
+
+    # ---- Listing totals ----
+    @classmethod
+    async def get_count(cls, key: str) -> Optional[int]:
+        """Approximate total for a listing: process memory first, then Redis."""
+        local = cls._counts.get(key)
+        if local and local[0] > time.monotonic():
+            return local[1]
+        value = await cls.get(f"count:{key}")
+        if value is None:
+            return None
+        cls._counts[key] = (time.monotonic() + cls.COUNT_TTL, int(value))
+        return int(value)
+
+    @classmethod
+    async def set_count(cls, key: str, value: int, ttl: int = COUNT_TTL):
+        cls._counts[key] = (time.monotonic() + ttl, value)
+        await cls.set(f"count:{key}", str(value), ttl)
+        if cls._redis and key.startswith(cls.CATALOG_COUNT_PREFIXES):
+            try:
+                async with cls._redis.pipeline(transaction=False) as pipe:
+                    pipe.sadd(cls.CATALOG_COUNT_KEYS, f"count:{key}")
+                    pipe.expire(cls.CATALOG_COUNT_KEYS, ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Redis SADD error: {e}")
+
+    @classmethod
+    async def invalidate_counts(cls, key: str):
+        """Drop one cached total."""
+        cls._counts.pop(key, None)
+        await cls.delete(f"count:{key}")
+
+    @classmethod
+    async def invalidate_catalog_counts(cls):
+        """Drop the totals a catalog change can move; per-user ones (favs:) stay."""
+        for key in [key for key in cls._counts if key.startswith(cls.CATALOG_COUNT_PREFIXES)]:
+            del cls._counts[key]
+        if not cls._redis:
+            return
+        try:
+            keys = await cls._redis.smembers(cls.CATALOG_COUNT_KEYS)
+            await cls._redis.delete(cls.CATALOG_COUNT_KEYS, *keys)
+        except Exception as e:
+            logger.warning(f"Redis catalog counts invalidation error: {e}")
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+
+from config import config
+from database.models import Movie
+from keyboards.inline import movie_detail_kb_v2
+from utils.helpers import join_movie_caption, movie_caption_parts
+
+
+class MovieCard:
+    """Pre-rendered movie cards (caption + keyboard) for send_movie.
+
+    The parts of a caption that only change on edit (titles, info line,
+    genres, size, description) are kept in an LRU keyed by
+    (movie_id, updated_at), so an edited movie simply misses; rating and
+    view count are spliced in per send. Keyboards depend only on a few
+    small values and are cached whole. CatalogEvents drops a movie's
+    entries when it is saved or deleted.
+    """
+
+    _captions: "OrderedDict[Tuple[int, Optional[datetime]], Tuple[str, str, str]]" = OrderedDict()
+    _keyboards: "OrderedDict[tuple, InlineKeyboardMarkup]" = OrderedDict()
+
+    stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def caption(cls, movie: Movie, avg_rating: float = 0, rating_count: int = 0) -> str:
+        key = (movie.id, movie.updated_at)
+        parts = cls._captions.get(key)
+        if parts is None:
+            cls.stats["misses"] += 1
+            parts = movie_caption_parts(movie)
+            cls._store(cls._captions, key, parts)
+        else:
+            cls.stats["hits"] += 1
+            cls._captions.move_to_end(key)
+        return join_movie_caption(*parts, movie.view_count, avg_rating, rating_count)
+
+    @classmethod
+    def keyboard(
+        cls, movie_id: int, is_favorite: bool = False, avg_rating: float = 0, user_rating: int = 0
+    ) -> InlineKeyboardMarkup:
+        key = (movie_id, is_favorite, avg_rating, user_rating)
+        markup = cls._keyboards.get(key)
+        if markup is None:
+            markup = movie_detail_kb_v2(movie_id, is_favorite, avg_rating, user_rating)
+            cls._store(cls._keyboards, key, markup)
+        else:
+            cls._keyboards.move_to_end(key)
+        return markup
+
+    @classmethod
+    def invalidate(cls, movie_id: int):
+        for cache in (cls._captions, cls._keyboards):
+            for key in [key for key in cache if key[0] == movie_id]:
+                del cache[key]
+
+    @staticmethod
+    def _store(cache: OrderedDict, key, value):
+        cache[key] = value
+        if len(cache) > config.CARD_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        lookups = cls.stats["hits"] + cls.stats["misses"]
+        return {
+            **cls.stats,
+            "hit_rate": round(cls.stats["hits"] / lookups * 100, 1) if lookups else 0.0,
+            "cards": len(cls._captions),
+        }
@@ -0,0 +1,48 @@
+from typing import Iterable, Optional
+
+from database.models import Movie
+from services.cache_service import CacheService
+from services.card_cache import MovieCard
+from services.listing_cache import ListingCache
+from services.random_picker import RandomPicker
+from services.search_index import SearchIndex
+
+
+class CatalogEvents:
+    """Keeps caches and in-process indexes in step with admin catalog changes."""
+
+    @classmethod
+    async def movie_saved(cls, movie: Movie, old_code: Optional[int] = None):
+        """Call after a movie is created or edited (old_code when the code changed)."""
+        await CacheService.invalidate_movie(movie.code, old_code)
+        await CacheService.invalidate_catalog_counts()
+        ListingCache.invalidate()
+        MovieCard.invalidate(movie.id)
+        SearchIndex.upsert(movie)
+        if movie.is_active is False:
+            RandomPicker.remove(movie.id)
+        else:
+            RandomPicker.add(movie.id)
+
+    @classmethod
+    async def movies_added(cls, rows: Iterable):
+        """Bulk variant of movie_saved for freshly inserted rows (MovieRepository.bulk_ingest)."""
+        rows = list(rows)
+        if not rows:
+            return
+        await CacheService.invalidate_movie(*(row.code for row in rows))
+        await CacheService.invalidate_catalog_counts()
+        ListingCache.invalidate()
+        for row in rows:
+            SearchIndex.upsert(row)
+            if row.is_active is not False:
+                RandomPicker.add(row.id)
+
+    @classmethod
+    async def movie_deleted(cls, movie_id: int, code: int):
+        await CacheService.invalidate_movie(code)
+        await CacheService.invalidate_catalog_counts()
+        ListingCache.invalidate()
+        MovieCard.invalidate(movie_id)
+        SearchIndex.remove(movie_id)
+        RandomPicker.remove(movie_id)
@@ -0,0 +1,176 @@
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from aiogram.types import Message
+from loguru import logger
+from sqlalchemy import select
+
+from config import config
+from database.engine import async_session
+from database.models import Movie
+from database.repositories import MovieRepository
+from services.catalog_events import CatalogEvents
+from services.micro_batch import run_micro_batches
+from utils.helpers import parse_movie_caption
+
+
+class ChannelSync:
+    """Adds videos posted to the IMPORT_GROUP_ID group/channel as they arrive.
+
+    Posts reach the bot as message / channel_post updates, so the bot's own
+    file_id is at hand and no history scan is needed (import_from_group.py
+    stays for backfilling). File unique ids already in the catalog are kept
+    in a set, so reposts are dropped without a query. New posts are queued
+    and ingested in micro-batches of SYNC_BATCH_SIZE, or after
+    SYNC_FLUSH_INTERVAL seconds, whichever comes first. A batch that fails
+    to write (connection reset, failover) is queued again after
+    SYNC_RETRY_DELAY seconds, doubling per attempt; posts still failing
+    after SYNC_RETRIES retries are given up and logged as lost.
+    """
+
+    _known: Set[str] = set()
+    _queue: Optional[asyncio.Queue] = None
+    _task: Optional[asyncio.Task] = None
+    _attempts: Dict[str, int] = {}
+    _retries: Set[asyncio.Task] = set()
+    _stopping = False
+
+    stats = {"added": 0, "duplicates": 0, "batches": 0, "errors": 0, "retried": 0, "lost": 0}
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return bool(config.IMPORT_GROUP_ID)
+
+    @classmethod
+    async def start(cls):
+        if cls._task or not cls.is_enabled():
+            return
+        async with async_session() as session:
+            result = await session.stream_scalars(
+                select(Movie.file_unique_id).where(Movie.file_unique_id.isnot(None))
+            )
+            cls._known = {uid async for uid in result}
+        cls._queue = asyncio.Queue()
+        cls._task = asyncio.create_task(cls._run())
+        logger.info(f"Channel sync started: {config.IMPORT_GROUP_ID}, {len(cls._known)} known files")
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls._task is not None and not cls._task.done()
+
+    @classmethod
+    async def stop(cls):
+        """Ingest whatever is still queued, then stop."""
+        if not cls.is_running():
+            return
+        # Batches waiting for a retry get one last attempt right away
+        cls._stopping = True
+        for task in list(cls._retries):
+            task.cancel()
+        await asyncio.gather(*cls._retries, return_exceptions=True)
+        await cls._queue.put(None)
+        await cls._task
+        cls._task = None
+        cls._stopping = False
+        logger.info("Channel sync stopped")
+
+    @classmethod
+    def put(cls, message: Message) -> bool:
+        """Queue a post for ingestion; False when it has no video or is a duplicate."""
+        if not cls.is_running():
+            return False
+        media = message.video or message.document
+        if message.document and not (message.document.mime_type or "").startswith("video/"):
+            media = None
+        if media is None:
+            return False
+        if media.file_unique_id in cls._known:
+            cls.stats["duplicates"] += 1
+            return False
+        cls._known.add(media.file_unique_id)
+
+        caption = message.caption or ""
+        cls._queue.put_nowait({
+            **parse_movie_caption(caption),
+            "file_id": media.file_id,
+            "file_unique_id": media.file_unique_id,
+            "file_type": "video" if message.video else "document",
+            "duration": getattr(media, "duration", None),
+            "file_size": media.file_size,
+            "caption": message.caption,
+            "added_by": message.from_user.id if message.from_user else None,
+        })
+        return True
+
+    @classmethod
+    async def _run(cls):
+        await run_micro_batches(cls._queue, config.SYNC_BATCH_SIZE, config.SYNC_FLUSH_INTERVAL, cls._write)
+
+    @classmethod
+    async def _write(cls, batch: List[dict]):
+        try:
+            async with async_session() as session:
+                result = await MovieRepository.bulk_ingest(session, batch)
+        except Exception as e:
+            cls.stats["errors"] += 1
+            cls._retry(batch, e)
+            return
+        for row in batch:
+            cls._attempts.pop(row["file_unique_id"], None)
+        try:
+            await CatalogEvents.movies_added(result.inserted)
+        except Exception as e:
+            logger.error(f"Channel sync: catalog refresh error: {e}")
+
+        cls.stats["added"] += len(result.inserted)
+        cls.stats["duplicates"] += len(result.skipped)
+        cls.stats["batches"] += 1
+        for index, reason in result.errors:
+            cls.stats["errors"] += 1
+            cls._known.discard(batch[index]["file_unique_id"])
+            logger.warning(f"Channel sync: post skipped ({reason})")
+        if result.inserted:
+            codes = ", ".join(str(row.code) for row in result.inserted)
+            logger.info(f"Channel sync: {len(result.inserted)} new movies ({codes})")
+
+    @classmethod
+    def _retry(cls, batch: List[dict], error: Exception):
+        retry, lost = [], []
+        for row in batch:
+            uid = row["file_unique_id"]
+            attempt = cls._attempts.get(uid, 0) + 1
+            if attempt > config.SYNC_RETRIES or cls._stopping:
+                cls._attempts.pop(uid, None)
+                cls._known.discard(uid)
+                lost.append(row)
+            else:
+                cls._attempts[uid] = attempt
+                retry.append(row)
+
+        if lost:
+            cls.stats["lost"] += len(lost)
+            logger.error(f"Channel sync write error ({len(lost)} posts lost): {error}")
+        if retry:
+            attempt = max(cls._attempts[row["file_unique_id"]] for row in retry)
+            delay = config.SYNC_RETRY_DELAY * 2 ** (attempt - 1)
+            cls.stats["retried"] += len(retry)
+            logger.warning(f"Channel sync write error ({len(retry)} posts, retry in {delay:.0f}s): {error}")
+            task = asyncio.create_task(cls._requeue_later(retry, delay))
+            cls._retries.add(task)
+            task.add_done_callback(cls._retries.discard)
+
+    @classmethod
+    async def _requeue_later(cls, rows: List[dict], delay: float):
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            # Also on cancel (stop): the rows go back ahead of the stop marker
+            for row in rows:
+                cls._queue.put_nowait(row)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        stats = dict(cls.stats)
+        stats["known"] = len(cls._known)
+        stats["queued"] = cls._queue.qsize() if cls._queue else 0
+        return stats
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import BigInteger, Integer, column, func, update, values
+from loguru import logger
+
+from config import config
+from database.engine import async_session
+from database.models import Movie, Serial, User, Advertisement
+from services.cache_service import CacheService
+
+
+class CounterService:
+    """Write-behind buffer for hot counters.
+
+    Increments are aggregated in memory (or in Redis hashes when
+    COUNTER_USE_REDIS is on) and flushed periodically with a single
+    UPDATE ... FROM (VALUES ...) per counter column.
+    """
+
+    MOVIE_VIEWS = "movie_views"
+    SERIAL_VIEWS = "serial_views"
+    USER_WATCHED = "user_watched"
+    USER_SEARCHES = "user_searches"
+    AD_VIEWS = "ad_views"
+
+    # kind -> (key column, counter column)
+    TARGETS = {
+        MOVIE_VIEWS: (Movie.id, Movie.view_count),
+        SERIAL_VIEWS: (Serial.id, Serial.view_count),
+        USER_WATCHED: (User.telegram_id, User.movies_watched),
+        USER_SEARCHES: (User.telegram_id, User.search_count),
+        AD_VIEWS: (Advertisement.id, Advertisement.view_count),
+    }
+
+    FLUSH_CHUNK = 5000
+
+    _pending: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    _pending_since: Optional[float] = None
+    _lock = asyncio.Lock()
+
+    stats = {
+        "flushes": 0,
+        "last_flush_rows": 0,
+        "last_flush_increments": 0,
+        "last_flush_lag": 0.0,
+        "last_flush_at": None,
+        "errors": 0,
+    }
+
+    @classmethod
+    async def incr(cls, kind: str, key: int, amount: int = 1):
+        if config.COUNTER_USE_REDIS and await CacheService.hincrby(f"counters:{kind}", key, amount):
+            return
+        cls._add(kind, key, amount)
+
+    @classmethod
+    def _add(cls, kind: str, key: int, amount: int):
+        if cls._pending_since is None:
+            cls._pending_since = time.monotonic()
+        cls._pending[kind][key] += amount
+
+    @classmethod
+    async def flush(cls) -> int:
+        """Write all buffered increments. Returns the number of rows updated."""
+        async with cls._lock:
+            pending, cls._pending = cls._pending, defaultdict(lambda: defaultdict(int))
+            since, cls._pending_since = cls._pending_since, None
+
+            if config.COUNTER_USE_REDIS:
+                for kind in cls.TARGETS:
+                    for key, amount in (await CacheService.pop_hash(f"counters:{kind}")).items():
+                        pending[kind][int(key)] += int(amount)
+
+            batches = {kind: deltas for kind, deltas in pending.items() if deltas}
+            if not batches:
+                return 0
+
+            rows = 0
+            try:
+                async with async_session() as session:
+                    for kind, deltas in batches.items():
+                        key_col, count_col = cls.TARGETS[kind]
+                        # A view is not an edit: setting updated_at to itself keeps its
+                        # onupdate from firing (MovieCard keys captions on it)
+                        updated_at = getattr(key_col.class_, "updated_at", None)
+                        keep = {updated_at: updated_at} if updated_at is not None else {}
+                        items = list(deltas.items())
+                        for i in range(0, len(items), cls.FLUSH_CHUNK):
+                            chunk = values(
+                                column("key", BigInteger), column("delta", Integer), name="deltas"
+                            ).data(items[i:i + cls.FLUSH_CHUNK])
+                            await session.execute(
+                                update(key_col.class_)
+                                .where(key_col == chunk.c.key)
+                                .values({count_col: func.coalesce(count_col, 0) + chunk.c.delta, **keep})
+                            )
+                        rows += len(items)
+                    await session.commit()
+            except Exception as e:
+                logger.error(f"Counter flush error: {e}")
+                cls.stats["errors"] += 1
+                for kind, deltas in batches.items():
+                    for key, amount in deltas.items():
+                        cls._add(kind, key, amount)
+                return 0
+
+            cls.stats["flushes"] += 1
+            cls.stats["last_flush_rows"] = rows
+            cls.stats["last_flush_increments"] = sum(sum(d.values()) for d in batches.values())
+            cls.stats["last_flush_lag"] = round(time.monotonic() - since, 1) if since else 0.0
+            cls.stats["last_flush_at"] = datetime.utcnow()
+            return rows
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        stats = dict(cls.stats)
+        stats["pending_rows"] = sum(len(d) for d in cls._pending.values())
+        stats["lag"] = round(time.monotonic() - cls._pending_since, 1) if cls._pending_since else 0.0
+        return stats
@@ -0,0 +1,162 @@
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from loguru import logger
+
+from config import config
+from database.engine import async_session
+from database.repositories import MovieRepository
+from services.catalog_events import CatalogEvents
+
+
+class ForwardImport:
+    """Per-admin buffer behind the forward import.
+
+    Forwarded videos are collected for FORWARD_IMPORT_WINDOW seconds (or
+    until FORWARD_IMPORT_BATCH of them are waiting) and then go through
+    MovieRepository.bulk_ingest: one duplicate lookup, one INSERT. Instead
+    of a reply per file the admin gets one progress message that is edited
+    after every batch. The running totals and that message's id are kept in
+    the admin's FSM data, so with Redis FSM storage they survive a restart
+    and are shared by replicas; only the few seconds of buffered rows live
+    in process memory, and on_shutdown writes them out (flush_all).
+    """
+
+    TOTALS_KEY = "forward_import"
+
+    _pending: Dict[int, List[dict]] = {}
+    _states: Dict[int, FSMContext] = {}
+    _timers: Dict[int, asyncio.Task] = {}
+    _locks: Dict[int, asyncio.Lock] = {}
+    _flushes: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _empty_totals() -> dict:
+        return {"imported": 0, "skipped": 0, "failed": 0, "message_id": None}
+
+    @classmethod
+    async def start(cls, admin_id: int, state: FSMContext):
+        cls._pending.pop(admin_id, None)
+        cls._states[admin_id] = state
+        await state.update_data({cls.TOTALS_KEY: cls._empty_totals()})
+
+    @classmethod
+    def add(cls, bot: Bot, admin_id: int, state: FSMContext, row: dict):
+        cls._states[admin_id] = state
+        pending = cls._pending.setdefault(admin_id, [])
+        pending.append(row)
+        if len(pending) >= config.FORWARD_IMPORT_BATCH:
+            cls._cancel_timer(admin_id)
+            # The loop keeps only weak references to tasks: hold on to it
+            task = asyncio.create_task(cls.flush(bot, admin_id))
+            cls._flushes.add(task)
+            task.add_done_callback(cls._flushes.discard)
+        elif admin_id not in cls._timers:
+            cls._timers[admin_id] = asyncio.create_task(cls._flush_later(bot, admin_id))
+
+    @classmethod
+    async def finish(cls, bot: Bot, admin_id: int, state: FSMContext) -> dict:
+        """Write whatever is still buffered and return the session totals.
+
+        Other replicas flush their buffers on their own timers, so wait one
+        window for them before reading the shared totals.
+        """
+        cls._states[admin_id] = state
+        cls._cancel_timer(admin_id)
+        await cls.flush(bot, admin_id)
+        await asyncio.sleep(config.FORWARD_IMPORT_WINDOW)
+        cls._states.pop(admin_id, None)
+        cls._locks.pop(admin_id, None)
+        data = await state.get_data()
+        return data.get(cls.TOTALS_KEY) or cls._empty_totals()
+
+    @classmethod
+    async def flush_all(cls, bot: Bot):
+        """Write every admin's buffered rows (shutdown)."""
+        for admin_id in list(cls._timers):
+            cls._cancel_timer(admin_id)
+        await asyncio.gather(*cls._flushes, return_exceptions=True)
+        for admin_id in list(cls._pending):
+            await cls.flush(bot, admin_id)
+
+    @classmethod
+    async def _flush_later(cls, bot: Bot, admin_id: int):
+        await asyncio.sleep(config.FORWARD_IMPORT_WINDOW)
+        cls._timers.pop(admin_id, None)
+        await cls.flush(bot, admin_id)
+
+    @classmethod
+    def _cancel_timer(cls, admin_id: int):
+        timer = cls._timers.pop(admin_id, None)
+        if timer and not timer.done():
+            timer.cancel()
+
+    @classmethod
+    async def flush(cls, bot: Bot, admin_id: int):
+        lock = cls._locks.setdefault(admin_id, asyncio.Lock())
+        async with lock:
+            rows = cls._pending.pop(admin_id, None)
+            state = cls._states.get(admin_id)
+            if not rows or state is None:
+                return
+
+            counts = {"imported": 0, "skipped": 0, "failed": 0}
+            inserted: list = []
+            try:
+                async with async_session() as session:
+                    result = await MovieRepository.bulk_ingest(session, rows)
+                await CatalogEvents.movies_added(result.inserted)
+                inserted = result.inserted
+                counts = {
+                    "imported": len(result.inserted),
+                    "skipped": len(result.skipped),
+                    "failed": len(result.errors),
+                }
+                for index, reason in result.errors:
+                    logger.warning(f"Forward import: {rows[index]['title'][:50]} skipped ({reason})")
+            except Exception as e:
+                counts["failed"] = len(rows)
+                logger.error(f"Forward import error ({len(rows)} files): {e}")
+
+            try:
+                # Read-modify-write kept next to each other: another replica
+                # may be adding its batch to the same totals
+                data = await state.get_data()
+                totals = {**cls._empty_totals(), **data.get(cls.TOTALS_KEY, {})}
+                for key, value in counts.items():
+                    totals[key] += value
+                await state.update_data({cls.TOTALS_KEY: totals})
+
+                message_id = await cls._send_progress(bot, admin_id, totals, inserted)
+                if message_id != totals["message_id"]:
+                    latest = (await state.get_data()).get(cls.TOTALS_KEY, {})
+                    await state.update_data({cls.TOTALS_KEY: {**totals, **latest, "message_id": message_id}})
+            except Exception as e:
+                logger.error(f"Forward import progress error: {e}")
+
+    @staticmethod
+    async def _send_progress(bot: Bot, admin_id: int, totals: dict, inserted: list) -> Optional[int]:
+        text = (
+            f"📥 <b>Forward import</b>\n\n"
+            f"✅ Qo'shildi: {totals['imported']}\n"
+            f"⏭ O'tkazildi: {totals['skipped']}\n"
+            f"❌ Xato: {totals['failed']}"
+        )
+        if inserted:
+            codes = sorted(row.code for row in inserted)
+            text += f"\n\n🆕 Oxirgi kodlar: <code>{codes[0]}</code>"
+            if len(codes) > 1:
+                text += f" – <code>{codes[-1]}</code>"
+        text += "\n\nTugatish uchun /done yuboring."
+
+        message_id = totals.get("message_id")
+        try:
+            if message_id:
+                await bot.edit_message_text(text, chat_id=admin_id, message_id=message_id, parse_mode="HTML")
+                return message_id
+            msg = await bot.send_message(admin_id, text, parse_mode="HTML")
+            return msg.message_id
+        except Exception:
+            return message_id
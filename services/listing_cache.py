@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from aiogram.types import InlineKeyboardMarkup
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database.repositories import MovieRepository
+from keyboards.inline import cursor_pagination_kb
+from utils.helpers import calculate_pages, format_movie_list_item, page_cursors
+
+
+class ListingPage(NamedTuple):
+    body: str  # numbered movie lines + footer, without the listing header
+    markup: Optional[InlineKeyboardMarkup]
+    total: int
+
+
+class ListingCache:
+    """First pages of "Top kinolar" and "Yangilari", rendered once for everyone.
+
+    Rebuilt by the scheduler and lazily after a catalog change; pages past
+    LISTING_CACHE_PAGES fall through to the keyset queries.
+    """
+
+    # listing -> (repository method, keyset attribute)
+    LISTINGS = {
+        "top": (MovieRepository.get_popular, "view_count"),
+        "new": (MovieRepository.get_latest, "created_at"),
+    }
+
+    _pages: Dict[str, List[ListingPage]] = {}
+    _stale = True
+    _lock = asyncio.Lock()
+    refreshed_at: Optional[float] = None
+    stats = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    @classmethod
+    async def get(cls, session: AsyncSession, listing: str, page: int) -> Optional[ListingPage]:
+        if page > config.LISTING_CACHE_PAGES:
+            return None
+        if cls._stale:
+            await cls.refresh(session, force=False)
+        pages = cls._pages.get(listing, [])
+        if 1 <= page <= len(pages):
+            cls.stats["hits"] += 1
+            return pages[page - 1]
+        cls.stats["misses"] += 1
+        return None
+
+    @classmethod
+    def invalidate(cls):
+        """Called on catalog changes; the next request rebuilds the pages."""
+        cls._stale = True
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession, force: bool = True):
+        async with cls._lock:
+            if not force and not cls._stale:
+                return  # another request rebuilt it while we waited
+            try:
+                total = await MovieRepository.get_total_count(session)
+                cls._pages = {
+                    name: await cls._render(session, name, fetch, key, total)
+                    for name, (fetch, key) in cls.LISTINGS.items()
+                }
+                cls._stale = False
+                cls.refreshed_at = time.time()
+                cls.stats["refreshes"] += 1
+            except Exception as e:
+                logger.error(f"Listing cache refresh error: {e}")
+
+    @staticmethod
+    async def _render(session: AsyncSession, name: str, fetch, key: str, total: int) -> List[ListingPage]:
+        per_page = config.MOVIES_PER_PAGE
+        total_pages = calculate_pages(total, per_page)
+        movies = await fetch(session, limit=per_page * config.LISTING_CACHE_PAGES)
+
+        pages = []
+        for start in range(0, len(movies), per_page):
+            chunk = movies[start:start + per_page]
+            page = start // per_page + 1
+            body = "".join(
+                format_movie_list_item(movie, i) + "\n"
+                for i, movie in enumerate(chunk, start + 1)
+            ) + "\n🔢 Kodini yuboring."
+            markup = cursor_pagination_kb(
+                name, page, total_pages, *page_cursors(chunk, key)
+            ) if total_pages > 1 else None
+            pages.append(ListingPage(body, markup, total))
+        return pages
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        stats = dict(cls.stats)
+        served = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] * 100 / served, 1) if served else 0.0
+        stats["age"] = int(time.time() - cls.refreshed_at) if cls.refreshed_at else None
+        return stats
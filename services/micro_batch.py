@@ -0,0 +1,36 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+
+async def run_micro_batches(
+    queue: asyncio.Queue, batch_size: int, interval: float, write: Callable[[List], Awaitable]
+):
+    """Drain `queue` into write() in batches of up to `batch_size` items.
+
+    A batch is written when it is full or `interval` seconds after its first
+    item arrived, whichever comes first. A None in the queue stops the loop
+    after the items ahead of it have been written.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        batch = [item]
+        deadline = loop.time() + interval
+        stopping = False
+        while len(batch) < batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+        await write(batch)
+        if stopping:
+            return
@@ -0,0 +1,92 @@
+import random
+from array import array
+from typing import Collection, Dict, Optional
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Movie
+
+
+class RandomPicker:
+    """Active movie ids in a flat array, so a random pick is one index lookup.
+
+    Adds and removals are O(1) (swap with the last slot and pop); the array is
+    rebuilt from the database on startup and on a schedule to heal drift.
+    Adds and removals made while a rebuild reads the table are replayed onto
+    the new array when it is swapped in.
+    """
+
+    PICK_ATTEMPTS = 8
+
+    _ids = array("i")
+    _slots: Dict[int, int] = {}
+    _ready = False
+    # movie id -> added (True) or removed (False); collected during a rebuild
+    _changes: Optional[Dict[int, bool]] = None
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        return cls._ready
+
+    @classmethod
+    async def build(cls, session: AsyncSession):
+        if cls._changes is not None:
+            logger.info("Random picker rebuild already running, skipped")
+            return
+        cls._changes = {}
+        try:
+            result = await session.execute(select(Movie.id).where(Movie.is_active == True))
+            ids = array("i", result.scalars().all())
+            changes, cls._changes = cls._changes, None
+            cls._ids = ids
+            cls._slots = {movie_id: slot for slot, movie_id in enumerate(ids)}
+            for movie_id, added in changes.items():
+                if added:
+                    cls.add(movie_id)
+                else:
+                    cls.remove(movie_id)
+        finally:
+            cls._changes = None
+        cls._ready = True
+        logger.info(f"Random picker loaded: {len(ids)} active movies")
+
+    @classmethod
+    def add(cls, movie_id: int):
+        if cls._changes is not None:
+            cls._changes[movie_id] = True
+        if movie_id in cls._slots:
+            return
+        cls._slots[movie_id] = len(cls._ids)
+        cls._ids.append(movie_id)
+
+    @classmethod
+    def remove(cls, movie_id: int):
+        if cls._changes is not None:
+            cls._changes[movie_id] = False
+        slot = cls._slots.pop(movie_id, None)
+        if slot is None:
+            return
+        last = cls._ids.pop()
+        if last != movie_id:
+            cls._ids[slot] = last
+            cls._slots[last] = slot
+
+    @classmethod
+    def pick(cls, exclude: Collection[int] = ()) -> Optional[int]:
+        """Uniform random active id not in `exclude` (e.g. recent daily picks)."""
+        ids = cls._ids
+        if not ids:
+            return None
+        for _ in range(cls.PICK_ATTEMPTS):
+            movie_id = ids[random.randrange(len(ids))]
+            if movie_id not in exclude:
+                return movie_id
+        # Exclusions cover most of the catalog: choose among what is left
+        rest = [movie_id for movie_id in ids if movie_id not in exclude]
+        return random.choice(rest) if rest else None
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        return {"ready": cls._ready, "ids": len(cls._ids)}
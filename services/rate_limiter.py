@@ -0,0 +1,110 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+from redis.commands.core import AsyncScript
+
+from config import config
+from services.cache_service import CacheService
+
+# Token bucket: refills `rate` tokens/s up to `burst`, each update spends `cost`.
+# Runs atomically in Redis, one EVALSHA per update, with Redis' own clock.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return allowed
+"""
+
+
+class RateLimiter:
+    """Per-user token bucket in Redis, with an in-process bucket when Redis is down.
+
+    One token refills every RATE_LIMIT seconds, up to RATE_LIMIT_BURST. Routes
+    spend different amounts, so a text search costs more than flipping a page.
+    """
+
+    ROUTE_COSTS = {
+        "search": 2.0,
+        "code": 1.0,
+        "command": 1.0,
+        "callback": 1.0,
+        "page": 0.5,
+    }
+    PAGE_PREFIXES = ("top", "new", "gpage", "favs", "search", "amovies", "noop")
+    MAX_LOCAL_BUCKETS = 100_000
+
+    _script: Optional[AsyncScript] = None
+    _script_client = None
+    _local: Dict[int, Tuple[float, float]] = {}
+    stats: Dict[str, Dict[str, int]] = {}
+    fallback_checks = 0
+
+    @classmethod
+    async def allow(cls, user_id: int, route: str) -> bool:
+        cost = cls.ROUTE_COSTS.get(route, 1.0)
+        rate = 1 / config.RATE_LIMIT
+        burst = float(config.RATE_LIMIT_BURST)
+
+        allowed = None
+        script = cls._get_script()
+        if script:
+            try:
+                allowed = bool(await script(keys=[f"rl:{user_id}"], args=[rate, burst, cost]))
+            except Exception as e:
+                logger.warning(f"Rate limit script error: {e}")
+        if allowed is None:
+            cls.fallback_checks += 1
+            allowed = cls._allow_local(user_id, rate, burst, cost)
+
+        route_stats = cls.stats.setdefault(route, {"allowed": 0, "rejected": 0})
+        route_stats["allowed" if allowed else "rejected"] += 1
+        return allowed
+
+    @classmethod
+    def _get_script(cls) -> Optional[AsyncScript]:
+        redis = CacheService._redis
+        if redis is None:
+            return None
+        if cls._script is None or cls._script_client is not redis:
+            cls._script = redis.register_script(TOKEN_BUCKET_LUA)
+            cls._script_client = redis
+        return cls._script
+
+    @classmethod
+    def _allow_local(cls, user_id: int, rate: float, burst: float, cost: float) -> bool:
+        now = time.monotonic()
+        tokens, ts = cls._local.get(user_id, (burst, now))
+        tokens = min(burst, tokens + (now - ts) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        if len(cls._local) >= cls.MAX_LOCAL_BUCKETS:
+            # Buckets idle long enough to be full again carry no state
+            full_after = burst / rate
+            cls._local = {uid: v for uid, v in cls._local.items() if now - v[1] < full_after}
+        cls._local[user_id] = (tokens, now)
+        return allowed
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        routes = {}
+        for route, counts in cls.stats.items():
+            total = counts["allowed"] + counts["rejected"]
+            routes[route] = dict(counts, reject_rate=round(counts["rejected"] * 100 / total, 1) if total else 0.0)
+        return {"routes": routes, "fallback_checks": cls.fallback_checks}
@@ -0,0 +1,256 @@
+import asyncio
+import re
+import sys
+import unicodedata
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from database.models import Movie
+
+# Uzbek and Russian Cyrillic -> Uzbek Latin
+_CYRILLIC = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    "ў": "o", "қ": "q", "ғ": "g", "ҳ": "h",
+}
+_APOSTROPHES = "'`´ʻʼ‘’"
+_TRANSLATE = str.maketrans({
+    **_CYRILLIC,
+    **{ch: "" for ch in _APOSTROPHES},
+    "ı": "i",
+    # Phonetic folding so Latin and Cyrillic spellings meet: Хоббит/Hobbit, Вольф/Wolf
+    "x": "h", "w": "v",
+})
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, transliterate to Latin, strip diacritics and apostrophes."""
+    text = (text or "").lower().translate(_TRANSLATE)
+    text = "".join(
+        ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch)
+    )
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance, returning limit + 1 as soon as it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class IndexedMovie:
+    """Lightweight row used for list rendering (same attrs as format_movie_list_item needs)."""
+
+    __slots__ = ("id", "code", "title", "year", "quality", "view_count", "norm")
+
+    def __init__(self, id, code, title, title_uz, title_ru, year, quality, view_count):
+        self.id = id
+        self.code = code
+        self.title = title
+        self.year = year
+        self.quality = quality
+        self.view_count = view_count or 0
+        self.norm = normalize(" ".join(t for t in (title, title_uz, title_ru) if t))
+
+
+class SearchIndex:
+    """In-process title index: transliterated trigram postings + edit-distance ranking.
+
+    Built at startup, updated through CatalogEvents and rebuilt on a
+    schedule. Until the first build finishes, callers use the database.
+    Postings are compact int arrays; removed or edited titles leave stale
+    ids behind, which lookups filter out and the next rebuild drops.
+    Updates that arrive while a rebuild reads the table are recorded and
+    replayed onto the new index when it is swapped in.
+    """
+
+    SUGGEST_CANDIDATES = 30
+    # Trigrams present in more than this share of titles are too common to rank by
+    COMMON_GRAM_SHARE = 0.2
+
+    _entries: Dict[int, IndexedMovie] = {}
+    _postings: Dict[str, array] = {}
+    _ready = False
+    # movie id -> row to index, or None when removed; collected during a rebuild
+    _changes: Optional[Dict[int, Optional[tuple]]] = None
+    memory_bytes = 0
+
+    @classmethod
+    def is_ready(cls) -> bool:
+        return cls._ready
+
+    @classmethod
+    async def build(cls, session: AsyncSession):
+        if cls._changes is not None:
+            logger.info("Search index rebuild already running, skipped")
+            return
+        cls._changes = {}
+        try:
+            result = await session.execute(
+                select(
+                    Movie.id, Movie.code, Movie.title, Movie.title_uz, Movie.title_ru,
+                    Movie.year, Movie.quality, Movie.view_count,
+                ).where(Movie.is_active == True)
+            )
+            rows = result.all()
+            entries, postings, memory = await asyncio.to_thread(cls._build, rows)
+            # No await from here on: nothing can slip between the swap and the replay
+            changes, cls._changes = cls._changes, None
+            cls._entries, cls._postings, cls.memory_bytes = entries, postings, memory
+            for movie_id, row in changes.items():
+                if row is None:
+                    cls._entries.pop(movie_id, None)
+                else:
+                    cls._put(row)
+        finally:
+            cls._changes = None
+        cls._ready = True
+        logger.info(
+            f"Search index built: {len(entries)} titles, {len(postings)} trigrams, "
+            f"{memory / 1024 / 1024:.1f} MB"
+        )
+
+    @staticmethod
+    def _build(rows) -> Tuple[Dict[int, IndexedMovie], Dict[str, array], int]:
+        entries = {}
+        postings = defaultdict(list)
+        for row in rows:
+            entry = IndexedMovie(*row)
+            entries[entry.id] = entry
+            for gram in _trigrams(entry.norm):
+                postings[gram].append(entry.id)
+        postings = {gram: array("i", ids) for gram, ids in postings.items()}
+
+        memory = sys.getsizeof(entries) + sys.getsizeof(postings)
+        for entry in entries.values():
+            memory += sys.getsizeof(entry) + sys.getsizeof(entry.norm) + sys.getsizeof(entry.title)
+        for gram, ids in postings.items():
+            memory += sys.getsizeof(gram) + sys.getsizeof(ids)
+        return entries, postings, memory
+
+    @classmethod
+    def upsert(cls, movie: Movie):
+        if not movie.is_active:
+            cls.remove(movie.id)
+            return
+        row = (
+            movie.id, movie.code, movie.title, movie.title_uz, movie.title_ru,
+            movie.year, movie.quality, movie.view_count,
+        )
+        if cls._changes is not None:
+            cls._changes[movie.id] = row
+        cls._put(row)
+
+    @classmethod
+    def _put(cls, row: tuple):
+        entry = IndexedMovie(*row)
+        old = cls._entries.pop(entry.id, None)
+        cls._entries[entry.id] = entry
+        known = _trigrams(old.norm) if old else set()
+        for gram in _trigrams(entry.norm) - known:
+            cls._postings.setdefault(gram, array("i")).append(entry.id)
+
+    @classmethod
+    def remove(cls, movie_id: int):
+        if cls._changes is not None:
+            cls._changes[movie_id] = None
+        cls._entries.pop(movie_id, None)
+
+    @classmethod
+    def search(cls, query: str, limit: int = 10, offset: int = 0) -> Tuple[List[IndexedMovie], int]:
+        """Substring search over all title variants. Returns (page, total)."""
+        q = normalize(query)
+        if not q:
+            return [], 0
+
+        grams = {q[i:i + 3] for i in range(len(q) - 2)}
+        if grams:
+            postings = sorted((cls._postings.get(g, ()) for g in grams), key=len)
+            candidates = set(postings[0])
+            for ids in postings[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(ids)
+        else:
+            candidates = list(cls._entries)
+
+        entries = cls._entries
+        matches = [entries[i] for i in candidates if i in entries and q in entries[i].norm]
+        prefix = f" {q}"
+        matches.sort(key=lambda e: (prefix in f" {e.norm}", e.view_count, e.id), reverse=True)
+        return matches[offset:offset + limit], len(matches)
+
+    @classmethod
+    def suggest(cls, query: str, limit: int = 5) -> List[IndexedMovie]:
+        """'Did you mean': typo and spelling tolerant matches ranked by edit distance."""
+        q = normalize(query)
+        if len(q) < 2 or not cls._entries:
+            return []
+
+        grams = _trigrams(q)
+        common = len(cls._entries) * cls.COMMON_GRAM_SHARE
+        rare = [g for g in grams if len(cls._postings.get(g, ())) <= common] or list(grams)
+
+        shared = defaultdict(int)
+        for gram in rare:
+            for movie_id in cls._postings.get(gram, ()):
+                shared[movie_id] += 1
+        top = [
+            item for item in sorted(shared.items(), key=lambda item: item[1], reverse=True)
+            if item[0] in cls._entries
+        ][:cls.SUGGEST_CANDIDATES]
+        if not top:
+            return []
+
+        q_words = len(q.split())
+        max_dist = max(1, len(q) // 3)
+
+        ranked = []
+        for movie_id, count in top:
+            entry = cls._entries[movie_id]
+            words = entry.norm.split()
+            best = max_dist + 1
+            for i in range(max(1, len(words) - q_words + 1)):
+                window = " ".join(words[i:i + q_words])
+                best = min(best, _levenshtein(q, window, max_dist))
+                if best == 0:
+                    break
+            if best <= max_dist or count * 2 >= len(rare):
+                ranked.append((best, -count, -entry.view_count, entry))
+
+        ranked.sort(key=lambda item: item[:3])
+        return [item[3] for item in ranked[:limit]]
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        entries = len(cls._entries)
+        return {
+            "ready": cls._ready,
+            "entries": entries,
+            "trigrams": len(cls._postings),
+            "memory_mb": round(cls.memory_bytes / 1024 / 1024, 1),
+            "mb_per_100k": round(cls.memory_bytes / entries * 100000 / 1024 / 1024, 1) if entries else 0.0,
+        }
@@ -0,0 +1,115 @@
+import asyncio
+import csv
+from itertools import islice
+from typing import AsyncIterator, Iterator, List, Tuple
+
+Row = Tuple[int, dict]  # (line number in the file, {lowercased header: value})
+
+
+def iter_sheet_rows(path: str, ext: str) -> Iterator[Row]:
+    """Yield data rows of a CSV or Excel file one at a time.
+
+    Excel files are opened read-only, so rows are parsed lazily from the
+    archive instead of building the whole sheet in memory.
+    """
+    if ext == "csv":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f)
+            headers = _headers(next(reader, []))
+            for values in reader:
+                row = _row(headers, values)
+                if row:
+                    yield reader.line_num, row
+        return
+
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = _headers(next(rows, ()))
+        for line, values in enumerate(rows, start=2):
+            row = _row(headers, values)
+            if row:
+                yield line, row
+    finally:
+        wb.close()
+
+
+async def read_batches(path: str, ext: str, size: int) -> AsyncIterator[List[Row]]:
+    """Parse the file in a worker thread, handing over `size` rows at a time.
+
+    Only the batch being processed is held in memory, whatever the file size.
+    """
+    rows = iter_sheet_rows(path, ext)
+    try:
+        while True:
+            batch = await asyncio.to_thread(lambda: list(islice(rows, size)))
+            if not batch:
+                return
+            yield batch
+    finally:
+        rows.close()
+
+
+class SheetWriter:
+    """Write-only .xlsx writer fed in chunks; call its methods from a worker thread.
+
+    Rows go straight to openpyxl's write-only stream, so memory stays flat.
+    Column widths are tracked as rows arrive, but write-only sheets need
+    them before the first row is written, so they come from the first
+    chunk (capped at MAX_WIDTH).
+    """
+
+    MAX_WIDTH = 50
+
+    def __init__(self, path: str, title: str, headers: List[str]):
+        import openpyxl
+        self.path = path
+        self.headers = headers
+        self.widths = [len(h) for h in headers]
+        self.rows = 0
+        self._wb = openpyxl.Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(title)
+        self._started = False
+
+    def append(self, rows: List[tuple]):
+        for row in rows:
+            for i, value in enumerate(row):
+                if value is not None:
+                    self.widths[i] = max(self.widths[i], len(str(value)))
+        if not self._started:
+            self._write_header()
+        for row in rows:
+            self._ws.append(row)
+        self.rows += len(rows)
+
+    def save(self):
+        if not self._started:
+            self._write_header()
+        self._wb.save(self.path)
+
+    def _write_header(self):
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        from openpyxl.utils import get_column_letter
+
+        for i, width in enumerate(self.widths, start=1):
+            self._ws.column_dimensions[get_column_letter(i)].width = min(width + 2, self.MAX_WIDTH)
+        header = []
+        for title in self.headers:
+            cell = WriteOnlyCell(self._ws, value=title)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        self._ws.append(header)
+        self._started = True
+
+
+def _headers(values) -> List[str]:
+    return [str(v).lower().strip() if v is not None else "" for v in values]
+
+
+def _row(headers: List[str], values) -> dict:
+    return {
+        header: value for header, value in zip(headers, values)
+        if header and value not in (None, "")
+    }
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+from typing import Optional, List
+
+from sqlalchemy import insert
+from loguru import logger
+
+from config import config
+from database.engine import async_session
+from database.models import Statistic
+from services.micro_batch import run_micro_batches
+
+
+class StatsWriter:
+    """Queue-backed, batched writer for the statistics table.
+
+    Handlers enqueue events; a background task bulk-inserts them when
+    STATS_BATCH_SIZE events are collected or STATS_FLUSH_INTERVAL passes.
+    The queue is bounded: when it is full, producers wait up to
+    STATS_PUT_TIMEOUT and the event is dropped after that.
+    """
+
+    _queue: Optional[asyncio.Queue] = None
+    _task: Optional[asyncio.Task] = None
+
+    stats = {"written": 0, "batches": 0, "dropped": 0, "errors": 0}
+
+    @classmethod
+    def start(cls):
+        if cls._task:
+            return
+        cls._queue = asyncio.Queue(maxsize=config.STATS_QUEUE_SIZE)
+        cls._task = asyncio.create_task(cls._run())
+        logger.info("Stats writer started")
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls._task is not None and not cls._task.done()
+
+    @classmethod
+    async def stop(cls):
+        """Drain everything still queued, then stop the writer."""
+        if not cls.is_running():
+            return
+        await cls._queue.put(None)
+        await cls._task
+        cls._task = None
+        logger.info("Stats writer stopped")
+
+    @classmethod
+    async def put(cls, **event):
+        event.setdefault("created_at", datetime.utcnow())
+        try:
+            cls._queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(cls._queue.put(event), timeout=config.STATS_PUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            cls.stats["dropped"] += 1
+
+    @classmethod
+    async def _run(cls):
+        await run_micro_batches(cls._queue, config.STATS_BATCH_SIZE, config.STATS_FLUSH_INTERVAL, cls._write)
+
+    @classmethod
+    async def _write(cls, batch: List[dict]):
+        try:
+            async with async_session() as session:
+                await session.execute(insert(Statistic), batch)
+                await session.commit()
+            cls.stats["written"] += len(batch)
+            cls.stats["batches"] += 1
+        except Exception as e:
+            cls.stats["errors"] += 1
+            logger.error(f"Stats write error ({len(batch)} events lost): {e}")
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        stats = dict(cls.stats)
+        stats["queued"] = cls._queue.qsize() if cls._queue else 0
+        return stats
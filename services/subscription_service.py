@@ -0,0 +1,105 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import config
+from database.models import Channel
+
+
+class SubscriptionService:
+    """Mandatory channel checks with cached channel list and membership status.
+
+    Members are re-checked after SUBSCRIPTION_TTL seconds, non-members (who are
+    expected to join soon) after SUBSCRIPTION_NEGATIVE_TTL. Stale entries are
+    refreshed with concurrent get_chat_member calls.
+    """
+
+    CHANNELS_TTL = 300
+    MAX_ENTRIES = 200_000
+
+    _channels: Optional[List[dict]] = None
+    _channels_expire = 0.0
+    _members: Dict[Tuple[int, int], Tuple[float, bool]] = {}
+    stats = {"cached": 0, "checked": 0, "errors": 0}
+
+    @classmethod
+    async def get_channels(cls, session: AsyncSession) -> List[dict]:
+        if cls._channels is None or cls._channels_expire < time.monotonic():
+            result = await session.execute(
+                select(Channel.channel_id, Channel.title, Channel.channel_username)
+                .where(Channel.is_mandatory == True, Channel.is_active == True)
+            )
+            cls._channels = [
+                {"channel_id": row.channel_id, "title": row.title or "Kanal", "username": row.channel_username}
+                for row in result.all()
+            ]
+            cls._channels_expire = time.monotonic() + cls.CHANNELS_TTL
+        return cls._channels
+
+    @classmethod
+    def invalidate_channels(cls):
+        """Call after channels are added, toggled or removed."""
+        cls._channels = None
+
+    @classmethod
+    async def get_missing(
+        cls, bot: Bot, session: AsyncSession, user_id: int, force: bool = False
+    ) -> List[dict]:
+        """Mandatory channels the user has not joined. force skips cached status."""
+        channels = await cls.get_channels(session)
+        if not channels:
+            return []
+
+        now = time.monotonic()
+        subscribed = {}
+        stale = []
+        for channel in channels:
+            cached = None if force else cls._members.get((user_id, channel["channel_id"]))
+            if cached and cached[0] > now:
+                subscribed[channel["channel_id"]] = cached[1]
+                cls.stats["cached"] += 1
+            else:
+                stale.append(channel)
+
+        if stale:
+            results = await asyncio.gather(*(cls._check(bot, ch["channel_id"], user_id) for ch in stale))
+            if len(cls._members) > cls.MAX_ENTRIES:
+                cls._prune(now)
+            for channel, is_member in zip(stale, results):
+                ttl = config.SUBSCRIPTION_TTL if is_member else config.SUBSCRIPTION_NEGATIVE_TTL
+                cls._members[(user_id, channel["channel_id"])] = (now + ttl, is_member)
+                subscribed[channel["channel_id"]] = is_member
+
+        return [ch for ch in channels if not subscribed[ch["channel_id"]]]
+
+    @classmethod
+    async def _check(cls, bot: Bot, channel_id: int, user_id: int) -> bool:
+        cls.stats["checked"] += 1
+        try:
+            member = await bot.get_chat_member(chat_id=channel_id, user_id=user_id)
+            return member.status not in ("left", "kicked")
+        except TelegramBadRequest:
+            logger.warning(f"Cannot check channel {channel_id}")
+        except Exception as e:
+            logger.error(f"Error checking channel {channel_id}: {e}")
+        # A channel we cannot check must not lock users out of the bot
+        cls.stats["errors"] += 1
+        return True
+
+    @classmethod
+    def _prune(cls, now: float):
+        cls._members = {key: value for key, value in cls._members.items() if value[0] > now}
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        stats = dict(cls.stats)
+        total = stats["cached"] + stats["checked"]
+        stats["hit_rate"] = round(stats["cached"] * 100 / total, 1) if total else 0.0
+        stats["entries"] = len(cls._members)
+        return stats
@@ -0,0 +1,69 @@
+"""Concurrent code allocation never hands out the same code twice."""
+import asyncio
+
+from sqlalchemy import delete, insert
+
+from database.models import Movie, movie_code_seq
+from database.repositories import MovieRepository
+from database.sequences import allocate_codes, peek_code
+
+WORKERS = 8
+BLOCK = 50
+
+
+def test_concurrent_allocations_are_disjoint(sessionmaker):
+    async def allocate_in_own_session():
+        async with sessionmaker() as session:
+            codes = []
+            for _ in range(5):
+                codes += await allocate_codes(session, movie_code_seq, Movie.code, BLOCK)
+                await asyncio.sleep(0)
+            await session.commit()
+            return codes
+
+    async def scenario():
+        return await asyncio.gather(*(allocate_in_own_session() for _ in range(WORKERS)))
+
+    blocks = asyncio.run(scenario())
+    codes = [code for block in blocks for code in block]
+    assert len(codes) == WORKERS * 5 * BLOCK
+    assert len(set(codes)) == len(codes)
+
+
+def test_allocation_skips_codes_typed_in_by_hand(sessionmaker):
+    async def scenario():
+        async with sessionmaker() as session:
+            await session.execute(delete(Movie))
+            start = await peek_code(session, movie_code_seq)
+            taken = [start + 1, start + 3]
+            await session.execute(insert(Movie), [
+                {"code": code, "title": f"Qo'lda {code}", "file_id": f"manual_{code}"} for code in taken
+            ])
+            await session.commit()
+            return taken, await allocate_codes(session, movie_code_seq, Movie.code, 5)
+
+    taken, codes = asyncio.run(scenario())
+    assert len(codes) == 5 and len(set(codes)) == 5
+    assert not set(codes) & set(taken)
+
+
+def test_concurrent_bulk_ingest_gets_unique_codes(sessionmaker):
+    async def ingest(worker: int):
+        rows = [
+            {"title": f"Kino {worker}-{i}", "file_id": f"f_{worker}_{i}", "file_unique_id": f"u_{worker}_{i}"}
+            for i in range(100)
+        ]
+        async with sessionmaker() as session:
+            return await MovieRepository.bulk_ingest(session, rows, chunk_size=25)
+
+    async def scenario():
+        async with sessionmaker() as session:
+            await session.execute(delete(Movie))
+            await session.commit()
+        return await asyncio.gather(*(ingest(worker) for worker in range(WORKERS)))
+
+    results = asyncio.run(scenario())
+    codes = [row.code for result in results for row in result.inserted]
+    assert all(not result.errors and not result.skipped for result in results)
+    assert len(codes) == WORKERS * 100
+    assert len(set(codes)) == len(codes)
@@ -0,0 +1,87 @@
+"""Pinned statement counts for the hot read paths.
+
+A relation touched without selectinload() raises (lazy="raise"), but an
+extra query added to a repository method would go unnoticed; these tests
+fail instead.
+"""
+import asyncio
+
+from sqlalchemy import delete, insert
+
+from database.models import Genre, Movie, User, movie_genres, user_favorites
+from database.repositories import MovieRepository, UserRepository
+from services.cache_service import CacheService
+
+MOVIES = 30
+
+
+async def _seed(sessionmaker) -> int:
+    """Movies with two genres each and a user who favorited all of them; returns the user id."""
+    async with sessionmaker() as session:
+        for table in (user_favorites, movie_genres, Movie, Genre, User):
+            await session.execute(delete(table))
+        genres = [Genre(name_uz=f"Janr {i}") for i in range(3)]
+        movies = [
+            Movie(code=100 + i, title=f"Kino {i}", file_id=f"file_{i}", view_count=i * 7 % 11)
+            for i in range(MOVIES)
+        ]
+        user = User(telegram_id=1)
+        session.add_all([*genres, *movies, user])
+        await session.flush()
+        await session.execute(insert(movie_genres), [
+            {"movie_id": movie.id, "genre_id": genres[(i + k) % 3].id}
+            for i, movie in enumerate(movies) for k in range(2)
+        ])
+        await session.execute(insert(user_favorites), [
+            {"user_id": user.id, "movie_id": movie.id} for movie in movies
+        ])
+        await session.commit()
+        return user.id
+
+
+def test_get_by_code_loads_genres_in_one_extra_query(sessionmaker, statements):
+    async def scenario():
+        await _seed(sessionmaker)
+        async with sessionmaker() as session:
+            statements.clear()
+            movie = await MovieRepository.get_by_code(session, 105)
+            assert len(movie.genres) == 2
+        return len(statements)
+
+    assert asyncio.run(scenario()) == 2  # movie + selectin genres
+
+
+def test_get_popular_is_one_query_per_page(sessionmaker, statements):
+    async def scenario():
+        await _seed(sessionmaker)
+        async with sessionmaker() as session:
+            statements.clear()
+            first = await MovieRepository.get_popular(session, limit=10)
+            counts = [len(statements)]
+            last = first[-1]
+            statements.clear()
+            second = await MovieRepository.get_popular(session, limit=10, after=(last.view_count, last.id))
+            counts.append(len(statements))
+        assert not {m.id for m in first} & {m.id for m in second}
+        return counts
+
+    assert asyncio.run(scenario()) == [1, 1]
+
+
+def test_get_favorites_counts_once_then_pages(sessionmaker, statements):
+    async def scenario():
+        user_id = await _seed(sessionmaker)
+        CacheService._counts.clear()
+        async with sessionmaker() as session:
+            statements.clear()
+            movies, total = await UserRepository.get_favorites(session, user_id, limit=10)
+            counts = [len(statements)]
+            last = movies[-1]
+            statements.clear()
+            await UserRepository.get_favorites(session, user_id, limit=10, after=(last.created_at, last.id))
+            counts.append(len(statements))
+        assert total == MOVIES
+        return counts
+
+    # COUNT + page, then the cached total leaves only the page
+    assert asyncio.run(scenario()) == [2, 1]
@@ -1,10 +1,18 @@
 import math
-from typing import Optional
+import re
+from datetime import datetime, timedelta
+from typing import Optional, Sequence, Tuple
 from database.models import Movie
 
 
 def format_movie_caption(movie: Movie, show_code: bool = True, avg_rating: float = 0, rating_count: int = 0) -> str:
     """Enhanced movie caption with beautiful formatting."""
+    head, body, footer = movie_caption_parts(movie, show_code)
+    return join_movie_caption(head, body, footer, movie.view_count, avg_rating, rating_count)
+
+
+def movie_caption_parts(movie: Movie, show_code: bool = True) -> Tuple[str, str, str]:
+    """The parts of the caption that only change when the movie is edited: (head, body, footer)."""
     lines = []
 
     lines.append("━━━━━━━━━━━━━━━━━━━━━")
@@ -54,20 +62,33 @@ def format_movie_caption(movie: Movie, show_code: bool = True, avg_rating: float
         else:
             lines.append(f"📦 {size_mb:.1f} MB")
 
-    if avg_rating > 0:
-        stars = "⭐" * round(avg_rating) + "☆" * (5 - round(avg_rating))
-        lines.append(f"\n{stars} {avg_rating}/5 ({rating_count} ta baho)")
-
+    body = ""
     if movie.description:
         desc = movie.description[:200]
         if len(movie.description) > 200:
             desc += "..."
-        lines.append(f"\n📝 {desc}")
+        body = f"\n📝 {desc}"
+
+    footer = f"━━━━━━━━━━━━━━━━━━━━━\n🔢 Ulashing: <code>{movie.code}</code>"
+    return "\n".join(lines), body, footer
+
+
+def join_movie_caption(
+    head: str, body: str, footer: str, view_count: int, avg_rating: float = 0, rating_count: int = 0
+) -> str:
+    """Splice rating and view count into the static caption parts."""
+    lines = [head]
+
+    if avg_rating > 0:
+        stars = "⭐" * round(avg_rating) + "☆" * (5 - round(avg_rating))
+        lines.append(f"\n{stars} {avg_rating}/5 ({rating_count} ta baho)")
+
+    if body:
+        lines.append(body)
 
     lines.append("")
-    lines.append(f"👁 {movie.view_count} marta ko'rildi")
-    lines.append("━━━━━━━━━━━━━━━━━━━━━")
-    lines.append(f"🔢 Ulashing: <code>{movie.code}</code>")
+    lines.append(f"👁 {view_count} marta ko'rildi")
+    lines.append(footer)
 
     return "\n".join(lines)
 
@@ -82,6 +103,82 @@ def calculate_pages(total: int, per_page: int) -> int:
     return max(1, math.ceil(total / per_page))
 
 
+_B36 = "0123456789abcdefghijklmnopqrstuvwxyz"
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_b36(n: int) -> str:
+    digits = ""
+    while True:
+        n, r = divmod(n, 36)
+        digits = _B36[r] + digits
+        if not n:
+            return digits
+
+
+def encode_cursor(key, row_id: int, forward: bool = True) -> str:
+    """Keyset cursor for callback data: "a" (after) or "b" (before) + base36 key.id.
+
+    Datetime keys are encoded as microseconds since the epoch.
+    """
+    if isinstance(key, datetime):
+        key = (key - _EPOCH) // timedelta(microseconds=1)
+    return f"{'a' if forward else 'b'}{_to_b36(key)}.{_to_b36(row_id)}"
+
+
+def decode_cursor(token: str, as_datetime: bool = False) -> Tuple[Optional[tuple], Optional[tuple]]:
+    """Inverse of encode_cursor, returned as (after, before) for the repositories."""
+    try:
+        key, row_id = (int(part, 36) for part in token[1:].split("."))
+    except ValueError:
+        return None, None
+    if as_datetime:
+        key = _EPOCH + timedelta(microseconds=key)
+    if token[:1] == "a":
+        return (key, row_id), None
+    if token[:1] == "b":
+        return None, (key, row_id)
+    return None, None
+
+
+def parse_page_callback(data: str) -> Tuple[int, str, str]:
+    """Split "prefix:page:cursor:extra" callback data into (page, cursor, extra)."""
+    parts = data.split(":", 3)
+    page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 1
+    cursor = parts[2] if len(parts) > 2 else ""
+    extra = parts[3] if len(parts) > 3 else ""
+    return page, cursor, extra
+
+
+def page_cursors(movies: Sequence[Movie], key: str) -> Tuple[str, str]:
+    """(prev, next) cursors for a page of movies ordered by (key, id) descending."""
+    first, last = movies[0], movies[-1]
+    return (
+        encode_cursor(getattr(first, key), first.id, forward=False),
+        encode_cursor(getattr(last, key), last.id, forward=True),
+    )
+
+
+def parse_movie_caption(caption: Optional[str]) -> dict:
+    """Guess title, year and language from a channel post caption."""
+    caption = caption or ""
+    title = next((line.strip() for line in caption.splitlines() if line.strip()), "")[:200]
+    title = title or "Nomsiz kino"
+
+    year = None
+    year_match = re.search(r'(20[0-2]\d|19[89]\d)', caption + " " + title)
+    if year_match:
+        year = int(year_match.group(1))
+
+    language = None
+    if "o'zbek" in caption.lower() or "uzbek" in caption.lower():
+        language = "🇺🇿 O'zbek tilida"
+    elif "rus" in caption.lower():
+        language = "🇷🇺 Rus tilida"
+
+    return {"title": title, "year": year, "language": language}
+
+
 def format_file_size(size_bytes: Optional[int]) -> str:
     if not size_bytes:
         return "Noma'lum"